@@ -13,11 +13,13 @@ Setting up configuration and logging inside create_app makes the code reusable a
 """
 
 from flask import Flask, jsonify
-import logging
 from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity
 from config import Config
-from .database import db, create_database
+from .database import db, configure_replicas, create_database
 from .data_utils import initialize_poem_types
+from .logging_config import configure_logging
+from .rate_limit import init_rate_limiter
+from .serializers import JSONProvider
 from backend.data_utils import initialize_poem_types
 from flask_cors import CORS
 from flask_swagger_ui import get_swaggerui_blueprint
@@ -45,32 +47,65 @@ def create_app():
     )
     app.register_blueprint(swagger_ui_blueprint, url_prefix=SWAGGER_URL)
 
-    # Set the HTTP request/response log level to WARNING or ERROR
-    logging.getLogger("httpcore").setLevel(logging.WARNING)
-    logging.getLogger("httpx").setLevel(logging.WARNING)
-    # Configure other aspects of logging
-    logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
-
     app.config.from_object(Config)
     app.config['DEBUG'] = True
+    # jsonify renders like the precompiled serializers (see serializers.py)
+    app.json = JSONProvider(app)
+
+    # Queue-based structured logging: request threads never block on log I/O
+    configure_logging(app)
 
+    # Optional read replicas: GET requests read from them, everything else uses the primary
+    configure_replicas(app)
     db.init_app(app)
 
     migrate = Migrate(app, db)  # Bind Migrate to app and db
 
     from .auth import auth
     from .routes import routes
+    from .admin import admin
+    from .cli import register_commands
+    from .activity import configure_activity_feed
+    from .poet_index import configure_poet_index
+    from .ai_val import configure_ai_validation
+    from .ai_usage import configure_ai_usage
+    from .rhyme_index import rhyme_index
+    from .lifecycle import init_lifecycle
 
     jwt = JWTManager(app)
 
     app.register_blueprint(routes, url_prefix='/')
     app.register_blueprint(auth, url_prefix='/auth')
+    app.register_blueprint(admin, url_prefix='/admin')
+
+    # Token buckets per poet, per IP and for the AI-backed routes
+    init_rate_limiter(app)
+
+    register_commands(app)
+
+    # Size and freshness of the in-memory activity feed
+    configure_activity_feed(app)
+
+    # Freshness of the in-memory poet name index behind /poets/autocomplete
+    configure_poet_index(app)
+
+    # How long concurrent AI validations wait for each other, and how many share a request
+    configure_ai_validation(app)
+
+    # Token, latency and verdict accounting for AI calls, flushed to the database periodically
+    configure_ai_usage(app)
+
+    # Built before gunicorn forks (with --preload), so workers share the index's pages
+    rhyme_index()
 
     create_database(app)
 
     with app.app_context():  # Ensure it is within the application context for database operations
         initialize_poem_types()
 
+    # Shared caches loaded, startup connections closed; fork and per-worker warmup hooks
+    init_lifecycle(app)
+
     @app.route('/protected', methods=['GET'])
     @jwt_required()
     def protected():
@@ -0,0 +1,199 @@
+"""
+The global activity feed: recent contributions across the platform, newest first.
+
+The first page of the global feed, the homepage's most-hit read, is served from memory:
+    - a ring buffer (deque) holds the newest ACTIVITY_BUFFER_SIZE contributions, filled
+      from the database once and then fed by every commit that adds lines, with events
+      built from the flushed lines themselves;
+    - pages are rendered to JSON bytes once and reused until something changes.
+New contributions invalidate the rendered pages; edits and deletions reload the buffer.
+Each worker process has its own buffer, so it is also refreshed after
+ACTIVITY_CACHE_SECONDS to pick up the other workers' writes.
+
+Other pages (per poet, or after a cursor) are keyset-paginated queries on
+(submitted_at, id) whose rendered JSON is cached the same way.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from pydantic import TypeAdapter
+from sqlalchemy import event, inspect
+from .database import RoutingSession
+from .models import Poem, PoemDetails, Poet
+from .pagination import decode_cursor, encode_cursor
+from .poem_utils import get_poem_contributions_paginated
+from .schemas import ActivityPageResponse
+
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_PAGE_SIZE = 20
+ACTIVITY_MAX_PAGE_SIZE = 100
+# Rendered pages kept at most; the cache is simply emptied when it grows past this
+ACTIVITY_MAX_CACHED_PAGES = 1024
+
+# Attributes shown in the feed: changing them makes the buffered events stale
+_FEED_ATTRIBUTES = {
+    PoemDetails: ('poem_id', 'poet_id', 'content', 'submitted_at'),
+    Poem: ('title',),
+    Poet: ('poet_name',),
+}
+
+activity_page_adapter = TypeAdapter(ActivityPageResponse)
+
+
+def _event(row):
+    return {
+        'id': row.id,
+        'poem_id': row.poem_id,
+        'poem_title': row.poem_title,
+        'poet_id': row.poet_id,
+        'poet_name': row.poet_name,
+        'content': row.content,
+        'submitted_at': row.submitted_at,
+    }
+
+
+def _line_event(session, line):
+    # Poem and poet are usually in the identity map already; otherwise one primary-key
+    # load on the flush's own connection
+    return {
+        'id': line.id,
+        'poem_id': line.poem_id,
+        'poem_title': session.get(Poem, line.poem_id).title,
+        'poet_id': line.poet_id,
+        'poet_name': session.get(Poet, line.poet_id).poet_name,
+        'content': line.content,
+        'submitted_at': line.submitted_at,
+    }
+
+
+def _render(events, limit):
+    next_cursor = None
+    if len(events) > limit:
+        last = events[limit - 1]
+        next_cursor = encode_cursor(last['submitted_at'], last['id'])
+    return activity_page_adapter.dump_json(activity_page_adapter.validate_python(
+        {'events': events[:limit], 'next_cursor': next_cursor}
+    ))
+
+
+class ActivityFeed:
+    """
+    In-memory ring buffer of the newest contributions plus a cache of rendered pages.
+    Thread-safe; one instance per process.
+    """
+
+    def __init__(self, size=200, max_age=5.0):
+        self.size = size
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=size)
+        self._loaded_at = None
+        self._pages = {}
+
+    def configure(self, size, max_age):
+        with self._lock:
+            self.size, self.max_age = size, max_age
+            self._events = deque(maxlen=size)
+            self._loaded_at = None
+            self._pages.clear()
+
+    def _fresh(self, created_at):
+        return created_at is not None and time.monotonic() - created_at < self.max_age
+
+    def page(self, poet_id=None, cursor=None, limit=ACTIVITY_PAGE_SIZE):
+        """
+        One page of the feed as JSON bytes. Raises ValueError for a malformed cursor.
+        """
+        key = (poet_id, cursor, limit)
+        with self._lock:
+            cached = self._pages.get(key)
+            if cached and self._fresh(cached[1]):
+                return cached[0]
+
+        if poet_id is None and cursor is None and limit < self.size:
+            body = _render(self._newest(limit + 1), limit)
+        else:
+            before = decode_cursor(cursor) if cursor else None
+            rows = get_poem_contributions_paginated(poet_id=poet_id, before=before, limit=limit + 1)
+            body = _render([_event(row) for row in rows], limit)
+
+        with self._lock:
+            if len(self._pages) >= ACTIVITY_MAX_CACHED_PAGES:
+                self._pages.clear()
+            self._pages[key] = (body, time.monotonic())
+        return body
+
+    def _newest(self, count):
+        with self._lock:
+            if self._fresh(self._loaded_at):
+                return list(self._events)[:count]
+
+        rows = get_poem_contributions_paginated(limit=self.size)
+        with self._lock:
+            self._events = deque((_event(row) for row in rows), maxlen=self.size)
+            self._loaded_at = time.monotonic()
+            return list(self._events)[:count]
+
+    def push(self, events):
+        """
+        Add the events of newly committed contributions to the front of the buffer.
+        """
+        with self._lock:
+            self._pages.clear()
+            if self._loaded_at is None:
+                return
+            for item in sorted(events, key=lambda item: (item['submitted_at'], item['id'])):
+                self._events.appendleft(item)
+
+    def invalidate(self):
+        """
+        Drop everything; the next read reloads the buffer from the database.
+        """
+        with self._lock:
+            self._loaded_at = None
+            self._pages.clear()
+
+
+feed = ActivityFeed()
+
+
+def configure_activity_feed(app):
+    feed.configure(app.config.get('ACTIVITY_BUFFER_SIZE', 200), app.config.get('ACTIVITY_CACHE_SECONDS', 5.0))
+
+
+def _changed(obj, attributes):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def note_activity_changes(session, flush_context):
+    # Anything that changes lines, titles or names already in the feed needs a reload
+    if any(isinstance(obj, (PoemDetails, Poem, Poet)) for obj in session.deleted) or any(
+        _changed(obj, _FEED_ATTRIBUTES[type(obj)]) for obj in session.dirty if type(obj) in _FEED_ATTRIBUTES
+    ):
+        session.info['activity_stale'] = True
+    if session.info.get('activity_stale'):
+        return
+    new_lines = [obj for obj in session.new if isinstance(obj, PoemDetails)]
+    if new_lines:
+        session.info.setdefault('activity_new', []).extend(_line_event(session, line) for line in new_lines)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def publish_activity(session):
+    events = session.info.pop('activity_new', None)
+    if session.info.pop('activity_stale', False):
+        feed.invalidate()
+    elif events:
+        feed.push(events)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def forget_activity(session):
+    session.info.pop('activity_new', None)
+    session.info.pop('activity_stale', None)
@@ -0,0 +1,70 @@
+"""
+Operational endpoints for the poets listed in ADMIN_EMAILS (see config.Config).
+Numbers come from the process that answers the request.
+"""
+
+import logging
+from functools import wraps
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required
+from .ai_usage import stored_usage, tracker
+from .ai_val import batcher
+from .poet_utils import get_current_poet
+from .rate_limit import limiter
+
+
+logger = logging.getLogger(__name__)
+
+admin = Blueprint('admin', __name__)
+
+
+def admin_required(view):
+    """
+    Route decorator: only logged-in poets whose email is in ADMIN_EMAILS get through.
+    """
+    @wraps(view)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        try:
+            poet = get_current_poet()
+        except ValueError:
+            poet = None
+        if not poet or poet.email.lower() not in current_app.config.get('ADMIN_EMAILS', []):
+            return jsonify({'error': 'This corner of the garden is for admins only. 🌵'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@admin.route('/rate-limits', methods=['GET'])
+@admin_required
+def get_rate_limits():
+    """
+    Rate limit rules and how many requests each one let through or rejected.
+    """
+    return jsonify(limiter.snapshot()), 200
+
+
+@admin.route('/ai-batching', methods=['GET'])
+@admin_required
+def get_ai_batching():
+    """
+    How full the AI validation batches are, and why they were sent.
+    """
+    return jsonify(batcher.snapshot()), 200
+
+
+@admin.route('/ai-usage', methods=['GET'])
+@admin_required
+def get_ai_usage():
+    """
+    Tokens, estimated cost, latency and outcomes of AI calls, and how often the AI and the
+    syllable counter agree. With `days`, also the stored figures of all workers.
+    """
+    days = request.args.get('days', type=int)
+    if days is not None and days < 1:
+        return jsonify({'error': 'days must be a positive number. 📅'}), 400
+
+    usage = {'process': tracker.snapshot()}
+    if days is not None:
+        usage['stored'] = stored_usage(days)
+    return jsonify(usage), 200
@@ -0,0 +1,187 @@
+"""
+Micro-batching for AI validations.
+
+Concurrent submissions each used to pay for a full chat completion. The batcher collects
+the validations that arrive within a short window (AI_BATCH_WAIT_MS) or until
+AI_BATCH_MAX_SIZE are waiting, sends them in one request and hands every caller its
+own verdict back.
+
+There is no background thread: the first caller of a batch is its leader. It waits for
+the window to pass (or for the batch to fill up), closes the batch and sends it, while
+the other callers wait for their results. With batching disabled, or when a batch only
+holds one item, the caller sends its request by itself.
+
+Under the ASGI server (see asgi.py) AI-bound requests run as greenlets on the event loop
+instead of threads; submit() notices and batches them with asyncio primitives, so a
+waiting caller does not block the loop.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from sqlalchemy.util.concurrency import await_only, greenlet_spawn, in_greenlet
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Batch:
+    def __init__(self):
+        self.items = []
+        self.futures = []
+        self.full = threading.Event()
+
+
+class _AsyncBatch:
+    def __init__(self):
+        self.items = []
+        self.futures = []
+        self.full = asyncio.Event()
+
+
+class MicroBatcher:
+    """
+    Groups concurrent calls into batches for `send_batch(items) -> results`, where
+    results are in the same order as the items. One instance per process.
+    """
+
+    def __init__(self, send_batch, max_size=8, max_wait=0.015):
+        self.send_batch = send_batch
+        self.enabled = True
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._open = None
+        self._open_async = None
+        self._leaders = set()
+        self.metrics = {'batches': 0, 'items': 0, 'full': 0, 'timeout': 0, 'errors': 0, 'sizes': Counter()}
+
+    def configure(self, enabled, max_size, max_wait):
+        self.enabled = enabled
+        self.max_size = max(1, max_size)
+        self.max_wait = max(0.0, max_wait)
+
+    def submit(self, item):
+        """
+        Add an item to the open batch and block until its result is known.
+        Exceptions raised by send_batch reach every caller of the batch.
+        """
+        if not self.enabled or self.max_size == 1:
+            return self._send([item])[0]
+        if in_greenlet():
+            return await_only(self._submit_async(item))
+
+        future = Future()
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            batch.items.append(item)
+            batch.futures.append(future)
+            if len(batch.items) >= self.max_size:
+                # Nobody can join a full batch; the leader sends it right away
+                self._open = None
+                batch.full.set()
+
+        if leader:
+            filled = batch.full.wait(self.max_wait)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+            self._dispatch(batch, 'full' if filled else 'timeout')
+        return future.result()
+
+    async def _submit_async(self, item):
+        # Only ever runs on the event loop's thread, so the open batch needs no lock
+        future = asyncio.get_running_loop().create_future()
+        batch = self._open_async
+        leader = batch is None
+        if leader:
+            batch = self._open_async = _AsyncBatch()
+        batch.items.append(item)
+        batch.futures.append(future)
+        if len(batch.items) >= self.max_size:
+            self._open_async = None
+            batch.full.set()
+
+        if leader:
+            # The batch is sent by a task of its own, so a leader whose client left (and
+            # whose request was cancelled, see asgi.py) does not strand the other callers
+            task = asyncio.create_task(self._lead_async(batch))
+            self._leaders.add(task)
+            task.add_done_callback(self._leaders.discard)
+        return await asyncio.shield(future)
+
+    async def _lead_async(self, batch):
+        try:
+            await asyncio.wait_for(batch.full.wait(), self.max_wait)
+            filled = True
+        except asyncio.TimeoutError:
+            filled = False
+        if self._open_async is batch:
+            self._open_async = None
+        await self._dispatch_async(batch, 'full' if filled else 'timeout')
+
+    def _count(self, size, reason):
+        with self._lock:
+            self.metrics['batches'] += 1
+            self.metrics['items'] += size
+            self.metrics[reason] += 1
+            self.metrics['sizes'][size] += 1
+
+    async def _dispatch_async(self, batch, reason):
+        self._count(len(batch.items), reason)
+        try:
+            # send_batch is sync code; in a greenlet its AI request is awaited, not blocking
+            results = await greenlet_spawn(self._send, batch.items)
+        except Exception as e:
+            with self._lock:
+                self.metrics['errors'] += 1
+            for future in batch.futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(batch.futures, results):
+            future.set_result(result)
+
+    def _send(self, items):
+        started = time.perf_counter()
+        results = self.send_batch(items)
+        logger.debug("AI batch of %s sent in %.0f ms", len(items), (time.perf_counter() - started) * 1000)
+        return results
+
+    def _dispatch(self, batch, reason):
+        self._count(len(batch.items), reason)
+        try:
+            results = self._send(batch.items)
+        except Exception as e:
+            with self._lock:
+                self.metrics['errors'] += 1
+            for future in batch.futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(batch.futures, results):
+            future.set_result(result)
+
+    def snapshot(self):
+        """
+        Batch fill figures of this process, for the admin endpoint.
+        """
+        with self._lock:
+            batches, items = self.metrics['batches'], self.metrics['items']
+            return {
+                'enabled': self.enabled,
+                'max_size': self.max_size,
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+                'batches': batches,
+                'items': items,
+                'average_size': round(items / batches, 2) if batches else None,
+                'average_fill': round(items / (batches * self.max_size), 3) if batches else None,
+                'flushed_full': self.metrics['full'],
+                'flushed_on_timeout': self.metrics['timeout'],
+                'errors': self.metrics['errors'],
+                'sizes': {str(size): count for size, count in sorted(self.metrics['sizes'].items())},
+            }
@@ -0,0 +1,261 @@
+"""
+Accounting for AI calls: prompt and completion tokens, estimated cost, latency, model,
+outcome and poem form of every call, plus how often the AI and the local syllable
+counter (poem_utils.count_syllables) reach the same verdict on a line.
+
+Everything is aggregated in memory per process (GET /admin/ai-usage) and flushed as
+hourly rows into ai_usage_stats and ai_verdict_stats (models.AIUsageStats and
+AIVerdictStats) every AI_USAGE_FLUSH_SECONDS, by the first validation after the interval,
+and once more at shutdown. Stored rows are added to, so they sum up across workers.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from flask import has_app_context
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from .asgi import run_blocking
+from .database import db
+from .models import AIUsageStats, AIVerdictStats
+
+
+logger = logging.getLogger(__name__)
+
+# USD per million prompt / completion tokens, for the cost estimate
+MODEL_PRICES = {'gpt-4o-mini': (0.15, 0.60)}
+
+_USAGE_KEY = ('period_start', 'model', 'form', 'outcome')
+_VERDICT_KEY = ('period_start', 'form', 'ai_verdict', 'counter_verdict')
+
+
+def _hour(now):
+    return now.replace(minute=0, second=0, microsecond=0)
+
+
+def estimated_cost(model, prompt_tokens, completion_tokens):
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    return round((prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000, 6)
+
+
+def _add_rows(conn, table, key_columns, rows):
+    """
+    Add the rows' counters to the stored rows with the same key, creating missing ones.
+    """
+    value_columns = [name for name in rows[0] if name not in key_columns]
+    dialect = {'postgresql': postgresql, 'sqlite': sqlite}.get(conn.dialect.name)
+    if dialect is not None:
+        statement = dialect.insert(table)
+        conn.execute(statement.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={name: table.c[name] + statement.excluded[name] for name in value_columns},
+        ), rows)
+        return
+
+    for row in rows:
+        result = conn.execute(
+            update(table)
+            .where(*(table.c[name] == row[name] for name in key_columns))
+            .values({name: table.c[name] + row[name] for name in value_columns})
+        )
+        if result.rowcount == 0:
+            conn.execute(insert(table).values(**row))
+
+
+class AIUsageTracker:
+    """
+    Call and verdict counters of this process: totals since start for the admin endpoint,
+    and the hourly deltas not written to the database yet.
+    """
+
+    def __init__(self, flush_interval=60.0):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._started_at = datetime.now(timezone.utc)
+        self._calls = defaultdict(Counter)        # (model, form, outcome) -> counters
+        self._max_latency = defaultdict(float)
+        self._verdicts = Counter()                # (form, ai_verdict, counter_verdict) -> lines
+        self._pending_calls = defaultdict(Counter)
+        self._pending_verdicts = Counter()
+        self._flushed_at = time.monotonic()
+
+    def record_call(self, model, form, outcome, lines, prompt_tokens, completion_tokens, latency_ms):
+        counters = Counter(calls=1, lines=lines, prompt_tokens=prompt_tokens,
+                           completion_tokens=completion_tokens, latency_ms=latency_ms)
+        key = (model, form, outcome)
+        with self._lock:
+            self._calls[key].update(counters)
+            self._max_latency[key] = max(self._max_latency[key], latency_ms)
+            self._pending_calls[(_hour(datetime.now(timezone.utc)),) + key].update(counters)
+
+    def record_verdict(self, form, ai_verdict, counter_verdict):
+        key = (form, ai_verdict, counter_verdict)
+        with self._lock:
+            self._verdicts[key] += 1
+            self._pending_verdicts[(_hour(datetime.now(timezone.utc)),) + key] += 1
+
+    def maybe_flush(self):
+        if time.monotonic() - self._flushed_at >= self.flush_interval and has_app_context():
+            run_blocking(self.flush)
+
+    def flush(self):
+        """
+        Write the pending hourly deltas. On failure they are kept for the next flush.
+        """
+        with self._lock:
+            calls, verdicts = self._pending_calls, self._pending_verdicts
+            self._pending_calls, self._pending_verdicts = defaultdict(Counter), Counter()
+            self._flushed_at = time.monotonic()
+        if not (calls or verdicts):
+            return
+
+        usage_rows = [
+            {**dict(zip(_USAGE_KEY, key)), 'calls': c['calls'], 'lines': c['lines'],
+             'prompt_tokens': c['prompt_tokens'], 'completion_tokens': c['completion_tokens'],
+             'latency_ms': c['latency_ms']}
+            for key, c in calls.items()
+        ]
+        verdict_rows = [{**dict(zip(_VERDICT_KEY, key)), 'lines': lines} for key, lines in verdicts.items()]
+        try:
+            with db.engine.begin() as conn:
+                if usage_rows:
+                    _add_rows(conn, AIUsageStats.__table__, _USAGE_KEY, usage_rows)
+                if verdict_rows:
+                    _add_rows(conn, AIVerdictStats.__table__, _VERDICT_KEY, verdict_rows)
+        except Exception as e:
+            logger.warning('Could not store AI usage, keeping it for the next flush: %s', e)
+            with self._lock:
+                for key, counters in calls.items():
+                    self._pending_calls[key].update(counters)
+                self._pending_verdicts.update(verdicts)
+
+    def snapshot(self):
+        """
+        Usage and agreement figures of this process, for the admin endpoint.
+        """
+        with self._lock:
+            calls = {key: Counter(counters) for key, counters in self._calls.items()}
+            max_latency = dict(self._max_latency)
+            verdicts = Counter(self._verdicts)
+            pending = len(self._pending_calls) + len(self._pending_verdicts)
+        return {
+            'since': self._started_at.isoformat(),
+            'unflushed_rows': pending,
+            **summarize(calls, verdicts, max_latency),
+        }
+
+
+def summarize(calls, verdicts, max_latency=None):
+    """
+    Turn {(model, form, outcome): counters} and {(form, ai_verdict, counter_verdict): lines}
+    into totals, per-call breakdowns and agreement rates per form.
+    """
+    breakdown = []
+    totals = Counter()
+    cost = 0.0
+    for (model, form, outcome), c in sorted(calls.items()):
+        call_cost = estimated_cost(model, c['prompt_tokens'], c['completion_tokens'])
+        cost += call_cost or 0
+        totals.update(c)
+        entry = {
+            'model': model, 'form': form, 'outcome': outcome,
+            'calls': c['calls'], 'lines': c['lines'],
+            'prompt_tokens': c['prompt_tokens'], 'completion_tokens': c['completion_tokens'],
+            'estimated_cost_usd': call_cost,
+            'average_latency_ms': round(c['latency_ms'] / c['calls'], 1) if c['calls'] else None,
+        }
+        if max_latency is not None:
+            entry['max_latency_ms'] = round(max_latency.get((model, form, outcome), 0), 1)
+        breakdown.append(entry)
+
+    agreement = defaultdict(Counter)
+    for (form, ai_verdict, counter_verdict), lines in verdicts.items():
+        stats = agreement[form]
+        stats['lines'] += lines
+        if ai_verdict == 'error':
+            stats['ai_errors'] += lines
+        elif ai_verdict == counter_verdict:
+            stats['agreed'] += lines
+        else:
+            stats[f'ai_{ai_verdict}_counter_{counter_verdict}'] += lines
+
+    return {
+        'totals': {
+            'calls': totals['calls'],
+            'lines': totals['lines'],
+            'prompt_tokens': totals['prompt_tokens'],
+            'completion_tokens': totals['completion_tokens'],
+            'estimated_cost_usd': round(cost, 6),
+            'average_latency_ms': round(totals['latency_ms'] / totals['calls'], 1) if totals['calls'] else None,
+        },
+        'calls': breakdown,
+        'agreement': {
+            form: {
+                'lines': stats['lines'],
+                'agreed': stats['agreed'],
+                'ai_pass_counter_fail': stats['ai_pass_counter_fail'],
+                'ai_fail_counter_pass': stats['ai_fail_counter_pass'],
+                'ai_errors': stats['ai_errors'],
+                'agreement_rate': (
+                    round(stats['agreed'] / (stats['lines'] - stats['ai_errors']), 3)
+                    if stats['lines'] > stats['ai_errors'] else None
+                ),
+            }
+            for form, stats in sorted(agreement.items())
+        },
+    }
+
+
+def stored_usage(days):
+    """
+    The same figures from the stored hourly rows of the last `days` days, across all workers.
+    """
+    since = _hour(datetime.now(timezone.utc)) - timedelta(days=days)
+    usage, verdicts_table = AIUsageStats.__table__, AIVerdictStats.__table__
+
+    calls = {}
+    for row in db.session.execute(
+        select(usage.c.model, usage.c.form, usage.c.outcome,
+               func.sum(usage.c.calls).label('calls'), func.sum(usage.c.lines).label('lines'),
+               func.sum(usage.c.prompt_tokens).label('prompt_tokens'),
+               func.sum(usage.c.completion_tokens).label('completion_tokens'),
+               func.sum(usage.c.latency_ms).label('latency_ms'))
+        .where(usage.c.period_start >= since)
+        .group_by(usage.c.model, usage.c.form, usage.c.outcome)
+    ):
+        calls[(row.model, row.form, row.outcome)] = Counter(
+            calls=row.calls, lines=row.lines, prompt_tokens=row.prompt_tokens,
+            completion_tokens=row.completion_tokens, latency_ms=row.latency_ms,
+        )
+
+    verdicts = Counter()
+    for row in db.session.execute(
+        select(verdicts_table.c.form, verdicts_table.c.ai_verdict, verdicts_table.c.counter_verdict,
+               func.sum(verdicts_table.c.lines).label('lines'))
+        .where(verdicts_table.c.period_start >= since)
+        .group_by(verdicts_table.c.form, verdicts_table.c.ai_verdict, verdicts_table.c.counter_verdict)
+    ):
+        verdicts[(row.form, row.ai_verdict, row.counter_verdict)] = row.lines
+
+    return {'days': days, 'since': since.isoformat(), **summarize(calls, verdicts)}
+
+
+tracker = AIUsageTracker()
+
+
+def configure_ai_usage(app):
+    """
+    Apply AI_USAGE_FLUSH_SECONDS and store whatever is left when the process exits.
+    """
+    tracker.flush_interval = app.config.get('AI_USAGE_FLUSH_SECONDS', 60)
+
+    def flush_at_exit():
+        with app.app_context():
+            tracker.flush()
+
+    atexit.register(flush_at_exit)
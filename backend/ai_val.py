@@ -1,31 +1,106 @@
 import os
-from openai import OpenAI
+import json
+import time
+from openai import AsyncOpenAI, OpenAI
 import logging
 from dotenv import load_dotenv
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+from .ai_batching import MicroBatcher
+from .ai_usage import tracker
+from .database import release_connection
+from .poem_utils import count_syllables
 
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+logger = logging.getLogger(__name__)
+
+AI_MODEL = "gpt-4o-mini"
+HAIKU_SYLLABLES = {1: 5, 2: 7, 3: 5}
+POEM_FORMS = {1: "Haiku", 2: "Nonet"}
+
+# Created on first use in each process: an HTTP connection pool must not be shared across a fork
+_client = None
+_client_pid = None
+# The AsyncOpenAI client used by requests served on the ASGI event loop (see asgi.py)
+_async_client = None
+_async_client_pid = None
+
+
+def get_client():
+    """
+    The OpenAI client of this process.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        _client_pid = os.getpid()
+    return _client
+
+
+def get_async_client():
+    global _async_client, _async_client_pid
+    if _async_client is None or _async_client_pid != os.getpid():
+        _async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        _async_client_pid = os.getpid()
+    return _async_client
+
+
+def reset_client():
+    """
+    Forget the clients without closing them (after a fork their connections belong to the parent).
+    """
+    global _client, _client_pid, _async_client, _async_client_pid
+    _client = _async_client = None
+    _client_pid = _async_client_pid = None
+
+
+def create_completion(**kwargs):
+    """
+    chat.completions.create: awaited on the event loop when the request is served in
+    async mode (asgi.py), a blocking call otherwise.
+    """
+    if in_greenlet():
+        return await_only(get_async_client().chat.completions.create(**kwargs))
+    return get_client().chat.completions.create(**kwargs)
 
 
 def fetch_poem_validation_from_ai(poem_line, line_number, poem_type_id):
     """
     Sends a poem line to OpenAI's API for validation based on the specific poem type.
     It explicitly ensures validation is focused on a specific line number.
+    Concurrent validations are sent together, see validate_batch.
+    """
+    if poem_type_id not in POEM_FORMS:
+        return "Error: Poem type not recognized."
+    # Nothing is queried while waiting for the model: don't hold a pooled connection meanwhile
+    release_connection()
+    result = batcher.submit((poem_line, line_number, poem_type_id))
+    _record_verdict(poem_line, line_number, poem_type_id, result)
+    tracker.maybe_flush()
+    return result
+
+
+def validate_line(item):
+    """
+    Validates one (poem_line, line_number, poem_type_id) item with its own request.
     """
+    poem_line, line_number, poem_type_id = item
     if poem_type_id == 1:
         return fetch_haiku_validation_from_ai(poem_line, line_number)
-    elif poem_type_id == 2:
-        return fetch_nonet_validation_from_ai(poem_line, line_number)
-    else:
-        return "Error: Poem type not recognized."
+    return fetch_nonet_validation_from_ai(poem_line, line_number)
+
+
+def expected_syllables(line_number, poem_type_id):
+    if poem_type_id == 1:
+        return HAIKU_SYLLABLES.get(line_number)
+    return 9 - (line_number - 1)
 
 
 def fetch_haiku_validation_from_ai(poem_line, line_number):
     """
     Sends a Haiku poem line to OpenAI's API for validation based on the 5-7-5 syllable structure.
     """
-    print(f"Fetching validation for line: '{poem_line}' with line number: {line_number}")
+    logger.debug("Fetching validation for line: '%s' with line number: %s", poem_line, line_number)
 
     prompt = f"""
     You are an expert in poetry validation, focusing on syllable counting accuracy. 
@@ -40,57 +115,185 @@ def fetch_haiku_validation_from_ai(poem_line, line_number):
     If it does not, respond with 'Fail' and explain the syllable count in one concise sentence, noting the total syllables you counted.
     """
 
-    return make_ai_request(prompt)
+    return make_ai_request(prompt, form="Haiku")
 
 
 def fetch_nonet_validation_from_ai(poem_line, line_number):
     """
     Sends a Nonet poem line to OpenAI's API for validation based on the 9-8-7-6-5-4-3-2-1 syllable structure.
     """
-    expected_syllables = 9 - (line_number - 1)
+    syllables = expected_syllables(line_number, 2)
     prompt = f"""
     You are an expert poetry validator. Given the Nonet structure, validate the following line.
 
     Poem line: "{poem_line}"
     Line number: {line_number}
 
-    Expected syllables: {expected_syllables}
+    Expected syllables: {syllables}
 
     If the line has the correct number of syllables, respond with 'Pass'.
     If it does not, respond with 'Fail' and concisely explain the syllable count issue.
     """
     
-    return make_ai_request(prompt)
+    return make_ai_request(prompt, form="Nonet")
 
 
-def make_ai_request(prompt):
+def make_ai_request(prompt, form="Unknown"):
     """
     Helper function to handle sending the prompt to OpenAI and parsing the response.
+    Every call is accounted for in ai_usage.tracker under the given poem form.
     """
     messages = [{"role": "user", "content": prompt}]
+    started = time.perf_counter()
+    response = None
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        response = create_completion(
+            model=AI_MODEL,
             messages=messages,
             # temperature=0.3,
         )
 
-        # Debug print the entire response
-        print("API Response:", response)
+        # Log a summary of the response, not the whole object
+        logger.debug("AI response %s from %s, usage: %s", response.id, response.model, response.usage)
 
         choices = response.choices
         if choices and len(choices) > 0:
             response_content = choices[0].message.content.strip()
             if "Pass" in response_content:
-                return "Pass"
+                result = "Pass"
             elif "Fail" in response_content:
-                return f"{response_content}"
+                result = f"{response_content}"
             else:
-                logging.error(f"Unexpected response content: {response_content}")
-                return "Error: Unexpected response from AI."
+                logger.error('Unexpected response content: %s', response_content)
+                result = "Error: Unexpected response from AI."
         else:
-            logging.error("Error: 'choices' missing or empty in response.")
+            logger.error("Error: 'choices' missing or empty in response.")
+            result = "Error: No response from AI."
+    except Exception as e:
+        logger.error('Error: %s', e)
+        result = f"Error: {str(e)}"
+
+    outcome = "error" if response is None else ("unusable" if result.startswith("Error") else "ok")
+    _record_call(form, 1, outcome, response, started)
+    return result
+
+
+def _record_call(form, lines, outcome, response, started):
+    usage = getattr(response, "usage", None)
+    tracker.record_call(
+        getattr(response, "model", None) or AI_MODEL,
+        form,
+        outcome,
+        lines,
+        getattr(usage, "prompt_tokens", None) or 0,
+        getattr(usage, "completion_tokens", None) or 0,
+        (time.perf_counter() - started) * 1000,
+    )
+
+
+def _record_verdict(poem_line, line_number, poem_type_id, result):
+    # How the local syllable counter judges the same line, to see where the AI is still needed
+    ai_verdict = "pass" if result == "Pass" else "fail" if "Fail" in result else "error"
+    counter_verdict = "pass" if count_syllables(poem_line) == expected_syllables(line_number, poem_type_id) else "fail"
+    tracker.record_verdict(POEM_FORMS[poem_type_id], ai_verdict, counter_verdict)
+
+
+def validate_batch(items):
+    """
+    Validates several (poem_line, line_number, poem_type_id) items with a single request that
+    asks for one JSON verdict per line. Results come back in the order of the items; lines the
+    AI left out of its answer are validated on their own.
+    """
+    if len(items) == 1:
+        return [validate_line(items[0])]
+
+    lines = [
+        {
+            "id": index,
+            "form": POEM_FORMS[poem_type_id],
+            "line_number": line_number,
+            "expected_syllables": expected_syllables(line_number, poem_type_id),
+            "line": poem_line,
+        }
+        for index, (poem_line, line_number, poem_type_id) in enumerate(items, start=1)
+    ]
+    prompt = f"""
+    You are an expert in poetry validation, focusing on syllable counting accuracy.
+    Your task is to validate the syllable count of each of the poem lines below against the syllables it is expected to have.
+
+    Carefully count syllables for each word, considering common syllabic patterns for repetitions and ignoring punctuation.
+    Judge every line on its own.
+
+    Lines: {json.dumps(lines, ensure_ascii=False)}
+
+    Respond with a JSON object of the form {{"results": [{{"id": <id>, "verdict": "Pass" or "Fail", "reason": "..."}}]}},
+    with one result per line. For 'Fail', the reason explains the syllable count in one concise sentence, noting the total syllables you counted.
+    """
+
+    forms = {POEM_FORMS[poem_type_id] for _, _, poem_type_id in items}
+    verdicts = make_ai_batch_request(prompt, forms.pop() if len(forms) == 1 else "Mixed", len(items))
+    if isinstance(verdicts, str):
+        # The request itself failed: every line gets the same error
+        return [verdicts] * len(items)
+
+    missing = [index for index in range(1, len(items) + 1) if index not in verdicts]
+    if missing:
+        logger.warning('AI batch answer left out %s of %s lines, validating them one by one.', len(missing), len(items))
+    return [verdicts.get(index) or validate_line(item) for index, item in enumerate(items, start=1)]
+
+
+def make_ai_batch_request(prompt, form, lines):
+    """
+    Sends a batch prompt of `lines` lines and parses its JSON answer into {id: 'Pass' | 'Fail...'}.
+    Returns an 'Error: ...' string when the request fails or the answer is not usable.
+    """
+    messages = [{"role": "user", "content": prompt}]
+    started = time.perf_counter()
+    response = None
+    try:
+        response = create_completion(
+            model=AI_MODEL,
+            messages=messages,
+            response_format={"type": "json_object"},
+        )
+        logger.debug("AI batch response %s from %s, usage: %s", response.id, response.model, response.usage)
+
+        if not response.choices:
+            logger.error("Error: 'choices' missing or empty in batch response.")
+            _record_call(form, lines, "unusable", response, started)
             return "Error: No response from AI."
+        results = json.loads(response.choices[0].message.content).get("results", [])
+    except (ValueError, AttributeError) as e:
+        logger.error('Unexpected batch response content: %s', e)
+        _record_call(form, lines, "unusable", response, started)
+        return "Error: Unexpected response from AI."
     except Exception as e:
-        logging.error(f"Error: {str(e)}")
+        logger.error('Error: %s', e)
+        _record_call(form, lines, "error" if response is None else "unusable", response, started)
         return f"Error: {str(e)}"
+
+    verdicts = {}
+    for result in results:
+        if not isinstance(result, dict):
+            continue
+        verdict = str(result.get("verdict", ""))
+        if "Pass" in verdict:
+            verdicts[result.get("id")] = "Pass"
+        elif "Fail" in verdict:
+            verdicts[result.get("id")] = f"Fail: {result.get('reason') or 'wrong syllable count.'}"
+    _record_call(form, lines, "ok" if len(verdicts) >= lines else "unusable", response, started)
+    return verdicts
+
+
+batcher = MicroBatcher(validate_batch)
+
+
+def configure_ai_validation(app):
+    """
+    Applies the AI_BATCH_* settings (see config.Config) to the batcher of this process.
+    """
+    batcher.configure(
+        app.config.get("AI_BATCH_ENABLED", True),
+        app.config.get("AI_BATCH_MAX_SIZE", 8),
+        app.config.get("AI_BATCH_WAIT_MS", 15) / 1000,
+    )
@@ -0,0 +1,356 @@
+"""
+ASGI serving mode, for deployments where many requests wait on the AI at once:
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+
+The Flask app itself stays WSGI. This adapter serves it in two ways:
+
+- Ordinary routes run in a thread pool (ASGI_THREADS), one thread per request, as they
+  would under gunicorn.
+- AI-bound routes (views marked with @ai_bound, e.g. POST /submit-collab-poem) run on the
+  event loop, each request in a greenlet (SQLAlchemy's greenlet_spawn). The view code is
+  the same; where it would block on the network it awaits instead: AI requests go through
+  AsyncOpenAI and the asyncio side of the micro-batcher (ai_val.create_completion,
+  ai_batching), and session queries through the primary's async driver
+  (database.configure_async_database). The session hands its connection back before the
+  AI call (database.release_connection), so a request waiting for the model holds neither
+  a thread nor a pooled connection and one process keeps hundreds of validations in flight.
+
+Nothing may block the loop, so AI-bound routes only run on it when the primary has an
+async driver; otherwise (SQLite, PostgreSQL without asyncpg) they run in the thread pool
+like every other route. The few blocking calls left on their path (idempotency keys, AI
+usage flushes, the Redis rate limit store) go through `run_blocking`, which hands them to
+a worker thread meanwhile. The rest is CPU work of a few microseconds (JWT signatures).
+
+Request bodies are read as the view asks for them, a few chunks ahead at most. A request
+whose client disconnected is dropped: before it starts, while it waits on the loop, or at
+the next chunk of its response.
+"""
+
+import asyncio
+import contextlib
+import io
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.util.concurrency import await_only, greenlet_spawn, in_greenlet
+from werkzeug.exceptions import ClientDisconnected, HTTPException
+
+
+logger = logging.getLogger(__name__)
+
+# Chunks a streamed response (or a request body) may have buffered before its producer waits
+STREAM_BUFFER_CHUNKS = 16
+_END = object()
+
+
+def ai_bound(view):
+    """
+    Route decorator (directly below @routes.route): under the ASGI server, serve this
+    view on the event loop so that waiting for the AI holds no thread.
+    """
+    view.ai_bound = True
+    return view
+
+
+def run_blocking(function, *args, **kwargs):
+    """
+    Call a blocking function. In a request served on the event loop, it runs in a worker
+    thread meanwhile (with the request's context), so the loop keeps serving the others.
+    """
+    if in_greenlet():
+        return await_only(asyncio.to_thread(function, *args, **kwargs))
+    return function(*args, **kwargs)
+
+
+class ClientConnection:
+    """
+    The receive side of one ASGI request: its body chunks, then the client's disconnect.
+    """
+
+    def __init__(self, receive):
+        self.receive = receive
+        self.loop = asyncio.get_running_loop()
+        self.chunks = asyncio.Queue(maxsize=STREAM_BUFFER_CHUNKS)
+        self.gone = threading.Event()
+        self.disconnected = asyncio.Event()
+        self.finished = False
+        self.task = asyncio.create_task(self.listen())
+
+    async def listen(self):
+        while True:
+            message = await self.receive()
+            if message['type'] == 'http.disconnect':
+                break
+            if message.get('body'):
+                await self.chunks.put(message['body'])
+            if not message.get('more_body'):
+                await self.chunks.put(b'')
+        self.gone.set()
+        self.disconnected.set()
+        # Whatever was not read yet is of no use any more: wake the reader instead
+        while not self.chunks.empty():
+            self.chunks.get_nowait()
+        self.chunks.put_nowait(None)
+
+    async def next_chunk(self):
+        if self.finished:
+            return b''
+        chunk = await self.chunks.get()
+        if chunk is None:
+            self.finished = True
+            raise ClientDisconnected()
+        self.finished = chunk == b''
+        return chunk
+
+    def read_chunk(self):
+        """
+        The next body chunk (b'' at the end), from the greenlet or worker thread running the view.
+        """
+        if in_greenlet():
+            return await_only(self.next_chunk())
+        return asyncio.run_coroutine_threadsafe(self.next_chunk(), self.loop).result()
+
+    def close(self):
+        self.task.cancel()
+
+
+class RequestBody(io.RawIOBase):
+    """
+    wsgi.input reading the request body from the client as the view consumes it.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self.pending:
+            self.pending = self.connection.read_chunk()
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def build_environ(scope, body):
+    """
+    WSGI environ for an ASGI HTTP scope and its request body (a binary file object).
+    """
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('',))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name, value = name.decode('latin-1').upper().replace('-', '_'), value.decode('latin-1')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key.startswith('HTTP_') and key in environ else value
+    if 'CONTENT_LENGTH' not in environ:
+        # A chunked body: read it to its end
+        environ['wsgi.input_terminated'] = True
+    return environ
+
+
+def run_wsgi(wsgi_app, environ, on_start, on_chunk):
+    """
+    Call the WSGI app, reporting (status, headers) once and then every body chunk.
+    """
+    def start_response(status, headers, exc_info=None):
+        on_start(int(status.split(' ', 1)[0]), headers)
+        return on_chunk
+
+    body = wsgi_app(environ, start_response)
+    try:
+        for chunk in body:
+            if chunk:
+                on_chunk(chunk)
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+
+
+class AsgiAdapter:
+    """
+    ASGI application serving a Flask app, see the module docstring.
+    """
+
+    def __init__(self, flask_app, threads=32):
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi')
+        self.in_flight = {'threads': 0, 'event_loop': 0}
+
+    def is_ai_bound(self, scope):
+        from .database import ASYNC_ENGINE_EXTENSION
+
+        if self.flask_app.extensions.get(ASYNC_ENGINE_EXTENSION) is None:
+            # The session would block the loop on every query
+            return False
+        adapter = self.flask_app.url_map.bind(scope.get('server', ('localhost',))[0])
+        try:
+            endpoint, _ = adapter.match(scope['path'], method=scope['method'])
+        except HTTPException:
+            return False
+        return getattr(self.flask_app.view_functions.get(endpoint), 'ai_bound', False)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        connection = ClientConnection(receive)
+        environ = build_environ(scope, io.BufferedReader(RequestBody(connection)))
+
+        mode = 'event_loop' if self.is_ai_bound(scope) else 'threads'
+        self.in_flight[mode] += 1
+        try:
+            if mode == 'event_loop':
+                await self.serve_on_loop(environ, connection, send)
+            else:
+                await self.serve_in_thread(environ, connection, send)
+        finally:
+            self.in_flight[mode] -= 1
+            connection.close()
+
+    async def serve_on_loop(self, environ, connection, send):
+        # AI-bound responses are small JSON documents: collect them, then send
+        response = {'body': []}
+
+        def on_start(status, headers):
+            response['status'], response['headers'] = status, headers
+
+        view = asyncio.create_task(
+            greenlet_spawn(run_wsgi, self.flask_app.wsgi_app, environ, on_start, response['body'].append)
+        )
+        gone = asyncio.create_task(connection.disconnected.wait())
+        await asyncio.wait({view, gone}, return_when=asyncio.FIRST_COMPLETED)
+        gone.cancel()
+        if not view.done():
+            # Nobody is waiting for the answer: stop at the request's next await, rolling it back
+            logger.info('Client left, dropping %s %s', environ['REQUEST_METHOD'], environ['PATH_INFO'])
+            view.cancel()
+            try:
+                await view
+            except BaseException:
+                pass
+            return
+        view.result()
+        await self.send_start(send, response['status'], response['headers'])
+        await send({'type': 'http.response.body', 'body': b''.join(response['body'])})
+
+    async def serve_in_thread(self, environ, connection, send):
+        """
+        Run the request in a worker thread, streaming the body back through a bounded
+        queue so that large responses (e.g. the NDJSON export) are not held in memory.
+        """
+        loop = asyncio.get_running_loop()
+        messages = asyncio.Queue(maxsize=STREAM_BUFFER_CHUNKS)
+        closed = threading.Event()
+
+        def put(message):
+            if closed.is_set() or connection.gone.is_set():
+                # The client went away: stop producing the body
+                raise ConnectionAbortedError('Client disconnected')
+            asyncio.run_coroutine_threadsafe(messages.put(message), loop).result()
+
+        def produce():
+            if connection.gone.is_set():
+                # Abandoned while it waited for a thread
+                logger.info('Client left, dropping %s %s', environ['REQUEST_METHOD'], environ['PATH_INFO'])
+                return
+            try:
+                run_wsgi(self.flask_app.wsgi_app, environ, lambda *start: put(start), put)
+            except ConnectionAbortedError:
+                return
+            except BaseException as e:
+                outcome = e
+            else:
+                outcome = _END
+            with contextlib.suppress(ConnectionAbortedError):
+                put(outcome)
+
+        future = loop.run_in_executor(self.executor, produce)
+        gone = asyncio.create_task(connection.disconnected.wait())
+        started = False
+        try:
+            while True:
+                message = asyncio.create_task(messages.get())
+                await asyncio.wait({message, gone}, return_when=asyncio.FIRST_COMPLETED)
+                if not message.done():
+                    message.cancel()
+                    break
+                message = message.result()
+                if isinstance(message, BaseException):
+                    logger.error('Unhandled error serving %s: %s', environ['PATH_INFO'], message)
+                    if not started:
+                        await self.send_start(send, 500, [('Content-Type', 'text/plain')])
+                    await send({'type': 'http.response.body', 'body': b'' if started else b'Internal Server Error'})
+                    break
+                if message is _END:
+                    await send({'type': 'http.response.body', 'body': b''})
+                    break
+                if isinstance(message, tuple):
+                    await self.send_start(send, *message)
+                    started = True
+                else:
+                    await send({'type': 'http.response.body', 'body': message, 'more_body': True})
+        finally:
+            gone.cancel()
+            closed.set()
+            # Unblock a producer waiting for room in the queue
+            while not messages.empty():
+                messages.get_nowait()
+            await future
+
+    @staticmethod
+    async def send_start(send, status, headers):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        })
+
+    async def lifespan(self, receive, send):
+        from .database import ASYNC_ENGINE_EXTENSION
+
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                async_engine = self.flask_app.extensions.get(ASYNC_ENGINE_EXTENSION)
+                if async_engine is not None:
+                    await async_engine.dispose()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app():
+    """
+    The Flask app with its async database engine, wrapped for an ASGI server.
+    """
+    from . import create_app
+    from .database import configure_async_database
+
+    flask_app = create_app()
+    configure_async_database(flask_app)
+    return AsgiAdapter(flask_app, threads=flask_app.config.get('ASGI_THREADS', 32))
@@ -1,3 +1,4 @@
+import logging
 from flask import Blueprint, request, jsonify, make_response
 from .database import db
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -14,6 +15,8 @@ from pydantic import ValidationError
 from .poet_utils import get_current_poet
 
 
+logger = logging.getLogger(__name__)
+
 auth = Blueprint('auth', __name__)
 
 
@@ -33,7 +36,7 @@ def login():
     if poet and check_password_hash(poet.password_hash, password):
         # access_token = create_access_token(identity={'poet_id': poet.id}, expires_delta=timedelta(hours=1))
         access_token = create_access_token(identity={'poet_id': poet.id})
-        print(f"DEBUG: Generated token identity -> poet_id: {poet.id}")
+        logger.debug("Generated token identity -> poet_id: %s", poet.id)
         
         refresh_token = create_refresh_token(identity={'poet_id': poet.id})
 
@@ -49,10 +52,10 @@ def login():
             samesite='Lax'  # Controls when the cookie is sent
         )
 
-        print(f'Poet(esse) {poet.poet_name} logged in successfully! 🚀')  # Debug statement
+        logger.info('Poet(esse) %s logged in successfully! 🚀', poet.poet_name)
         return response
 
-    print(f'Failed login attempt for {email}')  # Debug statement
+    logger.info('Failed login attempt for %s', email)
     return jsonify({"error": "Invalid email or password. 🪭 "}), 401
 
 
@@ -127,7 +130,7 @@ def register():
     try:
         db.session.commit()
         db.session.refresh(new_poet)
-        print('Poet(esse) registered and committed to the database. 🍰')  # Debug statement
+        logger.info('Poet(esse) registered and committed to the database. 🍰')
         
         # Use PoetResponse Pydantic model to structure the response
         poet_response = PoetResponse.model_validate(new_poet)
@@ -137,5 +140,5 @@ def register():
 
     except Exception as e:
         db.session.rollback()
-        print(f"Error during registration commit: {e}. 🥒")  # Debug statement
+        logger.error('Error during registration commit: %s. 🥒', e)
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
@@ -0,0 +1,411 @@
+"""
+High-throughput bulk import of poems and their contributions.
+
+Instead of one `/submit-poem` + `/submit-collab-poem` round trip (and one commit) per line,
+records are read in batches and each batch is written with a handful of set-based statements:
+COPY on Postgres, executemany everywhere else. Forms are validated in bulk with the local
+syllable counter, and a checkpoint file lets an interrupted import resume after the last
+committed batch.
+
+Input formats:
+- JSONL, one poem per line:
+    {"title": "...", "poet_name": "...", "poem_type": "Haiku", "is_collaborative": false,
+     "lines": ["first line", {"content": "second line", "poet_name": "someone else"}, ...]}
+  Optional keys: poet_email, is_published, created_at (ISO 8601).
+- CSV, one poem line per row, with the columns title, poet_name, poem_type, content and
+  optionally is_collaborative and contributor. Consecutive rows with the same
+  poet_name and title make up one poem.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select, tuple_
+from .database import db
+from .models import Poem, PoemDetails, PoemType, Poet
+from .lobby import rebuild_lobby
+from .poem_utils import count_syllables, get_expected_syllables
+from .published import freeze_published_poems
+from .rhymes import line_rhyme_key, rhyme_scheme_error
+from .rollups import rebuild_rollups
+
+
+IMPORTED_PASSWORD_HASH = 'imported'     # Like 'deleted', never a valid hash, so imported poets cannot log in
+IMPORTED_EMAIL_DOMAIN = 'import.poetica'
+IN_CLAUSE_CHUNK = 500   # Stay well under SQLite's bound parameter limit
+
+logger = logging.getLogger(__name__)
+
+
+class ImportStats:
+    """
+    Running totals for an import, used for progress reporting and the final summary.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.skipped = 0
+        self.rejected = 0
+        self.poets = 0
+        self.poems = 0
+        self.lines = 0
+        self.started = time.perf_counter()
+
+    @property
+    def rows(self):
+        return self.poets + self.poems + self.lines
+
+    def rows_per_second(self):
+        return self.rows / max(time.perf_counter() - self.started, 0.001)
+
+    def summary(self):
+        return (
+            f'{self.records} records: {self.poems} poems, {self.lines} lines and {self.poets} new poets imported, '
+            f'{self.skipped} already present, {self.rejected} rejected '
+            f'({self.rows_per_second():,.0f} rows/s).'
+        )
+
+
+def parse_bool(value, default=False):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_csv(path):
+    """
+    Group consecutive CSV rows of the same poem into one record shaped like a JSONL record.
+    """
+    record = None
+    with open(path, encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            key = (row['poet_name'], row['title'])
+            if record is None or (record['poet_name'], record['title']) != key:
+                if record is not None:
+                    yield record
+                record = {
+                    'title': row['title'],
+                    'poet_name': row['poet_name'],
+                    'poem_type': row['poem_type'],
+                    'is_collaborative': parse_bool(row.get('is_collaborative')),
+                    'lines': [],
+                }
+            record['lines'].append({
+                'content': row['content'],
+                'poet_name': row.get('contributor') or row['poet_name'],
+            })
+    if record is not None:
+        yield record
+
+
+def read_records(path, file_format=None):
+    file_format = file_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    return read_csv(path) if file_format == 'csv' else read_jsonl(path)
+
+
+def normalize_record(record, poem_types):
+    """
+    Resolve the poem type and normalize lines into (content, contributor_name) pairs.
+    Raises ValueError with a readable reason when the record cannot be imported.
+    """
+    for field in ('title', 'poet_name', 'poem_type', 'lines'):
+        if not record.get(field):
+            raise ValueError(f'Missing field: {field}')
+    if len(record['title']) > 250:
+        raise ValueError('Title is longer than 250 characters')
+
+    poem_type = poem_types.get(str(record['poem_type']).lower())
+    if poem_type is None:
+        raise ValueError(f"Unknown poem type: {record['poem_type']}")
+
+    lines = []
+    for line in record['lines']:
+        if isinstance(line, str):
+            line = {'content': line}
+        content = (line.get('content') or '').strip()
+        if not content:
+            raise ValueError('Empty line content')
+        name = line.get('poet_name') or record['poet_name']
+        if len(name) > 50:
+            raise ValueError(f'Poet name is longer than 50 characters: {name}')
+        lines.append((content, name))
+
+    is_collaborative = parse_bool(record.get('is_collaborative'))
+    if not is_collaborative and any(name != record['poet_name'] for _, name in lines):
+        raise ValueError('Individual poems cannot have lines by other poets')
+
+    created_at = record.get('created_at')
+    return {
+        'title': record['title'],
+        'poet_name': record['poet_name'],
+        'poet_email': record.get('poet_email'),
+        'poem_type_id': poem_type['id'],
+        'criteria': poem_type['criteria'],
+        'is_collaborative': is_collaborative,
+        'is_published': record.get('is_published'),
+        'created_at': datetime.fromisoformat(created_at) if created_at else None,
+        'lines': lines,
+    }
+
+
+def validate_form(poem):
+    """
+    Bulk counterpart of the submission validators: line count against `max_lines`,
+    for syllabic forms every line against the syllable structure using the local counter,
+    and for rhyming forms every line against the rhyme scheme.
+    Returns None when the poem is valid, otherwise the reason it is not.
+    """
+    max_lines = (poem['criteria'] or {}).get('max_lines')
+    if max_lines is not None and len(poem['lines']) > max_lines:
+        return f'{len(poem["lines"])} lines, but this poem type allows at most {max_lines}'
+
+    expected = get_expected_syllables(poem['criteria'])
+    if expected:
+        for line_number, (content, _) in enumerate(poem['lines'], start=1):
+            syllables = count_syllables(content)
+            if syllables != expected[line_number - 1]:
+                return f'Line {line_number} has {syllables} syllables (expected {expected[line_number - 1]})'
+
+    scheme = (poem['criteria'] or {}).get('rhyme_scheme')
+    if scheme:
+        keys = []
+        for content, _ in poem['lines']:
+            key = line_rhyme_key(content)
+            rhymes_with = rhyme_scheme_error(scheme, keys, key)
+            if rhymes_with:
+                return f'Line {len(keys) + 1} does not rhyme with line {rhymes_with} ({scheme})'
+            keys.append(key)
+
+    if poem['is_collaborative']:
+        for (_, previous), (_, current) in zip(poem['lines'], poem['lines'][1:]):
+            if previous == current:
+                return 'The same poet contributed twice in a row'
+    return None
+
+
+def chunked(values, size=IN_CLAUSE_CHUNK):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def write_rows(conn, table, columns, rows):
+    """
+    Insert rows (tuples ordered like `columns`) with COPY on Postgres and executemany elsewhere.
+    """
+    if not rows:
+        return
+    if conn.dialect.name == 'postgresql':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(['\\N' if value is None else value for value in row])
+        buffer.seek(0)
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+        finally:
+            cursor.close()
+    else:
+        conn.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+
+
+def imported_email(name):
+    """
+    Placeholder email for an imported poet. Poet names are unique, so a digest of the name keeps it unique too.
+    """
+    slug = re.sub(r'[^a-z0-9]+', '.', name.lower()).strip('.')[:40] or 'poet'
+    return f'{slug}.{hashlib.sha1(name.encode()).hexdigest()[:10]}@{IMPORTED_EMAIL_DOMAIN}'
+
+
+def resolve_poet_ids(conn, names, emails, stats):
+    """
+    Map poet names to ids, creating (unusable-password) poets for names that do not exist yet.
+    """
+    poets = Poet.__table__
+    ids = {}
+    for chunk in chunked(names):
+        ids.update(conn.execute(select(poets.c.poet_name, poets.c.id).where(poets.c.poet_name.in_(chunk))).all())
+
+    missing = [name for name in names if name not in ids]
+    if missing:
+        now = datetime.now(timezone.utc)
+        write_rows(conn, poets, ('poet_name', 'email', 'password_hash', 'created_at'), [
+            (name, emails.get(name) or imported_email(name), IMPORTED_PASSWORD_HASH, now)
+            for name in missing
+        ])
+        stats.poets += len(missing)
+        for chunk in chunked(missing):
+            ids.update(conn.execute(select(poets.c.poet_name, poets.c.id).where(poets.c.poet_name.in_(chunk))).all())
+    return ids
+
+
+def _published_at(poem, now):
+    # A published poem was published with its last line (lines are 1 ms apart, see import_batch)
+    if not poem['is_published']:
+        return None
+    return (poem['created_at'] or now) + timedelta(milliseconds=max(len(poem['lines']) - 1, 0))
+
+
+def import_batch(conn, batch, stats):
+    """
+    Write one batch of validated poems: poets, then poems, then their ordered lines.
+    """
+    poems, details = Poem.__table__, PoemDetails.__table__
+
+    names = {poem['poet_name'] for poem in batch} | {name for poem in batch for _, name in poem['lines']}
+    emails = {poem['poet_name']: poem['poet_email'] for poem in batch if poem['poet_email']}
+    poet_ids = resolve_poet_ids(conn, names, emails, stats)
+
+    # Skip poems that already exist, which also makes re-running a partly imported file safe
+    keys = [(poem['title'], poet_ids[poem['poet_name']]) for poem in batch]
+    existing = set()
+    for chunk in chunked(keys):
+        existing.update(conn.execute(
+            select(poems.c.title, poems.c.poet_id).where(tuple_(poems.c.title, poems.c.poet_id).in_(chunk))
+        ).all())
+
+    now = datetime.now(timezone.utc)
+    new_poems, seen = [], set()
+    for poem, key in zip(batch, keys):
+        if key in existing or key in seen:
+            stats.skipped += 1
+            continue
+        seen.add(key)
+        new_poems.append((poem, key))
+
+    columns = ('title', 'poet_id', 'poem_type_id', 'is_collaborative', 'is_published', 'created_at', 'published_at')
+    write_rows(conn, poems, columns, [
+        (poem['title'], poet_id, poem['poem_type_id'], poem['is_collaborative'],
+         poem['is_published'], poem['created_at'] or now, _published_at(poem, now))
+        for poem, (_, poet_id) in new_poems
+    ])
+
+    poem_ids = {}
+    for chunk in chunked([key for _, key in new_poems]):
+        poem_ids.update(
+            ((title, poet_id), poem_id) for title, poet_id, poem_id in conn.execute(
+                select(poems.c.title, poems.c.poet_id, poems.c.id)
+                .where(tuple_(poems.c.title, poems.c.poet_id).in_(chunk))
+            )
+        )
+
+    # Lines are read back ordered by submitted_at, so give each one a strictly increasing timestamp
+    detail_rows = []
+    for poem, key in new_poems:
+        created_at = poem['created_at'] or now
+        for line_number, (content, name) in enumerate(poem['lines']):
+            detail_rows.append((
+                poem_ids[key], poet_ids[name], content, created_at + timedelta(milliseconds=line_number),
+                line_rhyme_key(content),
+            ))
+    write_rows(conn, details, ('poem_id', 'poet_id', 'content', 'submitted_at', 'rhyme_key'), detail_rows)
+
+    stats.poems += len(new_poems)
+    stats.lines += len(detail_rows)
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return json.load(f).get('records', 0)
+
+
+def save_checkpoint(path, records):
+    # Write-then-rename, so a crash never leaves a half-written checkpoint behind
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump({'records': records, 'saved_at': datetime.now(timezone.utc).isoformat()}, f)
+    os.replace(temp_path, path)
+
+
+def import_poems(path, file_format=None, batch_size=5000, validate=True, resume=False, report=print):
+    """
+    Import poems from a JSONL or CSV file. Must run inside an application context.
+
+    Each batch is committed together with the checkpoint (`<path>.checkpoint`), so with
+    `resume=True` an interrupted import continues after the last committed batch.
+    Records that fail validation are written to `<path>.rejects.jsonl` with the reason.
+    """
+    checkpoint_path = f'{path}.checkpoint'
+    rejects_path = f'{path}.rejects.jsonl'
+    start_at = load_checkpoint(checkpoint_path) if resume else 0
+    stats = ImportStats()
+
+    poem_types = {
+        key: {'id': poem_type.id, 'criteria': poem_type.criteria}
+        for poem_type in PoemType.query.all()
+        for key in (poem_type.name.lower(), str(poem_type.id))
+    }
+    db.session.close()
+
+    with db.engine.connect() as conn, open(rejects_path, 'a' if resume else 'w', encoding='utf-8') as rejects:
+        batch, batch_rejects = [], []
+
+        def commit_batch(records_done):
+            if batch:
+                import_batch(conn, batch, stats)
+            conn.commit()
+            # Rejects are only written once their batch is committed, so a resumed import does not repeat them
+            rejects.writelines(batch_rejects)
+            rejects.flush()
+            save_checkpoint(checkpoint_path, records_done)
+            batch.clear()
+            batch_rejects.clear()
+
+        for index, record in enumerate(read_records(path, file_format)):
+            if index < start_at:
+                continue
+            stats.records += 1
+
+            try:
+                poem = normalize_record(record, poem_types)
+                reason = validate_form(poem) if validate else None
+            except (ValueError, TypeError, AttributeError) as e:
+                reason = str(e)
+            if reason:
+                stats.rejected += 1
+                batch_rejects.append(
+                    json.dumps({'record': index, 'reason': reason, 'data': record}, default=str) + '\n'
+                )
+                continue
+
+            if poem['is_published'] is None:
+                # Individual poems are published on submission; collaborative ones once the form is complete
+                max_lines = (poem['criteria'] or {}).get('max_lines')
+                poem['is_published'] = not poem['is_collaborative'] or len(poem['lines']) == max_lines
+            batch.append(poem)
+
+            if len(batch) >= batch_size:
+                commit_batch(index + 1)
+                report(f'{start_at + stats.records} records processed ({stats.rows_per_second():,.0f} rows/s). 🚚')
+
+        commit_batch(start_at + stats.records)
+
+    # The import writes through Core, past the ORM events that keep the lobby and stats up to date
+    rebuild_lobby()
+    rebuild_rollups()
+    freeze_published_poems()
+
+    logger.info('Bulk import of %s finished: %s', path, stats.summary())
+    return stats
@@ -0,0 +1,123 @@
+"""
+Flask CLI commands for data maintenance, e.g.:
+    flask --app main import-poems anthology.jsonl --batch-size 5000
+    flask --app main export-poems --output corpus.ndjson
+    flask --app main check-query-plans
+    flask --app main rebuild-lobby
+    flask --app main rebuild-stats
+"""
+
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('import-poems')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['jsonl', 'csv']),
+              help='Input format (guessed from the file extension by default).')
+@click.option('--batch-size', default=5000, show_default=True, help='Records written per batch and commit.')
+@click.option('--resume', is_flag=True, help='Continue after the last committed batch of a previous run.')
+@click.option('--skip-validation', is_flag=True, help='Do not check forms with the local syllable counter.')
+@with_appcontext
+def import_poems_command(path, file_format, batch_size, resume, skip_validation):
+    """
+    Bulk import poems and their lines from a JSONL or CSV file.
+    """
+    from .bulk_import import import_poems
+
+    stats = import_poems(
+        path,
+        file_format=file_format,
+        batch_size=batch_size,
+        validate=not skip_validation,
+        resume=resume,
+        report=click.echo,
+    )
+    click.echo(f'Import finished: {stats.summary()} 🌾')
+    if stats.rejected:
+        click.echo(f'Rejected records and reasons were written to {path}.rejects.jsonl')
+
+
+@click.command('export-poems')
+@click.option('--output', '-o', type=click.File('w', encoding='utf-8'), default='-', show_default=True,
+              help='File to write the NDJSON to.')
+@click.option('--poem-type-id', type=int, help='Only poems of this type.')
+@click.option('--poet-id', type=int, help='Only poems by this poet.')
+@click.option('--since', type=click.DateTime(), help='Only poems created at or after this date.')
+@click.option('--until', type=click.DateTime(), help='Only poems created before this date.')
+@click.option('--after', 'after_id', type=int, help='Resume after the poem with this id.')
+@with_appcontext
+def export_poems_command(output, poem_type_id, poet_id, since, until, after_id):
+    """
+    Stream the published corpus as NDJSON, one poem with its lines per line.
+    """
+    from .export_utils import iter_ndjson
+
+    output.writelines(iter_ndjson(
+        poem_type_id=poem_type_id, poet_id=poet_id, since=since, until=until, after_id=after_id
+    ))
+
+
+@click.command('check-query-plans')
+@with_appcontext
+def check_query_plans_command():
+    """
+    EXPLAIN the hot queries and fail if any of them is not served by its index.
+    """
+    from .query_plans import check_query_plans
+
+    missing = 0
+    for name, indexes, uses_index, plan in check_query_plans():
+        click.echo(f"{'✅' if uses_index else '❌'} {name} ({' or '.join(indexes)})")
+        if not uses_index:
+            missing += 1
+            for line in plan:
+                click.echo(f'    {line}')
+    if missing:
+        raise click.ClickException(f'{missing} quer{"y does" if missing == 1 else "ies do"} not use the expected index. '
+                                   'Did you run `flask db upgrade`?')
+
+
+@click.command('rebuild-lobby')
+@with_appcontext
+def rebuild_lobby_command():
+    """
+    Recompute the collaboration lobby from poems and their lines.
+    """
+    from .lobby import rebuild_lobby
+
+    click.echo(f'Collaboration lobby rebuilt: {rebuild_lobby()} open poems. 🛋')
+
+
+@click.command('rebuild-stats')
+@with_appcontext
+def rebuild_stats_command():
+    """
+    Backfill the daily poet statistics (stats and leaderboard rollups) from history.
+    """
+    from .rollups import rebuild_rollups
+
+    click.echo(f'Poet statistics rebuilt: {rebuild_rollups()} daily buckets. 📊')
+
+
+@click.command('freeze-poems')
+@with_appcontext
+def freeze_poems_command():
+    """
+    Freeze the published poems that are not frozen yet, e.g. those from before the freeze.
+    """
+    from .published import freeze_published_poems
+
+    click.echo(f'Published poems frozen: {freeze_published_poems()}. 🧊')
+
+
+def register_commands(app):
+    """
+    Attach the maintenance commands to the app's `flask` CLI.
+    """
+    app.cli.add_command(import_poems_command)
+    app.cli.add_command(export_poems_command)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(rebuild_lobby_command)
+    app.cli.add_command(rebuild_stats_command)
+    app.cli.add_command(freeze_poems_command)
@@ -1,4 +1,5 @@
 import json
+import logging
 
 from flask import jsonify
 from .database import db
@@ -6,6 +7,9 @@ from sqlalchemy.exc import SQLAlchemyError  # SQLAlchemy exception base class
 from .schemas import PoemTypeResponse
 
 
+logger = logging.getLogger(__name__)
+
+
 def add_poem_type(name, description, criteria):
     """
     Utility function to add a poem type to the database.
@@ -28,7 +32,7 @@ def add_poem_type(name, description, criteria):
         db.session.add(new_poem_type)
         db.session.commit()
 
-        print(f"Poem type '{name}' added. 🎯")
+        logger.info("Poem type '%s' added. 🎯", name)
         # Return the new poem type using the PoemTypeResponse Pydantic model
         poem_type_response = PoemTypeResponse.model_validate(new_poem_type)
         return poem_type_response.model_dump()
@@ -36,7 +40,7 @@ def add_poem_type(name, description, criteria):
     except SQLAlchemyError as e:
         # Roll back the session in case of any error to avoid inconsistent database state
         db.session.rollback()
-        print(f"Error adding poem type '{name}: e")
+        logger.error("Error adding poem type '%s': %s", name, e)
         return False
     
 
@@ -76,7 +80,7 @@ def initialize_poem_types():
             # Save criteria as JSON string in the database
             add_poem_type(name, description, criteria)
 
-    print('Poem types initialized (if not already present). 🍬')
+    logger.info('Poem types initialized (if not already present). 🍬')
 
 
 def delete_poem_type_by_name(name):
@@ -93,7 +97,7 @@ def delete_poem_type_by_name(name):
             free_verse_type = PoemType.query.filter_by(name='Free Verse').first()
 
             if not free_verse_type:
-                print(f"'Free Verse' poem type not found! Please create 'Free Verse' first.")
+                logger.error("'Free Verse' poem type not found! Please create 'Free Verse' first.")
                 return False
 
             # Reassign all poems to "Free Verse"
@@ -104,9 +108,9 @@ def delete_poem_type_by_name(name):
         db.session.delete(poem_type)
         db.session.commit()
 
-        print(f"Poem type '{name}' has been deleted and poems reassigned to 'Free Verse'. 🍂")
+        logger.info("Poem type '%s' has been deleted and poems reassigned to 'Free Verse'. 🍂", name)
     else:
-        print(f"Poem type '{name}' not found. 🚫")
+        logger.warning("Poem type '%s' not found. 🚫", name)
 
 
 def delete_unnecessary_poem_type(name):
@@ -119,6 +123,6 @@ def delete_unnecessary_poem_type(name):
     if poem_type:
         db.session.delete(poem_type)
         db.session.commit()
-        print(f"Poem type '{name}' has been deleted. 🗑️")
+        logger.info("Poem type '%s' has been deleted. 🗑️", name)
     else:
-        print(f"Poem type '{name}' not found. 🚫")
+        logger.warning("Poem type '%s' not found. 🚫", name)
@@ -1,31 +1,184 @@
+from functools import wraps
+from flask import current_app, g, has_app_context, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import inspect
+from flask_sqlalchemy.session import Session
+from sqlalchemy import inspect, make_url
+from sqlalchemy.util.concurrency import in_greenlet
+import importlib.util
+import logging
+import random
 
 
-db = SQLAlchemy()
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND_PREFIX = 'replica_'
+READ_PRIMARY_COOKIE = 'read_primary'
+READ_ONLY_METHODS = ('GET', 'HEAD')
+ASYNC_ENGINE_EXTENSION = 'poetica_async_engine'
+# Async drivers by backend: (driver name, module that must be installed). SQLite keeps its
+# blocking driver: its queries are local and quick, and concurrent aiosqlite connections
+# deadlock on SQLite's write lock under a burst of submissions
+ASYNC_DRIVERS = {'postgresql': ('postgresql+asyncpg', 'asyncpg')}
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the reads of read-only (GET/HEAD) requests to a random replica.
+
+    Everything else goes to the primary: writes, requests outside of a GET (CLI commands,
+    startup), the rest of a request once it has flushed anything, and requests that asked
+    for the primary (see `read_from_primary`, the `X-Read-From: primary` header and the
+    read-your-writes cookie set by `configure_replicas`).
+
+    Requests served on the ASGI event loop (AI-bound routes, see asgi.py) use the primary
+    through its async driver, when `configure_async_database` set one up.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._flushing and has_request_context():
+            # Whatever this request reads from now on must see its own writes
+            g.read_from_primary = True
+        elif bind is None and _reads_from_replica():
+            replicas = [engine for key, engine in self._db.engines.items()
+                        if key and key.startswith(REPLICA_BIND_PREFIX)]
+            if replicas:
+                return random.choice(replicas)
+        if bind is None and in_greenlet() and has_app_context():
+            async_engine = current_app.extensions.get(ASYNC_ENGINE_EXTENSION)
+            if async_engine is not None:
+                return async_engine.sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _reads_from_replica():
+    return (
+        has_request_context()
+        and request.method in READ_ONLY_METHODS
+        and not g.get('read_from_primary', False)
+    )
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def read_from_primary(view):
+    """
+    Route decorator: serve this endpoint from the primary even for GET requests,
+    e.g. a form that is about to be edited.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_from_primary = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def configure_replicas(app):
+    """
+    Register the read replicas from SQLALCHEMY_REPLICA_URIS as binds (before db.init_app),
+    and the hooks that keep a client on the primary right after it wrote something.
+    """
+    replica_uris = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+    if not replica_uris:
+        return
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for number, uri in enumerate(replica_uris):
+        binds[f'{REPLICA_BIND_PREFIX}{number}'] = uri
+    app.config['SQLALCHEMY_BINDS'] = binds
+    logger.info('📚 Routing GET reads to %s replica(s)', len(replica_uris))
+
+    sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+
+    @app.before_request
+    def choose_read_source():
+        if request.headers.get('X-Read-From', '').lower() == 'primary' or request.cookies.get(READ_PRIMARY_COOKIE):
+            g.read_from_primary = True
+
+    @app.after_request
+    def stick_to_primary_after_write(response):
+        # Replicas lag a little: the client's follow-up reads go to the primary for a few seconds
+        if request.method not in READ_ONLY_METHODS + ('OPTIONS',) and response.status_code < 400 and sticky_seconds:
+            response.set_cookie(READ_PRIMARY_COOKIE, '1', max_age=sticky_seconds, httponly=True, samesite='Lax')
+        return response
+
+
+def async_database_url(url):
+    """
+    The same database with its async driver, or None when that driver is not installed.
+    """
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or importlib.util.find_spec(driver[1]) is None:
+        return None
+    return url.set(drivername=driver[0])
+
+
+def configure_async_database(app):
+    """
+    Create the async-driver engine for the primary (ASYNC_DATABASE_URL, or a PostgreSQL
+    DATABASE_URL with asyncpg when installed). Only the ASGI mode needs it.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    database_url = app.config['SQLALCHEMY_DATABASE_URI']
+    url = app.config.get('ASYNC_DATABASE_URL') or async_database_url(database_url)
+    if url is None:
+        if make_url(database_url).get_backend_name() != 'sqlite':
+            logger.warning('No async database driver (asyncpg) installed: '
+                           'AI-bound requests use the blocking driver. 🐢')
+        return None
+
+    engine = create_async_engine(url)
+    app.extensions[ASYNC_ENGINE_EXTENSION] = engine
+    logger.info('⚡️ AI-bound requests query the database through %s', engine.dialect.driver)
+    return engine
+
+
+def release_connection():
+    """
+    End the session's read-only transaction and hand its connection back to the pool,
+    keeping the loaded objects as they are. Called before waiting on something slow (the
+    AI) so that hundreds of waiting requests do not hold the pool, or SQLite's read locks.
+    """
+    if not has_app_context():
+        return
+    session = db.session()
+    if not session.in_transaction() or session.new or session.dirty or session.deleted:
+        return
+    expire_on_commit = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        session.commit()
+    finally:
+        session.expire_on_commit = expire_on_commit
+
 
 def create_database(app):
     with app.app_context():
-        print(f"🍓 Connecting to database: {app.config['SQLALCHEMY_DATABASE_URI']}")
+        logger.info('🍓 Connecting to database: %s', app.config['SQLALCHEMY_DATABASE_URI'])
 
         inspector = inspect(db.engine)
 
         table_names = ['poets', 'poems', 'poem_types', 'poem_details']
 
-        all_tables_exist = True
-        for table_name in table_names:
-            if not inspector.has_table(table_name):
-                all_tables_exist = False
-                break
+        # Only a brand-new database gets its tables from the models: once the app's tables
+        # exist, every later table is added by its migration (flask db upgrade), which fails
+        # on a table create_all() made in the meantime
+        existing_tables = [table_name for table_name in table_names if inspector.has_table(table_name)]
 
-        if all_tables_exist:
-            print('Database already exists, skipping table creation. 🛝')
+        if existing_tables:
+            logger.info('Database already exists, skipping table creation. 🛝')
+            if len(existing_tables) < len(table_names):
+                logger.warning('Database is missing some tables, run `flask db upgrade`. 🧩')
         else:
             try:
                 # These imports are required for SQLAlchemy to create the tables
-                from .models import Poet, Poem, PoemType, PoemDetails
+                from .models import (
+                    Poet, Poem, PoemType, PoemDetails, LobbyEntry, PoetDailyStats, PoemRevision,
+                    PublishedPoem, IdempotencyKey, AIUsageStats, AIVerdictStats,
+                )
                 db.create_all()
-                print('Database and tables created! 👑')
+                logger.info('Database and tables created! 👑')
             except Exception as e:
-                print(f'Error creating tables: {e}. 🥦')
-            
\ No newline at end of file
+                logger.error('Error creating tables: %s. 🥦', e)
@@ -0,0 +1,100 @@
+"""
+Live syllable annotation for drafts (POST /drafts/annotate).
+
+The editor sends the whole draft on every pause, together with the line hashes it got
+back last time. Lines whose hash is unchanged at the same position are skipped; only new,
+edited or moved lines are counted with the local syllable counter (no AI) and returned,
+each with its hash, so the editor patches its annotations instead of redrawing them.
+
+Poem type criteria never change after startup, so they are loaded once when the app
+starts (see lifecycle) and an annotation runs without touching the database.
+"""
+
+import hashlib
+import json
+import threading
+from .models import PoemType
+from .poem_utils import count_syllables, get_expected_syllables, get_poem_type_by_id
+
+
+_criteria = {}
+_criteria_lock = threading.Lock()
+
+
+def line_hash(line):
+    return hashlib.blake2b(line.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def draft_lines(content):
+    """
+    The poem lines of a draft: stripped, without blank lines, as the submission validators see them.
+    """
+    return [line.strip() for line in content.split('\n') if line.strip()]
+
+
+def _parse_criteria(criteria):
+    if isinstance(criteria, str):
+        criteria = json.loads(criteria)
+    return criteria or {}
+
+
+def load_poem_type_criteria():
+    """
+    Fill the cache with every poem type's criteria (done once at startup).
+    """
+    criteria = {poem_type.id: _parse_criteria(poem_type.criteria) for poem_type in PoemType.query.all()}
+    with _criteria_lock:
+        _criteria.update(criteria)
+    return len(criteria)
+
+
+def poem_type_criteria(poem_type_id):
+    """
+    A poem type's criteria as a dict, or None when the poem type does not exist.
+    """
+    criteria = _criteria.get(poem_type_id)
+    if criteria is None:
+        poem_type = get_poem_type_by_id(poem_type_id)
+        if poem_type is None:
+            return None
+        with _criteria_lock:
+            _criteria[poem_type_id] = _parse_criteria(poem_type.criteria)
+    return _criteria[poem_type_id]
+
+
+def annotate_draft(criteria, content, previous_hashes=()):
+    """
+    Syllable counts of the draft's changed lines against the poem type's structure.
+
+    Returns the draft's line count and the form's limits plus, for every line that
+    differs from `previous_hashes` at its position: its 1-based number, hash, syllables,
+    expected syllables (None for forms without a structure) and whether it fits.
+    Lines past `line_count` no longer exist.
+    """
+    expected = get_expected_syllables(criteria)
+    max_lines = criteria.get('max_lines')
+    lines = draft_lines(content)
+
+    changed = []
+    for index, line in enumerate(lines):
+        digest = line_hash(line)
+        if index < len(previous_hashes) and previous_hashes[index] == digest:
+            continue
+        syllables = count_syllables(line)
+        expected_syllables = expected[index] if expected and index < len(expected) else None
+        changed.append({
+            'line': index + 1,
+            'hash': digest,
+            'syllables': syllables,
+            'expected': expected_syllables,
+            'fits': (max_lines is None or index < max_lines)
+                    and (expected_syllables is None or syllables == expected_syllables),
+        })
+
+    return {
+        'line_count': len(lines),
+        'max_lines': max_lines,
+        'syllable_structure': expected,
+        'unchanged': len(lines) - len(changed),
+        'lines': changed,
+    }
@@ -0,0 +1,91 @@
+"""
+Streaming export of the published corpus as NDJSON (one poem with its lines per line).
+
+Poems and their lines are read as one joined, ordered result streamed through a
+server-side cursor (`yield_per`), and every poem is encoded as soon as its last line
+has been read. Memory use stays flat no matter how large the corpus is.
+"""
+
+import json
+from sqlalchemy import select
+from .database import db
+from .models import Poem, PoemDetails
+from .serializers import timestamp_to_json
+
+
+EXPORT_CHUNK_SIZE = 1000
+
+
+def _isoformat(value):
+    return timestamp_to_json(value) if value is not None else None
+
+
+def iter_published_poems(poem_type_id=None, poet_id=None, since=None, until=None, after_id=None,
+                         chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield published poems as dicts, in ascending id order, each with its lines in submission order.
+
+    Filters:
+        poem_type_id / poet_id: only poems of this type / by this poet.
+        since / until: only poems created in [since, until).
+        after_id: resume cursor, only poems with an id greater than this one.
+    """
+    poems, details = Poem.__table__, PoemDetails.__table__
+
+    query = (
+        select(
+            poems.c.id, poems.c.title, poems.c.poet_id, poems.c.poem_type_id, poems.c.is_collaborative,
+            poems.c.created_at, poems.c.updated_at,
+            details.c.id.label('line_id'), details.c.poet_id.label('line_poet_id'),
+            details.c.content, details.c.submitted_at,
+        )
+        .select_from(poems.outerjoin(details, details.c.poem_id == poems.c.id))
+        .where(poems.c.is_published == True)
+        .order_by(poems.c.id, details.c.submitted_at, details.c.id)
+    )
+    if poem_type_id:
+        query = query.where(poems.c.poem_type_id == poem_type_id)
+    if poet_id:
+        query = query.where(poems.c.poet_id == poet_id)
+    if since:
+        query = query.where(poems.c.created_at >= since)
+    if until:
+        query = query.where(poems.c.created_at < until)
+    if after_id:
+        query = query.where(poems.c.id > after_id)
+
+    # yield_per streams rows in chunks through a server-side cursor instead of buffering the whole result
+    rows = db.session.execute(query, execution_options={'yield_per': chunk_size})
+
+    poem = None
+    for row in rows:
+        if poem is None or poem['id'] != row.id:
+            if poem is not None:
+                yield poem
+            poem = {
+                'id': row.id,
+                'title': row.title,
+                'poet_id': row.poet_id,
+                'poem_type_id': row.poem_type_id,
+                'is_collaborative': row.is_collaborative,
+                'created_at': _isoformat(row.created_at),
+                'updated_at': _isoformat(row.updated_at),
+                'lines': [],
+            }
+        if row.line_id is not None:
+            poem['lines'].append({
+                'id': row.line_id,
+                'poet_id': row.line_poet_id,
+                'content': row.content,
+                'submitted_at': _isoformat(row.submitted_at),
+            })
+    if poem is not None:
+        yield poem
+
+
+def iter_ndjson(**filters):
+    """
+    Encode each exported poem as one NDJSON line. A poem's `id` is the cursor to resume after it.
+    """
+    for poem in iter_published_poems(**filters):
+        yield json.dumps(poem, ensure_ascii=False) + '\n'
@@ -0,0 +1,237 @@
+"""
+Idempotency-Key support for POST routes that clients retry on timeouts.
+
+The first request with a given key (per poet) records an in-progress row, runs the view
+and stores its status, body and headers (ETag, Location, ...). Retries with the same key and the same request are
+answered straight from storage: no validation, no duplicate checks, no AI call. Recent
+outcomes are also kept in a small per-process LRU, so a retry storm hitting the same
+worker does not even reach the database.
+
+    - same key, different request body: 422;
+    - same key while the first request is still running: 409 with Retry-After;
+    - 5xx and 429 outcomes are not stored, so the client can retry them for real.
+
+Keys are kept for IDEMPOTENCY_TTL_HOURS (see config.Config); expired rows are purged
+as new keys come in. A key left in progress by a request that died is released after
+IN_PROGRESS_TIMEOUT.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import Response, current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from .asgi import run_blocking
+from .database import db
+from .models import IdempotencyKey
+
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# Replayable outcomes kept in memory per process
+CACHE_SIZE = 1024
+# Purge expired keys once every this many new keys
+PURGE_EVERY = 100
+# An in-progress key older than this belongs to a request that died; a retry may take it over
+IN_PROGRESS_TIMEOUT = timedelta(minutes=2)
+# Tries to claim a key whose holder keeps releasing it under our feet, before answering 409
+CLAIM_ATTEMPTS = 3
+# Set again for every response, so not stored
+UNSTORED_HEADERS = {'content-type', 'content-length'}
+
+# A finished request's outcome, as replayed to its retries
+_Outcome = namedtuple('_Outcome', 'fingerprint status_code body mimetype headers expires_at')
+
+
+class _ReplayCache:
+    """
+    Thread-safe LRU of finished outcomes: (poet_id, key) -> _Outcome.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cache_key):
+        with self._lock:
+            item = self._items.get(cache_key)
+            if item is not None:
+                self._items.move_to_end(cache_key)
+            return item
+
+    def put(self, cache_key, item):
+        with self._lock:
+            self._items[cache_key] = item
+            self._items.move_to_end(cache_key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+_cache = _ReplayCache(CACHE_SIZE)
+_new_keys = 0
+
+
+def _aware(value):
+    # SQLite hands timezone-aware columns back as naive UTC datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _expired(row, now):
+    if row.status_code is None:
+        return _aware(row.created_at) + IN_PROGRESS_TIMEOUT <= now
+    return _aware(row.expires_at) <= now
+
+
+def _fingerprint():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _replay(fingerprint, stored):
+    if stored.fingerprint != fingerprint:
+        return jsonify({
+            'error': 'This Idempotency-Key was already used for a different request. 🔑'
+        }), 422
+    response = Response(stored.body, status=stored.status_code, mimetype=stored.mimetype)
+    response.headers.extend(stored.headers)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _in_progress():
+    response = jsonify({
+        'error': 'A request with this Idempotency-Key is still being processed. ⏳'
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 409
+
+
+def _purge_expired(conn, now):
+    global _new_keys
+    _new_keys += 1
+    if _new_keys % PURGE_EVERY == 0:
+        table = IdempotencyKey.__table__
+        conn.execute(delete(table).where(table.c.expires_at < now))
+
+
+def _matches(poet_id, key):
+    table = IdempotencyKey.__table__
+    return (table.c.poet_id == poet_id) & (table.c.key == key)
+
+
+def _claim_key(poet_id, key, fingerprint, now, ttl):
+    """
+    Record the key as in progress. Returns (claimed, row): (True, None) when this request
+    holds the key now, else the row of the request holding it, or None if it could not
+    be read (released and taken again meanwhile).
+    """
+    table = IdempotencyKey.__table__
+    matches_key = _matches(poet_id, key)
+    # The key's row lives in its own short transactions, independent of the view's session
+    with db.engine.begin() as conn:
+        for _ in range(CLAIM_ATTEMPTS):
+            row = conn.execute(select(table).where(matches_key)).first()
+            if row is not None and _expired(row, now):
+                conn.execute(delete(table).where(matches_key))
+                row = None
+            if row is not None:
+                return False, row
+            try:
+                with conn.begin_nested():
+                    conn.execute(insert(table).values(
+                        poet_id=poet_id, key=key, fingerprint=fingerprint,
+                        created_at=now, expires_at=now + ttl,
+                    ))
+            except IntegrityError:
+                # A concurrent request with the same key got there first. It may also have
+                # released the key again (5xx, 429) before we read its row: try again
+                continue
+            _purge_expired(conn, now)
+            return True, None
+    return False, None
+
+
+def _release_key(poet_id, key):
+    with db.engine.begin() as conn:
+        conn.execute(delete(IdempotencyKey.__table__).where(_matches(poet_id, key)))
+
+
+def _store_outcome(poet_id, key, outcome):
+    with db.engine.begin() as conn:
+        conn.execute(update(IdempotencyKey.__table__).where(_matches(poet_id, key)).values(
+            status_code=outcome.status_code, response_body=outcome.body, mimetype=outcome.mimetype,
+            response_headers=json.dumps(outcome.headers),
+        ))
+
+
+def _stored_outcome(row):
+    headers = [tuple(header) for header in json.loads(row.response_headers or '[]')]
+    return _Outcome(row.fingerprint, row.status_code, row.response_body, row.mimetype,
+                    headers, _aware(row.expires_at))
+
+
+def idempotent(view):
+    """
+    Route decorator (below @jwt_required() and @rate_limit(...)): honour the Idempotency-Key
+    header, so replays are throttled like any other request.
+    Requests without the header run as usual.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters. 🔑'}), 400
+
+        poet_id = (get_jwt_identity() or {}).get('poet_id')
+        cache_key = (poet_id, key)
+        fingerprint = _fingerprint()
+        now = datetime.now(timezone.utc)
+
+        stored = _cache.get(cache_key)
+        if stored is not None and stored.expires_at > now:
+            return _replay(fingerprint, stored)
+
+        ttl = timedelta(hours=current_app.config.get('IDEMPOTENCY_TTL_HOURS', 24))
+        # The key's rows are written with the blocking driver: off the event loop under ASGI
+        claimed, row = run_blocking(_claim_key, poet_id, key, fingerprint, now, ttl)
+
+        if not claimed:
+            if row is None or row.status_code is None:
+                return _in_progress()
+            stored = _stored_outcome(row)
+            _cache.put(cache_key, stored)
+            return _replay(fingerprint, stored)
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except BaseException:
+            # Also when the request was dropped because its client left (see asgi.py)
+            run_blocking(_release_key, poet_id, key)
+            raise
+
+        if response.status_code >= 500 or response.status_code == 429 or response.is_streamed:
+            # Not an outcome worth replaying: free the key for a real retry
+            run_blocking(_release_key, poet_id, key)
+        else:
+            headers = [(name, value) for name, value in response.headers.items()
+                       if name.lower() not in UNSTORED_HEADERS]
+            outcome = _Outcome(fingerprint, response.status_code, response.get_data(), response.mimetype,
+                               headers, now + ttl)
+            run_blocking(_store_outcome, poet_id, key, outcome)
+            _cache.put(cache_key, outcome)
+        return response
+    return wrapper
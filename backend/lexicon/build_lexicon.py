@@ -0,0 +1,47 @@
+"""
+Rebuild the bundled rhyme lexicon (rhymes.tsv.gz) used by backend/rhymes.py.
+
+The lexicon holds the most frequent English words that the CMU Pronouncing Dictionary
+knows, most frequent first, one per line as "word<TAB>rhyme key<TAB>syllables". The
+order is the suggestion ranking of backend/rhyme_index.py. Building it needs two packages
+that the app itself does not:
+    pip install cmudict wordfreq
+    python -m backend.lexicon.build_lexicon --words 40000
+"""
+
+import argparse
+import gzip
+import os
+from backend.rhymes import LEXICON_PATH, rhyme_key_from_phonemes
+
+
+def build(top_words):
+    import cmudict
+    import wordfreq
+
+    pronunciations = cmudict.dict()
+    entries = []
+    for word in wordfreq.top_n_list('en', top_words):
+        if word.isalpha() and word in pronunciations:
+            # The first pronunciation is the most common one
+            key, syllables = rhyme_key_from_phonemes(pronunciations[word][0])
+            entries.append((word, key, syllables))
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rebuild the bundled rhyme lexicon.')
+    parser.add_argument('--words', type=int, default=40000, help='How many of the most frequent words to consider.')
+    parser.add_argument('--output', default=LEXICON_PATH)
+    args = parser.parse_args(argv)
+
+    entries = build(args.words)
+    # mtime=0 keeps the file byte-identical between rebuilds of the same data
+    with open(args.output, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0, filename='') as f:
+        for word, key, syllables in entries:
+            f.write(f'{word}\t{key}\t{syllables}\n'.encode('utf-8'))
+    print(f'{len(entries)} words written to {os.path.relpath(args.output)} 🎼')
+
+
+if __name__ == '__main__':
+    main()
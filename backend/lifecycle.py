@@ -0,0 +1,214 @@
+"""
+Process lifecycle for running under gunicorn, with or without --preload.
+
+create_app does the shared, read-only setup once: tables and poem types, the rhyme
+index and the poem type criteria cache. It then closes the database connections it
+opened, so a forked worker inherits that data but none of the parent's sockets. The
+OpenAI client is only created on first use in each process (ai_val.get_client).
+
+Right after a fork (os.register_at_fork, so no gunicorn hook is needed) the child drops
+the inherited connection pools without closing the parent's connections, forgets the
+OpenAI client and restarts the logging thread, which did not survive the fork.
+
+Every serving process then warms up in a background thread: it opens
+WARMUP_DB_CONNECTIONS connections per engine, loads the activity feed buffer and the poet
+name index and creates its OpenAI client. A forked worker starts warming up immediately; any other process on
+its first request (GET /readyz included). GET /readyz answers 503 until the warmup has
+finished and 200 afterwards.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from sqlalchemy import text
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
+from .database import db
+
+
+logger = logging.getLogger(__name__)
+
+# A failed warmup is tried again by the first request after this many seconds
+WARMUP_RETRY_SECONDS = 5
+
+_app = None
+_fork_hook_registered = False
+_lock = threading.Lock()
+_state = {}
+
+
+def _new_state():
+    return {
+        'pid': os.getpid(),
+        'started': None,
+        'started_at': None,
+        'finished_at': None,
+        'ready': False,
+        'steps_ms': {},
+        'error': None,
+    }
+
+
+def _disposable(engine):
+    """
+    Whether the engine's pool can be dropped. An in-memory SQLite database (StaticPool or
+    SingletonThreadPool, e.g. the test suite's sqlite:///:memory:) only exists in its
+    connection: closing that would drop the data, and there is no socket to leak anyway.
+    """
+    if isinstance(engine.pool, (StaticPool, SingletonThreadPool)):
+        return False
+    url = engine.url
+    return not (url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'))
+
+
+def _prime_pool(engine, connections):
+    # Hold several connections at once so the pool really opens that many
+    opened = []
+    try:
+        for _ in range(max(1, connections)):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.execute(text('SELECT 1'))
+    finally:
+        for connection in opened:
+            connection.close()
+
+
+def warmup(app):
+    """
+    Prime this process's connection pools and caches. Returns the time each step took.
+    """
+    from .activity import feed
+    from .ai_val import get_client
+    from .poet_index import poet_index
+    from .rhyme_index import rhyme_index
+
+    steps = {}
+
+    def step(name, action):
+        started = time.perf_counter()
+        action()
+        steps[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    with app.app_context():
+        connections = app.config.get('WARMUP_DB_CONNECTIONS', 2)
+        for name, engine in db.engines.items():
+            step(f"database{'' if name is None else ':' + name}", lambda: _prime_pool(engine, connections))
+        step('activity_feed', feed.page)
+        step('poet_index', poet_index.load)
+        step('rhyme_index', rhyme_index)
+        step('ai_client', get_client)
+    return steps
+
+
+def _run_warmup(app, state):
+    try:
+        steps = warmup(app)
+    except Exception as e:
+        with _lock:
+            state['error'] = str(e)
+            state['finished_at'] = datetime.now(timezone.utc)
+        logger.error('Worker %s warmup failed: %s 🥶', state['pid'], e)
+        return
+    with _lock:
+        state['steps_ms'] = steps
+        state['error'] = None
+        state['finished_at'] = datetime.now(timezone.utc)
+        state['ready'] = True
+    logger.info('Worker %s warmed up and ready: %s 🔥', state['pid'], steps)
+
+
+def _needs_warmup(state):
+    if state.get('pid') != os.getpid() or state['started'] is None:
+        return True
+    if state['ready'] or state['finished_at'] is None:
+        return False
+    # The last attempt failed; try again once it is old enough
+    return time.monotonic() - state['started'] >= WARMUP_RETRY_SECONDS
+
+
+def ensure_warmup():
+    """
+    Start this process's warmup unless it is running or done. Cheap enough for every request.
+    """
+    if _app is None or not _needs_warmup(_state):
+        return
+
+    with _lock:
+        if not _needs_warmup(_state):
+            return
+        if _state.get('pid') != os.getpid():
+            _state.clear()
+            _state.update(_new_state())
+        _state['started'] = time.monotonic()
+        _state['started_at'] = datetime.now(timezone.utc)
+        _state['finished_at'] = None
+    threading.Thread(target=_run_warmup, args=(_app, _state), name='warmup', daemon=True).start()
+
+
+def _after_fork_in_child():
+    """
+    Release everything the child inherited that belongs to the parent, then warm up.
+    """
+    global _lock
+    from .ai_val import reset_client
+    from .logging_config import restart_logging_after_fork
+
+    _lock = threading.Lock()
+    _state.clear()
+    restart_logging_after_fork()
+    if _app is None:
+        return
+    with _app.app_context():
+        # close=False: the parent's connections must stay open for the parent
+        for engine in db.engines.values():
+            if _disposable(engine):
+                engine.dispose(close=False)
+    reset_client()
+    ensure_warmup()
+
+
+def readiness():
+    """
+    (ready, details) of this process, for GET /readyz.
+    """
+    with _lock:
+        state = dict(_state) if _state.get('pid') == os.getpid() else _new_state()
+    return state['ready'], {
+        'ready': state['ready'],
+        'pid': state['pid'],
+        'warmup_started_at': state['started_at'].isoformat() if state['started_at'] else None,
+        'warmup_finished_at': state['finished_at'].isoformat() if state['finished_at'] else None,
+        'warmup_ms': state['steps_ms'],
+        'error': state['error'],
+    }
+
+
+def init_lifecycle(app):
+    """
+    Finish create_app: load the shared read-only caches, close the startup connections
+    and set up the fork and warmup hooks.
+    """
+    global _app, _fork_hook_registered
+    from .drafts import load_poem_type_criteria
+
+    with app.app_context():
+        load_poem_type_criteria()
+        # Hand the session's connection back first, or disposing closes it under the
+        # session, which then fails to roll back when the app context ends
+        db.session.remove()
+        # Nothing socket-backed is left for a forked worker to inherit
+        for engine in db.engines.values():
+            if _disposable(engine):
+                engine.dispose()
+
+    _app = app
+    _state.clear()
+    if not _fork_hook_registered:
+        os.register_at_fork(after_in_child=_after_fork_in_child)
+        _fork_hook_registered = True
+
+    @app.before_request
+    def start_warmup():
+        ensure_warmup()
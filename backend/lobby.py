@@ -0,0 +1,233 @@
+"""
+The collaboration lobby: open collaborative poems, most recently active first.
+
+Instead of querying poems and lazily loading every poem's lines to show its progress,
+the lobby reads one denormalized row per open poem from `collaboration_lobby`
+(models.LobbyEntry). The rows are maintained on write by an `after_flush` listener,
+in the same transaction as the change:
+    - a new collaborative poem adds its row;
+    - a new line bumps the line count, remaining slots, last contributor and activity;
+    - publishing, deleting or otherwise changing a poem (or rewriting its lines)
+      recomputes or drops its row.
+Writes that bypass the ORM (bulk import) call `rebuild_lobby` afterwards.
+"""
+
+import logging
+from datetime import datetime, timezone
+from pydantic import TypeAdapter
+from sqlalchemy import delete, event, func, insert, inspect, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from .database import RoutingSession, db
+from .models import LobbyEntry, Poem, PoemDetails, PoemType
+from .pagination import decode_cursor, encode_cursor
+from .schemas import LobbyPageResponse
+
+
+logger = logging.getLogger(__name__)
+
+LOBBY_PAGE_SIZE = 20
+LOBBY_MAX_PAGE_SIZE = 100
+
+# Changes to these attributes can move a poem in or out of the lobby (or change its row)
+_POEM_ATTRIBUTES = ('is_collaborative', 'is_published', 'title', 'poem_type_id', 'poet_id')
+_LINE_ATTRIBUTES = ('poem_id', 'poet_id', 'submitted_at')
+
+lobby_page_adapter = TypeAdapter(LobbyPageResponse)
+
+
+def _max_lines(criteria):
+    return (criteria or {}).get('max_lines')
+
+
+def _lobby_rows(conn, poem_ids=None):
+    """
+    Compute lobby rows from poems and poem_details, for the given poems or for all open poems.
+    Only used on the rare paths (rebuilds, edits, deletions), never on lobby reads.
+    """
+    poems, details, poem_types = Poem.__table__, PoemDetails.__table__, PoemType.__table__
+
+    last_contributor = (
+        select(details.c.poet_id)
+        .where(details.c.poem_id == poems.c.id)
+        .order_by(details.c.submitted_at.desc(), details.c.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            poems.c.id, poems.c.title, poems.c.poem_type_id, poems.c.poet_id, poems.c.created_at,
+            poem_types.c.criteria,
+            select(func.count(details.c.id)).where(details.c.poem_id == poems.c.id).scalar_subquery().label('line_count'),
+            select(func.max(details.c.submitted_at)).where(details.c.poem_id == poems.c.id).scalar_subquery().label('last_line_at'),
+            last_contributor.label('last_contributor_id'),
+        )
+        .join(poem_types, poem_types.c.id == poems.c.poem_type_id)
+        .where(poems.c.is_collaborative == True, poems.c.is_published == False)
+    )
+    if poem_ids is not None:
+        query = query.where(poems.c.id.in_(poem_ids))
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    for row in conn.execute(query):
+        max_lines = _max_lines(row.criteria)
+        rows.append({
+            'poem_id': row.id,
+            'title': row.title,
+            'poem_type_id': row.poem_type_id,
+            'poet_id': row.poet_id,
+            'line_count': row.line_count,
+            'max_lines': max_lines,
+            'remaining_slots': max_lines - row.line_count if max_lines is not None else None,
+            'last_contributor_id': row.last_contributor_id,
+            'last_activity_at': row.last_line_at or row.created_at or now,
+        })
+    return rows
+
+
+def _upsert_rows(conn, rows):
+    """
+    Write lobby rows, replacing the stored rows of the same poems.
+    """
+    lobby = LobbyEntry.__table__
+    value_columns = [name for name in rows[0] if name != 'poem_id']
+    dialect = {'postgresql': postgresql, 'sqlite': sqlite}.get(conn.dialect.name)
+    if dialect is not None:
+        statement = dialect.insert(lobby)
+        conn.execute(statement.on_conflict_do_update(
+            index_elements=['poem_id'],
+            set_={name: statement.excluded[name] for name in value_columns},
+        ), rows)
+        return
+
+    for row in rows:
+        result = conn.execute(
+            update(lobby).where(lobby.c.poem_id == row['poem_id'])
+            .values({name: row[name] for name in value_columns})
+        )
+        if result.rowcount == 0:
+            conn.execute(insert(lobby).values(**row))
+
+
+def refresh_lobby_entries(conn, poem_ids):
+    """
+    Recompute the lobby rows of these poems; poems that are no longer open lose their row.
+    Rows are upserted rather than deleted and inserted again, so two transactions
+    refreshing the same poem do not both insert its row.
+    """
+    poem_ids = list(poem_ids)
+    if not poem_ids:
+        return
+    lobby = LobbyEntry.__table__
+    rows = _lobby_rows(conn, poem_ids)
+    if rows:
+        _upsert_rows(conn, rows)
+    closed = set(poem_ids) - {row['poem_id'] for row in rows}
+    if closed:
+        conn.execute(delete(lobby).where(lobby.c.poem_id.in_(closed)))
+
+
+def rebuild_lobby():
+    """
+    Rebuild the whole lobby from poems and poem_details, e.g. after a bulk import.
+    """
+    lobby = LobbyEntry.__table__
+    with db.engine.begin() as conn:
+        conn.execute(delete(lobby))
+        rows = _lobby_rows(conn)
+        if rows:
+            conn.execute(insert(lobby), rows)
+    logger.info('Collaboration lobby rebuilt with %s open poems. 🛋', len(rows))
+    return len(rows)
+
+
+def _changed(obj, attributes):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def maintain_lobby(session, flush_context):
+    """
+    Apply the flushed changes to the lobby in the same transaction.
+    In after_flush, session.new/dirty/deleted and attribute history still describe the flush.
+    """
+    new_poems, new_lines, stale = [], [], set()
+    for obj in session.new:
+        if isinstance(obj, Poem):
+            new_poems.append(obj)
+        elif isinstance(obj, PoemDetails):
+            new_lines.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Poem) and _changed(obj, _POEM_ATTRIBUTES):
+            stale.add(obj.id)
+        elif isinstance(obj, PoemDetails) and _changed(obj, _LINE_ATTRIBUTES):
+            stale.add(obj.poem_id)
+            stale.update(inspect(obj).attrs.poem_id.history.deleted)
+    for obj in session.deleted:
+        if isinstance(obj, (Poem, PoemDetails)):
+            stale.add(obj.id if isinstance(obj, Poem) else obj.poem_id)
+
+    if not (new_poems or new_lines or stale):
+        return
+
+    conn = session.connection()
+    lobby = LobbyEntry.__table__
+    now = datetime.now(timezone.utc)
+
+    for poem in new_poems:
+        if poem.is_collaborative and not poem.is_published:
+            criteria = conn.execute(
+                select(PoemType.__table__.c.criteria).where(PoemType.__table__.c.id == poem.poem_type_id)
+            ).scalar()
+            max_lines = _max_lines(criteria)
+            conn.execute(insert(lobby).values(
+                poem_id=poem.id, title=poem.title, poem_type_id=poem.poem_type_id, poet_id=poem.poet_id,
+                line_count=0, max_lines=max_lines, remaining_slots=max_lines,
+                last_contributor_id=None, last_activity_at=poem.created_at or now,
+            ))
+
+    # The hot path: one UPDATE per new line, no reads. The activity is the line's own
+    # submission time, as a rebuild computes it, so the lobby's order survives a rebuild
+    for line in sorted(new_lines, key=lambda line: (line.submitted_at, line.id)):
+        if line.poem_id in stale:
+            continue
+        conn.execute(
+            update(lobby)
+            .where(lobby.c.poem_id == line.poem_id)
+            .values(
+                line_count=lobby.c.line_count + 1,
+                remaining_slots=lobby.c.remaining_slots - 1,
+                last_contributor_id=line.poet_id,
+                last_activity_at=line.submitted_at,
+            )
+        )
+
+    refresh_lobby_entries(conn, stale - {None})
+
+
+def lobby_page(poet_id, cursor=None, limit=LOBBY_PAGE_SIZE, poem_type_id=None):
+    """
+    One page of open collaborative poems, most recently active first, as JSON bytes.
+
+    Poems the requesting poet contributed the last line to are left out, since they
+    could not contribute again until someone else has. `next_cursor` is None on the last page.
+    """
+    query = (
+        select(LobbyEntry)
+        .where(or_(LobbyEntry.last_contributor_id.is_(None), LobbyEntry.last_contributor_id != poet_id))
+        .order_by(LobbyEntry.last_activity_at.desc(), LobbyEntry.poem_id.desc())
+        .limit(limit + 1)
+    )
+    if poem_type_id:
+        query = query.where(LobbyEntry.poem_type_id == poem_type_id)
+    if cursor:
+        query = query.where(tuple_(LobbyEntry.last_activity_at, LobbyEntry.poem_id) < tuple_(*decode_cursor(cursor)))
+
+    entries = db.session.execute(query).scalars().all()
+    next_cursor = None
+    if len(entries) > limit:
+        next_cursor = encode_cursor(entries[limit - 1].last_activity_at, entries[limit - 1].poem_id)
+    return lobby_page_adapter.dump_json(lobby_page_adapter.validate_python(
+        {'poems': entries[:limit], 'next_cursor': next_cursor}, from_attributes=True
+    ))
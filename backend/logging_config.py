@@ -0,0 +1,169 @@
+"""
+Structured, non-blocking logging for the app.
+
+Request threads only put log records on an in-memory queue (QueueHandler); a single
+background QueueListener thread formats them and does the actual I/O. Records are
+emitted as one JSON object per line (or plain text with LOG_FORMAT=text), and DEBUG
+records can be sampled so debug tracing stays affordable under load.
+
+Configuration (see config.Config):
+    LOG_LEVEL: root level, e.g. INFO.
+    LOG_LEVELS: per-module overrides, e.g. "backend.routes=DEBUG,backend.ai_val=INFO".
+    LOG_DEBUG_SAMPLE_RATE: share of DEBUG records kept, between 0 and 1.
+    LOG_FORMAT: "json" or "text".
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+
+# Chatty third-party loggers that should stay quiet unless LOG_LEVELS says otherwise
+DEFAULT_MODULE_LEVELS = {
+    'httpcore': logging.WARNING,
+    'httpx': logging.WARNING,
+    'openai': logging.WARNING,
+    'werkzeug': logging.INFO,
+}
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object: timestamp, level, logger, message and any `extra=` fields.
+    """
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DebugSampler(logging.Filter):
+    """
+    Keeps every INFO-and-above record, but only a `rate` share of DEBUG records.
+    """
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.rate >= 1 or random.random() < self.rate
+
+
+class _PreparedQueueHandler(QueueHandler):
+    """
+    QueueHandler that only merges the message arguments, leaving the formatting
+    (and its cost) to the listener thread.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks cannot cross the queue safely, so render them now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_module_levels(value):
+    """
+    Parse "backend.routes=DEBUG,httpx=WARNING" into {'backend.routes': 10, 'httpx': 30}.
+    """
+    levels = {}
+    for part in (value or '').split(','):
+        name, _, level = part.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+def configure_logging(app):
+    """
+    Route all logging through a queue drained by a background thread.
+    Safe to call more than once (e.g. one app per test); the previous listener is stopped.
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+
+    if app.config.get('LOG_FORMAT', 'json') == 'text':
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    else:
+        formatter = JsonFormatter()
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _PreparedQueueHandler(log_queue)
+    queue_handler.addFilter(DebugSampler(float(app.config.get('LOG_DEBUG_SAMPLE_RATE', 1.0))))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(app.config.get('LOG_LEVEL', 'INFO').upper())
+
+    for name, level in {**DEFAULT_MODULE_LEVELS, **parse_module_levels(app.config.get('LOG_LEVELS'))}.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def restart_logging_after_fork():
+    """
+    In a forked child: the listener thread did not survive the fork, so start a new one
+    on a fresh queue (whatever the parent had queued is the parent's to write).
+    """
+    global _listener
+
+    if _listener is None:
+        return
+    log_queue = queue.SimpleQueue()
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, QueueHandler):
+            handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """
+    Flush whatever is still queued and stop the listener thread.
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
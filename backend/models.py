@@ -1,7 +1,8 @@
+from datetime import datetime, timezone
 from .database import db
 from flask_login import UserMixin
 from sqlalchemy.sql import func
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index, UniqueConstraint, and_, event
 
 
 class Poet(db.Model, UserMixin):
@@ -14,6 +15,12 @@ class Poet(db.Model, UserMixin):
     created_at = db.Column(db.DateTime(timezone=True), default=func.now())
     # One-to-many relationship with Poem
     poems = db.relationship('Poem', backref='poet', lazy=True, passive_deletes=True)
+    __table_args__ = (
+        # Case-insensitive name prefix lookups (autocomplete fallback, GET /poet/<name>).
+        # text_pattern_ops: on PostgreSQL the prefix range compares bytes, whatever the collation
+        Index('ix_poets_lower_poet_name', func.lower(poet_name).label('lower_poet_name'),
+              postgresql_ops={'lower_poet_name': 'text_pattern_ops'}),
+    )
 
 
 class Poem(db.Model):
@@ -25,11 +32,33 @@ class Poem(db.Model):
     title = db.Column(db.String(255), nullable=False)
     is_collaborative = db.Column(db.Boolean, default=False)
     is_published = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime(timezone=True), default=func.now())
+    # Set by the app, like PoemDetails.submitted_at: the lobby's keyset cursor starts from it
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime(timezone=True), onupdate=func.now())
+    # When is_published last became true (see stamp_publication); publications count on this day
+    published_at = db.Column(db.DateTime(timezone=True))
+    # Bumped by every ORM update of the row; PATCH /edit-poem checks it against If-Match
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     # One-to-one or one-to-many relationship with PoemDetails
-    poem_details = db.relationship('PoemDetails', backref='poem', lazy=True, cascade="all, delete-orphan")
-    __table_args__ = (UniqueConstraint('title', 'poet_id', name='_poem_title_poet_uc'),)
+    poem_details = db.relationship(
+        'PoemDetails', backref='poem', lazy=True, cascade="all, delete-orphan",
+        order_by='(PoemDetails.submitted_at, PoemDetails.id)'
+    )
+    __table_args__ = (
+        UniqueConstraint('title', 'poet_id', name='_poem_title_poet_uc'),
+        # Listings filter on publication and collaboration status
+        Index('ix_poems_published_collaborative', 'is_published', 'is_collaborative'),
+        # Poems by poet (/all-poems?poet_id=, delete_poet)
+        Index('ix_poems_poet_id_collaborative', 'poet_id', 'is_collaborative'),
+        # Only the (few) collaborative poems still open for contributions
+        Index(
+            'ix_poems_open_collaborative', 'id',
+            postgresql_where=and_(is_collaborative == True, is_published == False),
+            sqlite_where=and_(is_collaborative == True, is_published == False),
+        ),
+    )
+    __mapper_args__ = {'version_id_col': version}
+
     def to_dict(self):
         # Convert object to dictionary and handle nested relationships
         poem_dict = {key: value for key, value in self.__dict__.items() if not key.startswith('_')}
@@ -37,6 +66,14 @@ class Poem(db.Model):
         return poem_dict
 
 
+@event.listens_for(Poem.is_published, 'set')
+def stamp_publication(poem, value, oldvalue, initiator):
+    if value and poem.published_at is None:
+        poem.published_at = datetime.now(timezone.utc)
+    elif not value:
+        poem.published_at = None
+
+
 class PoemType(db.Model):
     __tablename__ = 'poem_types'
 
@@ -57,7 +94,130 @@ class PoemDetails(db.Model):
     poem_id = db.Column(db.Integer, db.ForeignKey('poems.id', ondelete='CASCADE'), nullable=False)
     poet_id = db.Column(db.Integer, db.ForeignKey('poets.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
-    submitted_at = db.Column(db.DateTime(timezone=True), default=func.now())
+    # Set by the app rather than the database: SQLite's CURRENT_TIMESTAMP only has second
+    # resolution, which breaks ordering and (submitted_at, id) keyset cursors within a second
+    submitted_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    # Phonetic key of the line's last word, set on save by backend/rhymes.py; lines rhyme when keys match
+    rhyme_key = db.Column(db.String(64))
+    __table_args__ = (
+        # A poem's lines in submission order: the hottest query in the app
+        Index('ix_poem_details_poem_id_submitted_at', 'poem_id', 'submitted_at', 'id'),
+        # Contributions by poet, newest first (delete_poet, per-poet activity feed)
+        Index('ix_poem_details_poet_id_submitted_at', 'poet_id', 'submitted_at', 'id'),
+        # The global activity feed, newest first
+        Index('ix_poem_details_submitted_at', 'submitted_at', 'id'),
+    )
     def to_dict(self):
         # Convert to dictionary, removing SQLAlchemy attributes
         return {key: value for key, value in self.__dict__.items() if not key.startswith('_')}
+
+
+class LobbyEntry(db.Model):
+    # One row per open (collaborative, unpublished) poem, kept up to date on every write
+    # by backend/lobby.py, so the collaboration lobby never has to read poem_details.
+    __tablename__ = 'collaboration_lobby'
+
+    poem_id = db.Column(db.Integer, db.ForeignKey('poems.id', ondelete='CASCADE'), primary_key=True)
+    title = db.Column(db.String(255), nullable=False)
+    poem_type_id = db.Column(db.Integer, db.ForeignKey('poem_types.id'), nullable=False)
+    poet_id = db.Column(db.Integer, db.ForeignKey('poets.id'), nullable=False)
+    line_count = db.Column(db.Integer, nullable=False, default=0)
+    max_lines = db.Column(db.Integer)   # None for forms without a line limit (Free Verse)
+    remaining_slots = db.Column(db.Integer)
+    last_contributor_id = db.Column(db.Integer, db.ForeignKey('poets.id'))
+    last_activity_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    __table_args__ = (
+        # The lobby is read newest activity first, with (last_activity_at, poem_id) as the keyset
+        Index('ix_collaboration_lobby_activity', 'last_activity_at', 'poem_id'),
+    )
+
+
+class PoetDailyStats(db.Model):
+    # Daily rollup per poet and poem type, maintained on every write by backend/rollups.py.
+    # Lines count on the (UTC) day they were submitted, publications on the day the poem was published.
+    __tablename__ = 'poet_daily_stats'
+
+    poet_id = db.Column(db.Integer, db.ForeignKey('poets.id', ondelete='CASCADE'), primary_key=True)
+    poem_type_id = db.Column(db.Integer, db.ForeignKey('poem_types.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    contributions = db.Column(db.Integer, nullable=False, default=0)
+    poems_published = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (
+        # Leaderboards read a range of days across all poets
+        Index('ix_poet_daily_stats_day', 'day'),
+    )
+
+
+class PoemRevision(db.Model):
+    # Append-only history of a poem, written on every edit by backend/revisions.py: a full
+    # snapshot now and then, per-line deltas in between. `base` is the snapshot a revision
+    # is replayed from; the byte counts decide when the next snapshot is due.
+    __tablename__ = 'poem_revisions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    poem_id = db.Column(db.Integer, db.ForeignKey('poems.id', ondelete='CASCADE'), nullable=False)
+    number = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(10), nullable=False)   # snapshot or delta
+    base = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.Text, nullable=False)   # JSON
+    snapshot_bytes = db.Column(db.Integer, nullable=False)   # Size of the base snapshot
+    delta_bytes = db.Column(db.Integer, nullable=False)      # Deltas since the base, this one included
+    poet_id = db.Column(db.Integer)   # Who made the change, when known
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    __table_args__ = (
+        UniqueConstraint('poem_id', 'number', name='_poem_revision_number_uc'),
+    )
+
+
+class PublishedPoem(db.Model):
+    # A published poem frozen into one row by backend/published.py: its final lines and its
+    # PoemResponse JSON, rendered once at publication. Removed again when the poem changes.
+    __tablename__ = 'published_poems'
+
+    poem_id = db.Column(db.Integer, db.ForeignKey('poems.id', ondelete='CASCADE'), primary_key=True)
+    lines = db.Column(db.Text, nullable=False)   # JSON array of the lines' content
+    body = db.Column(db.LargeBinary, nullable=False)   # GET /poem/<id> response, as served
+    frozen_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+
+class IdempotencyKey(db.Model):
+    # Stored outcome of a POST sent with an Idempotency-Key header (see backend/idempotency.py).
+    # status_code is NULL while the first request is still running.
+    __tablename__ = 'idempotency_keys'
+
+    poet_id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)
+    response_body = db.Column(db.LargeBinary)
+    mimetype = db.Column(db.String(100))
+    response_headers = db.Column(db.Text)   # JSON [[name, value], ...]
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+
+
+class AIUsageStats(db.Model):
+    # AI calls per hour, model, poem form and outcome, flushed from memory by backend/ai_usage.py.
+    # A batched call covering several forms is recorded under form 'Mixed'.
+    __tablename__ = 'ai_usage_stats'
+
+    period_start = db.Column(db.DateTime(timezone=True), primary_key=True)
+    model = db.Column(db.String(100), primary_key=True)
+    form = db.Column(db.String(50), primary_key=True)
+    outcome = db.Column(db.String(20), primary_key=True)   # ok, unusable or error
+    calls = db.Column(db.Integer, nullable=False, default=0)
+    lines = db.Column(db.Integer, nullable=False, default=0)
+    prompt_tokens = db.Column(db.Integer, nullable=False, default=0)
+    completion_tokens = db.Column(db.Integer, nullable=False, default=0)
+    latency_ms = db.Column(db.Float, nullable=False, default=0)   # Sum over the calls
+
+
+class AIVerdictStats(db.Model):
+    # AI verdicts per hour and poem form next to the local syllable counter's verdict for the same line
+    __tablename__ = 'ai_verdict_stats'
+
+    period_start = db.Column(db.DateTime(timezone=True), primary_key=True)
+    form = db.Column(db.String(50), primary_key=True)
+    ai_verdict = db.Column(db.String(10), primary_key=True)        # pass, fail or error
+    counter_verdict = db.Column(db.String(10), primary_key=True)   # pass or fail
+    lines = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,26 @@
+"""
+Opaque keyset cursors for feeds ordered newest first by (timestamp, id).
+
+A cursor is the position of the last item of a page; the next page holds the items
+strictly before it. Encoded as URL-safe base64 so clients treat it as a token.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+
+
+def encode_cursor(timestamp, item_id):
+    raw = f'{timestamp.isoformat()}|{item_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor into (timestamp, id). Raises ValueError when it is malformed.
+    """
+    try:
+        timestamp, _, item_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition('|')
+        return datetime.fromisoformat(timestamp), int(item_id)
+    except (UnicodeDecodeError, ValueError, binascii.Error) as e:
+        raise ValueError('Invalid cursor.') from e
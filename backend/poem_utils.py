@@ -1,12 +1,27 @@
+import json
 import logging
 from flask import jsonify
-from .models import Poem, PoemType, PoemDetails
+from .models import Poem, PoemType, PoemDetails, Poet
 # import re
 from datetime import datetime, timedelta, timezone
 from .database import db
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import joinedload
 
 
+logger = logging.getLogger(__name__)
+
+# Columns of a contribution that the read paths need (no relationships, no identity map)
+CONTRIBUTION_COLUMNS = (
+    PoemDetails.id,
+    PoemDetails.poem_id,
+    PoemDetails.poet_id,
+    PoemDetails.content,
+    PoemDetails.submitted_at,
+    PoemDetails.rhyme_key,
+)
+
+
 def count_syllables(line):
     line = line.lower().strip()
     if line == "":
@@ -40,11 +55,27 @@ def count_syllables(line):
     return syllable_count
 
 
+def get_expected_syllables(criteria):
+    """
+    Parse a PoemType's `syllable_structure` (e.g. '5-7-5') into a list of per-line syllable counts.
+    Returns None when the poem type has no syllable restrictions.
+    """
+    if isinstance(criteria, str):
+        criteria = json.loads(criteria)
+
+    structure = (criteria or {}).get('syllable_structure')
+    if not structure:
+        return None
+    return [int(count) for count in structure.split('-')]
+
+
 def validate_haiku_line(line, line_number):
     expected_syllables = [5, 7, 5]
     syllable_count = count_syllables(line)
 
-    print(f"Validating line '{line}': Found {syllable_count} syllables (expected {expected_syllables[line_number - 1]})")
+    logger.debug(
+        "Validating line '%s': Found %s syllables (expected %s)", line, syllable_count, expected_syllables[line_number - 1]
+    )
 
     if syllable_count == expected_syllables[line_number - 1]:
         return "Pass"
@@ -83,11 +114,25 @@ def get_poem_by_title(title):
     return Poem.query.filter(Poem.title.ilike(title)).first()
 
 
+def contributions_select(poem_id):
+    """
+    Core select of a poem's contributions in submission order, projecting only the columns readers need.
+    Executing it returns lightweight Row tuples (with attribute access) instead of PoemDetails objects,
+    so nothing is hydrated or tracked in the session's identity map.
+    """
+    return (
+        select(*CONTRIBUTION_COLUMNS)
+        .where(PoemDetails.poem_id == poem_id)
+        .order_by(PoemDetails.submitted_at, PoemDetails.id)
+    )
+
+
 def get_poem_contributions(poem_id):
     """
-    Retrieve all contributions (lines) for a specific poem.
+    Retrieve all contributions (lines) for a specific poem, in the order they were submitted,
+    as read-only rows with id, poem_id, poet_id, content, submitted_at and rhyme_key.
     """
-    return PoemDetails.query.filter_by(poem_id=poem_id).all()
+    return db.session.execute(contributions_select(poem_id)).all()
 
 
 def get_poem_contributions_query(poet_id=None, days=None):
@@ -110,20 +155,30 @@ def get_poem_contributions_query(poet_id=None, days=None):
 
 def get_last_contribution(poem_id):
     """
-    Fetch the most recent contribution to a collaborative poem.
+    Fetch the most recent contribution to a collaborative poem as a read-only row.
     """
-    return PoemDetails.query.filter_by(poem_id=poem_id).order_by(PoemDetails.submitted_at.desc()).first()
+    query = (
+        select(*CONTRIBUTION_COLUMNS)
+        .where(PoemDetails.poem_id == poem_id)
+        .order_by(PoemDetails.submitted_at.desc(), PoemDetails.id.desc())
+        .limit(1)
+    )
+    return db.session.execute(query).first()
 
 
 def fetch_all_poem_lines(poem_id):
     """
     Fetches and concatenates all existing lines for a collaborative poem, with each line on a new line.
     """
-    # Query the database for all poem details (lines) in the order they were submitted
-    poem_lines = PoemDetails.query.filter_by(poem_id=poem_id).order_by(PoemDetails.submitted_at.asc()).all()
+    # Only the content column is read, in the order the lines were submitted
+    poem_lines = db.session.execute(
+        select(PoemDetails.content)
+        .where(PoemDetails.poem_id == poem_id)
+        .order_by(PoemDetails.submitted_at, PoemDetails.id)
+    ).scalars()
 
-    # Extract the 'content' field from each PoemDetails record and join them with newlines
-    all_lines = "\n".join(detail.content for detail in poem_lines)
+    # Join the lines with newlines
+    all_lines = "\n".join(poem_lines)
 
     return all_lines
 
@@ -133,9 +188,9 @@ def fetch_all_poems_lines(poem_id, exclude_line=None):
     Fetches and concatenates all existing lines for a collaborative poem, with each line on a new line,
     and excludes the specified `exclude_line`.
     """
-    poem_lines = PoemDetails.query.filter_by(poem_id=poem_id).order_by(PoemDetails.submitted_at.asc()).all()
+    poem_lines = get_poem_contributions(poem_id)
 
-    # Extract the 'content' field from each PoemDetails record, excluding the last line if it matches exclude_line
+    # Extract the 'content' field from each contribution, excluding the last line if it matches exclude_line
     all_lines = [
         detail.content for detail in poem_lines
         if detail.content.strip() != (exclude_line.strip() if exclude_line else "")
@@ -146,13 +201,10 @@ def fetch_all_poems_lines(poem_id, exclude_line=None):
 
 def fetch_poem_lines(poem_id):
     """
-    Fetches all existing contributions (lines) for a collaborative poem as individual records.
+    Fetches all existing contributions (lines) for a collaborative poem as individual read-only records,
+    in the order they were submitted.
     """
-    # Query the database for all poem details (lines) in the order they were submitted
-    poem_lines = PoemDetails.query.filter_by(poem_id=poem_id).order_by(PoemDetails.submitted_at.asc()).all()
-
-    # Return the list of PoemDetails records directly
-    return poem_lines
+    return get_poem_contributions(poem_id)
 
 
 def prepare_full_poem(existing_contributions, current_poem_content, poem_id):
@@ -180,14 +232,14 @@ def prepare_poem(existing_contributions, current_poem_content, poem_id):
     if isinstance(existing_contributions, list):
         existing_contributions = "\n".join(existing_contributions)
     elif not isinstance(existing_contributions, str):
-        logging.error("Expected existing_contributions to be a string or list of strings.")
+        logger.error("Expected existing_contributions to be a string or list of strings.")
         return jsonify({'error': 'Error: Contributions format is invalid.'}), 500
 
     # Ensure current_poem_content is a string
     if isinstance(current_poem_content, list):
         current_poem_content = " ".join(current_poem_content)
     elif not isinstance(current_poem_content, str):
-        logging.error("Expected current_poem_content to be a string.")
+        logger.error("Expected current_poem_content to be a string.")
         return jsonify({'error': 'Error: Current poem content format is invalid.'}), 500
 
     # Combine the existing contributions with the current line
@@ -203,23 +255,35 @@ def prepare_full_poems(poem_details):
     return "\n".join(detail.content for detail in poem_details)
 
 
-def get_poem_contributions_paginated(page=1, per_page=10, poet_id=None, days=None):
+def contributions_feed_select():
     """
-    Retrieves a paginated list of poem contributions from a database with 
-    optional filters for a specific poet or a recent time range.
-    The function returns paginated_contributions.items, which is a list of contributions for the specified page, 
-    providing only the items that meet the filter criteria.
+    Core select of contributions newest first, with the poem's title and the poet's name.
     """
-    query = PoemDetails.query
+    return (
+        select(*CONTRIBUTION_COLUMNS, Poem.title.label('poem_title'), Poet.poet_name)
+        .join(Poem, Poem.id == PoemDetails.poem_id)
+        .join(Poet, Poet.id == PoemDetails.poet_id)
+        .order_by(PoemDetails.submitted_at.desc(), PoemDetails.id.desc())
+    )
+
+
+def get_poem_contributions_paginated(poet_id=None, days=None, before=None, limit=10):
+    """
+    Retrieves one page of contributions across all poems, newest first, with optional filters
+    for a specific poet or a recent time range.
+    Pages are keyset-paginated on (submitted_at, id): `before` is the (submitted_at, id) of the
+    last contribution of the previous page. Returns read-only rows that also carry the poem's
+    title and the poet's name.
+    """
+    query = contributions_feed_select().limit(limit)
     # Filter by poet_id if provided
     if poet_id:
-        query = query.filter_by(poet_id=poet_id)
+        query = query.where(PoemDetails.poet_id == poet_id)
     # Filter by recent days if provided
     if days:
-        # If days is provided, a recent date threshold is calculated by subtracting the days count from the current UTC date and time
         recent_date = datetime.now(timezone.utc) - timedelta(days=days)
-        # The query is then filtered to only include contributions with a submitted_at timestamp that is later than or equal to this recent date threshold
-        query = query.filter(PoemDetails.submitted_at >= recent_date)
-    # Apply pagination
-    paginated_contributions = query.order_by(PoemDetails.submitted_at.desc()).paginate(page=page, per_page=per_page)
-    return paginated_contributions.tems   # Returns a list of contributions for the current page
+        query = query.where(PoemDetails.submitted_at >= recent_date)
+    # Continue after the last contribution of the previous page
+    if before:
+        query = query.where(tuple_(PoemDetails.submitted_at, PoemDetails.id) < tuple_(*before))
+    return db.session.execute(query).all()
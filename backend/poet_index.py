@@ -0,0 +1,260 @@
+"""
+Poet name autocomplete (GET /poets/autocomplete?prefix=).
+
+Each worker keeps every poet name in memory, lowercased and bucketed by length, each
+bucket a sorted list searched with bisect. Matches are ranked shortest name first (an
+exact match is always first), then alphabetically, so a lookup walks the buckets from the
+prefix's length up and stops after `limit` matches: one binary search per name length,
+however many poets there are.
+
+The index is loaded during the worker's warmup. Registrations, renames and deletions
+committed by this worker are applied on commit; the other workers' changes arrive with
+a reload in a background thread once the index is older than POET_INDEX_REFRESH_SECONDS.
+Until the first load has finished, lookups are answered by the database through the
+`lower(poet_name)` index (ix_poets_lower_poet_name) with the same ranking.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from sqlalchemy import event, func, inspect, select
+from .database import RoutingSession, db
+from .models import Poet
+from .poet_utils import DELETED_POET_EMAIL
+
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+
+def _key(name):
+    return name.lower()
+
+
+def _upper_bound(prefix):
+    # The smallest string greater than every string starting with `prefix`
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _prefix_range(lowered, prefix):
+    # The bounds compare bytes, as SQLite's default collation does. PostgreSQL compares with
+    # the database's collation, where names starting with `prefix` need not fall between
+    # them; its index uses text_pattern_ops, which serves the byte-wise pattern operators
+    if db.engine.dialect.name == 'postgresql':
+        return lowered.op('~>=~')(prefix), lowered.op('~<~')(_upper_bound(prefix))
+    return lowered >= prefix, lowered < _upper_bound(prefix)
+
+
+def poet_prefix_select(prefix, limit=AUTOCOMPLETE_LIMIT):
+    """
+    Core select of the poets whose name starts with `prefix` (any case), best first. The
+    byte-wise range on lower(poet_name) is served by its index; LIKE makes the match exact.
+    """
+    prefix = _key(prefix)
+    lowered = func.lower(Poet.poet_name)
+    return (
+        select(Poet.id, Poet.poet_name)
+        .where(
+            *_prefix_range(lowered, prefix), lowered.startswith(prefix, autoescape=True),
+            Poet.email != DELETED_POET_EMAIL,
+        )
+        .order_by(func.length(Poet.poet_name), lowered, Poet.poet_name, Poet.id)
+        .limit(limit)
+    )
+
+
+def search_database(prefix, limit=AUTOCOMPLETE_LIMIT):
+    """
+    [(poet_id, poet_name)] whose name starts with `prefix` (any case), best first.
+    """
+    return [(row.id, row.poet_name) for row in db.session.execute(poet_prefix_select(prefix, limit))]
+
+
+class PoetNameIndex:
+    """
+    In-memory prefix index of poet names, see the module docstring. Thread-safe; one
+    instance per process.
+    """
+
+    def __init__(self, max_age=30.0):
+        self.max_age = max_age
+        self._app = None
+        self._lock = threading.Lock()
+        self._buckets = {}      # name length -> sorted [(lowercased name, name, poet id)]
+        self._lengths = []      # the bucket keys, ascending
+        self._entries = {}      # poet id -> (lowercased name, name, poet id)
+        self._loaded_at = None
+        self._loading = False
+        self._journal = None    # changes committed while a load is running, replayed after it
+
+    def configure(self, app, max_age):
+        with self._lock:
+            self._app, self.max_age = app, max_age
+
+    def load(self):
+        """
+        (Re)build the index from the database. Needs an app context. Returns the number
+        of poets, or None when another load is already running.
+        """
+        with self._lock:
+            if self._loading:
+                return None
+            self._loading = True
+        try:
+            return self._load()
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def _load(self):
+        with self._lock:
+            self._journal = []
+        started = time.perf_counter()
+        try:
+            rows = db.session.execute(
+                select(Poet.id, Poet.poet_name).where(Poet.email != DELETED_POET_EMAIL)
+            ).all()
+        except Exception:
+            with self._lock:
+                self._journal = None
+            raise
+
+        entries = {row.id: (_key(row.poet_name), row.poet_name, row.id) for row in rows}
+        with self._lock:
+            for poet_id, name in self._journal:
+                if name is None:
+                    entries.pop(poet_id, None)
+                else:
+                    entries[poet_id] = (_key(name), name, poet_id)
+            self._journal = None
+
+            buckets = {}
+            for entry in entries.values():
+                buckets.setdefault(len(entry[0]), []).append(entry)
+            for bucket in buckets.values():
+                bucket.sort()
+            self._buckets, self._lengths, self._entries = buckets, sorted(buckets), entries
+            self._loaded_at = time.monotonic()
+        logger.info('Poet name index loaded: %s poets in %.1f ms. 📇',
+                    len(entries), (time.perf_counter() - started) * 1000)
+        return len(entries)
+
+    def _reload_in_background(self):
+        with self._lock:
+            if self._loading or self._app is None:
+                return
+            self._loading = True
+
+        def reload():
+            try:
+                with self._app.app_context():
+                    self._load()
+            except Exception as e:
+                logger.error('Poet name index reload failed: %s', e)
+            finally:
+                with self._lock:
+                    self._loading = False
+
+        threading.Thread(target=reload, name='poet-index', daemon=True).start()
+
+    def search(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        """
+        [(poet_id, poet_name)] whose name starts with `prefix` (any case), best first, or
+        None while the index has not been loaded yet.
+        """
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.max_age:
+            self._reload_in_background()
+            if loaded_at is None:
+                return None
+
+        prefix = _key(prefix)
+        matches = []
+        with self._lock:
+            for length in self._lengths[bisect.bisect_left(self._lengths, len(prefix)):]:
+                bucket = self._buckets[length]
+                position = bisect.bisect_left(bucket, (prefix,))
+                while position < len(bucket) and bucket[position][0].startswith(prefix):
+                    matches.append((bucket[position][2], bucket[position][1]))
+                    if len(matches) == limit:
+                        return matches
+                    position += 1
+        return matches
+
+    def _remove(self, poet_id):
+        entry = self._entries.pop(poet_id, None)
+        if entry is None:
+            return
+        bucket = self._buckets[len(entry[0])]
+        position = bisect.bisect_left(bucket, entry)
+        if position < len(bucket) and bucket[position] == entry:
+            del bucket[position]
+
+    def apply(self, changes):
+        """
+        Apply committed changes: [(poet_id, poet_name)], with None as the name of a
+        deleted poet.
+        """
+        with self._lock:
+            if self._journal is not None:
+                self._journal.extend(changes)
+            if self._loaded_at is None:
+                return
+            for poet_id, name in changes:
+                self._remove(poet_id)
+                if name is None:
+                    continue
+                entry = (_key(name), name, poet_id)
+                if len(entry[0]) not in self._buckets:
+                    self._buckets[len(entry[0])] = []
+                    bisect.insort(self._lengths, len(entry[0]))
+                bisect.insort(self._buckets[len(entry[0])], entry)
+                self._entries[poet_id] = entry
+
+
+poet_index = PoetNameIndex()
+
+
+def configure_poet_index(app):
+    poet_index.configure(app, app.config.get('POET_INDEX_REFRESH_SECONDS', 30.0))
+
+
+def autocomplete_poets(prefix, limit=AUTOCOMPLETE_LIMIT):
+    """
+    Poets whose name starts with `prefix`, best first: from memory, or from the database
+    until this worker's index is loaded.
+    """
+    matches = poet_index.search(prefix, limit)
+    if matches is None:
+        matches = search_database(prefix, limit)
+    return [{'id': poet_id, 'poet_name': name} for poet_id, name in matches]
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def note_poet_changes(session, flush_context):
+    changes = [
+        (obj.id, obj.poet_name) for obj in session.new
+        if isinstance(obj, Poet) and obj.email != DELETED_POET_EMAIL
+    ]
+    changes.extend(
+        (obj.id, obj.poet_name) for obj in session.dirty
+        if isinstance(obj, Poet) and inspect(obj).attrs.poet_name.history.has_changes()
+    )
+    changes.extend((obj.id, None) for obj in session.deleted if isinstance(obj, Poet))
+    if changes:
+        session.info.setdefault('poet_index_changes', []).extend(changes)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def publish_poet_changes(session):
+    changes = session.info.pop('poet_index_changes', None)
+    if changes:
+        poet_index.apply(changes)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def forget_poet_changes(session):
+    session.info.pop('poet_index_changes', None)
@@ -1,6 +1,40 @@
+import logging
 from flask_jwt_extended import get_jwt_identity
-from backend.models import Poet, PoemDetails
+from pydantic import TypeAdapter
+from sqlalchemy import Boolean, DateTime, Integer, String, Text, case, cast, distinct, func, literal, null, or_, select, union_all
+from backend.models import Poem, Poet, PoemDetails
 from .database import db
+from .schemas import PoetProfileResponse
+
+
+logger = logging.getLogger(__name__)
+
+# The anonymous poet that inherits the contributions of deleted accounts
+DELETED_POET_EMAIL = 'deletedpoet@gmail.com'
+
+PROFILE_RECENT = 5
+PROFILE_MAX_RECENT = 20
+
+# The columns shared by the three parts of the profile query; each part leaves the
+# columns it has no use for NULL
+_PROFILE_COLUMNS = {
+    'id': Integer,
+    'text': Text,           # poet_name, poem title or line content
+    'detail': String,       # email, or the title of a line's poem
+    'poem_id': Integer,
+    'poem_type_id': Integer,
+    'is_collaborative': Boolean,
+    'is_published': Boolean,
+    'at': DateTime(timezone=True),
+    'poems': Integer,
+    'published_poems': Integer,
+    'collaborative_poems': Integer,
+    'contributions': Integer,
+    'collaborations': Integer,
+}
+_COUNTS = ('poems', 'published_poems', 'collaborative_poems', 'contributions', 'collaborations')
+
+poet_profile_adapter = TypeAdapter(PoetProfileResponse)
 
 
 def fetch_poet(poet_id):
@@ -15,7 +49,7 @@ def get_current_poet():
     Fetch the currently logged-in poet from the database using their poet ID from JWT.
     """
     poet_object = get_jwt_identity()
-    print(f"DEBUG: Token Payload in get_current_poet -> {poet_object}")
+    logger.debug("Token payload in get_current_poet -> %s", poet_object)
 
     # Use SQLAlchemy to filter the Poet table by 
     poet = Poet.query.filter_by(id=poet_object['poet_id']).first()
@@ -46,20 +80,124 @@ def get_poet_contributions(poet_id):
     """
     Fetch all contributions made by a specific poet.
     """
-    return PoemDetails.query.filet_by(poet_id=poet_id).all()
+    return PoemDetails.query.filter_by(poet_id=poet_id).all()
 
 
 def get_or_create_deleted_poet():
     """
     Helper function to get or create the anonymous poet.
     """
-    deleted_poet = Poet.query.filter_by(email='deletedpoet@gmail.com').first()
+    deleted_poet = Poet.query.filter_by(email=DELETED_POET_EMAIL).first()
     if not deleted_poet:
         deleted_poet = Poet(
             poet_name='deletedPoet', 
-            email='deletedpoet@gmail.com', 
+            email=DELETED_POET_EMAIL, 
             password_hash='deleted'
         )
         db.session.add(deleted_poet)
         db.session.commit()
     return deleted_poet.id  # Return the ID of the existing or newly created poet
+
+
+def _profile_part(kind, **columns):
+    return [literal(kind, String).label('kind')] + [
+        columns[name].label(name) if name in columns else cast(null(), type_).label(name)
+        for name, type_ in _PROFILE_COLUMNS.items()
+    ]
+
+
+def _newest_first(items, at):
+    # UNION ALL keeps no order across its parts
+    return sorted(items, key=lambda item: (item[at] is not None, item[at], item['id']), reverse=True)
+
+
+def poet_profile(poet_id, viewer_id=None, limit=PROFILE_RECENT):
+    """
+    A poet with their counts and their most recent poems and contributions, as JSON bytes,
+    or None when there is no such poet.
+
+    Everything comes from one statement: the poet's columns (never password_hash) with
+    the counts from two grouped subqueries, then the newest poems and lines, as a UNION
+    ALL of three parts. Other viewers only see published and collaborative poems and their lines.
+    """
+    poem_counts = (
+        select(
+            Poem.poet_id,
+            func.count(Poem.id).label('poems'),
+            func.sum(case((Poem.is_published == True, 1), else_=0)).label('published_poems'),
+            func.sum(case((Poem.is_collaborative == True, 1), else_=0)).label('collaborative_poems'),
+        )
+        .where(Poem.poet_id == poet_id)
+        .group_by(Poem.poet_id)
+        .subquery()
+    )
+    line_counts = (
+        select(
+            PoemDetails.poet_id,
+            func.count(PoemDetails.id).label('contributions'),
+            func.count(distinct(case((Poem.is_collaborative == True, PoemDetails.poem_id)))).label('collaborations'),
+        )
+        .join(Poem, Poem.id == PoemDetails.poem_id)
+        .where(PoemDetails.poet_id == poet_id)
+        .group_by(PoemDetails.poet_id)
+        .subquery()
+    )
+    poet = (
+        select(*_profile_part(
+            'poet', id=Poet.id, text=Poet.poet_name, detail=Poet.email, at=Poet.created_at,
+            **{name: func.coalesce(counts.c[name], 0) for counts in (poem_counts, line_counts)
+               for name in _COUNTS if name in counts.c},
+        ))
+        .outerjoin(poem_counts, poem_counts.c.poet_id == Poet.id)
+        .outerjoin(line_counts, line_counts.c.poet_id == Poet.id)
+        .where(Poet.id == poet_id)
+    )
+
+    # Open collaborative poems are public in the lobby; other individual poems are drafts
+    visible = [or_(Poem.is_published == True, Poem.is_collaborative == True)] if viewer_id != poet_id else []
+    poems = (
+        select(*_profile_part(
+            'poem', id=Poem.id, text=Poem.title, poem_type_id=Poem.poem_type_id,
+            is_collaborative=Poem.is_collaborative, is_published=Poem.is_published, at=Poem.created_at,
+        ))
+        .where(Poem.poet_id == poet_id, *visible)
+        .order_by(Poem.created_at.desc(), Poem.id.desc())
+        .limit(limit)
+        .subquery()
+    )
+    # Served by ix_poem_details_poet_id_submitted_at, newest first
+    lines = (
+        select(*_profile_part(
+            'line', id=PoemDetails.id, text=PoemDetails.content, detail=Poem.title,
+            poem_id=PoemDetails.poem_id, at=PoemDetails.submitted_at,
+        ))
+        .join(Poem, Poem.id == PoemDetails.poem_id)
+        .where(PoemDetails.poet_id == poet_id, *visible)
+        .order_by(PoemDetails.submitted_at.desc(), PoemDetails.id.desc())
+        .limit(limit)
+        .subquery()
+    )
+
+    profile, recent_poems, recent_contributions = None, [], []
+    for row in db.session.execute(union_all(poet, select(poems), select(lines))):
+        if row.kind == 'poet':
+            profile = {
+                'poet': {'id': row.id, 'poet_name': row.text, 'email': row.detail, 'created_at': row.at},
+                'counts': {name: row._mapping[name] for name in _COUNTS},
+            }
+        elif row.kind == 'poem':
+            recent_poems.append({
+                'id': row.id, 'title': row.text, 'poem_type_id': row.poem_type_id,
+                'is_collaborative': row.is_collaborative, 'is_published': row.is_published, 'created_at': row.at,
+            })
+        else:
+            recent_contributions.append({
+                'id': row.id, 'poem_id': row.poem_id, 'poem_title': row.detail, 'content': row.text,
+                'submitted_at': row.at,
+            })
+    if profile is None:
+        return None
+
+    profile['recent_poems'] = _newest_first(recent_poems, 'created_at')
+    profile['recent_contributions'] = _newest_first(recent_contributions, 'submitted_at')
+    return poet_profile_adapter.dump_json(poet_profile_adapter.validate_python(profile))
@@ -3,6 +3,10 @@ from flask import jsonify
 from backend.schemas import PoemDetailsResponse
 from backend.poem_utils import fetch_all_poem_lines, prepare_full_poem, prepare_poem
 from backend.database import db
+from backend.published import freeze_poem
+
+
+logger = logging.getLogger(__name__)
 
 
 def validate_free_verse(current_poem_content):
@@ -41,7 +45,7 @@ def handle_free_verse_new(existing_contributions, current_poem_content, poem, po
 
     # Check if previous_lines is a string to avoid errors when stripping or splitting
     if not isinstance(previous_lines, str):
-        logging.error("Expected previous_lines to be a string but got a different type.")
+        logger.error("Expected previous_lines to be a string but got a different type.")
         previous_lines = ""  # Fallback to empty string
 
     # Strip and split previous lines, ensuring to filter out empty strings
@@ -55,8 +59,7 @@ def handle_free_verse_new(existing_contributions, current_poem_content, poem, po
     combined_lines = previous_lines_list + [current_poem_content.strip()]
     line_number = len(combined_lines)
 
-    # Debugging print
-    print(f"Combined lines: {combined_lines}, Line Number: {line_number}")
+    logger.debug("Combined lines: %s, Line Number: %s", combined_lines, line_number)
     
     # Retrieve the `publish` flag from the request data
     should_publish = poem_details_data.dict().get('publish', False)
@@ -73,6 +76,7 @@ def handle_free_verse_new(existing_contributions, current_poem_content, poem, po
     # Publish the poem if the flag is set
     if should_publish:
         poem.is_published = True
+        freeze_poem(poem)
         db.session.commit()
         
     db.session.refresh(poem_details)
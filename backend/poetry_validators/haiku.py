@@ -5,9 +5,13 @@ from backend.ai_val import fetch_poem_validation_from_ai
 from backend.models import PoemDetails
 from backend.poem_utils import fetch_all_poem_lines, prepare_poem, validate_haiku_line
 from backend.poem_utils import prepare_full_poem
+from backend.published import freeze_poem
 from backend.schemas import PoemDetailsResponse
 
 
+logger = logging.getLogger(__name__)
+
+
 def validate_haiku_line_with_fallback(line, line_num):
     """
     Attempts to validate a Haiku line using AI. If it fails, falls back to approximate syllable count.
@@ -35,7 +39,7 @@ def handle_haiku(existing_contributions, current_poem_content, poem, poem_detail
 
     # Check if previous_lines is a string to avoid errors when stripping or splitting
     if not isinstance(previous_lines, str):
-        logging.error("Expected previous_lines to be a string but got a different type.")
+        logger.error("Expected previous_lines to be a string but got a different type.")
         previous_lines = ""  # Fallback to empty string
 
     # Strip and split previous lines, ensuring to filter out empty strings
@@ -49,11 +53,7 @@ def handle_haiku(existing_contributions, current_poem_content, poem, poem_detail
     combined_lines = previous_lines_list + [current_poem_content.strip()]
     line_number = len(combined_lines)
 
-    # Debugging print
-    print(f"Combined lines: {combined_lines}, Line Number: {line_number}")
-
-    # Debug: Print details of the line being validated
-    print(f"Previous lines: '{previous_lines}', line number: {line_number}")
+    logger.debug("Combined lines: %s, Line Number: %s", combined_lines, line_number)
 
     if line_number > 3:
         return jsonify({'error': 'Haiku can only have 3 lines in total. ⚡️'}), 400
@@ -68,12 +68,13 @@ def handle_haiku(existing_contributions, current_poem_content, poem, poem_detail
     try:
         full_poem_so_far = prepare_poem(existing_contributions, current_poem_content, poem.id)
     except TypeError as e:
-        logging.error(f"Error preparing full poem: {e}")
+        logger.error('Error preparing full poem: %s', e)
         return jsonify({'error': 'Error preparing the full poem content.'}), 500
 
     # Check if the Haiku is now complete (3 lines in total)
     if len(combined_lines) == 3:
         poem.is_published = True
+        freeze_poem(poem)
         db.session.commit()
         return jsonify({'message': 'Haiku is now completed and published. 🌸', 'full_poem': full_poem_so_far}), 201
 
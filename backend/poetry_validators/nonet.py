@@ -3,6 +3,7 @@ from flask import jsonify
 from backend.ai_val import fetch_poem_validation_from_ai
 from backend.poem_utils import fetch_all_poem_lines
 from backend.poem_utils import prepare_full_poem
+from backend.published import freeze_poem
 from backend.schemas import PoemDetailsResponse
 from backend.poetry_validators.poem_val import validate_consecutive_contributions
 
@@ -71,6 +72,7 @@ def handle_nonet(existing_contributions, current_poem_content, poem, poem_detail
     # Check if the Nonet is now complete (9 lines in total)
     if existing_contributions + 1 == 9:
         poem.is_published = True
+        freeze_poem(poem)
         db.session.commit()
         return jsonify({'message': 'Nonet is now completed and published. 🌸'}), 201
 
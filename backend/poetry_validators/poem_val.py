@@ -4,6 +4,7 @@ The poem_val.py file handles the validation logic for different poem types.
 
 from flask import jsonify
 from backend.poem_utils import get_last_contribution
+from backend.rhymes import line_rhyme_key, rhyme_scheme_error
 import logging
 import json
 
@@ -84,3 +85,39 @@ def validate_consecutive_contributions_new(existing_contributions, poet_id, poem
         return jsonify({'error': 'Consecutive contributions by the same poet are not allowed. 🌱'}), 400
     
     return None  # No consecutive contribution violation
+
+
+def _rhyme_keys(contribution):
+    # A stored key covers a one-line contribution; an individual poem saved whole holds many lines
+    lines = [line for line in contribution.content.splitlines() if line.strip()]
+    if len(lines) == 1 and contribution.rhyme_key:
+        return [contribution.rhyme_key]
+    return [line_rhyme_key(line) for line in lines]
+
+
+def validate_rhyme_scheme(poem_type, existing_contributions, current_poem_content):
+    """
+    Ensure the new line(s) rhyme where the poem type's rhyme scheme (e.g. 'ABAB') says they should.
+    Compares the stored rhyme keys of the existing lines with each new line's key; no AI involved.
+    """
+    criteria = poem_type.criteria
+    if isinstance(criteria, str):
+        criteria = json.loads(criteria)
+    scheme = (criteria or {}).get('rhyme_scheme')
+    if not scheme:
+        return None
+
+    # Lines saved before rhyme keys existed get theirs computed on the fly
+    previous_keys = [key for contribution in existing_contributions for key in _rhyme_keys(contribution)]
+    for line in current_poem_content.splitlines():
+        if not line.strip():
+            continue
+        key = line_rhyme_key(line)
+        rhymes_with = rhyme_scheme_error(scheme, previous_keys, key)
+        if rhymes_with:
+            return jsonify({
+                'error': f'Line {len(previous_keys) + 1} should rhyme with line {rhymes_with} ({scheme} rhyme scheme). 🎶'
+            }), 400
+        previous_keys.append(key)
+
+    return None
@@ -0,0 +1,130 @@
+"""
+Frozen published poems: GET /poem/<id> for a published poem in one primary-key fetch.
+
+A published Haiku or Nonet never changes again, yet every read used to load the poem and
+its lines and serialize them. When a poem is published, freeze_poem stores its final lines
+and its PoemResponse JSON in `published_poems` (models.PublishedPoem), in the same
+transaction; reads then return the stored bytes as they are (frozen_poem_json).
+
+Editing a frozen poem is rare but allowed: a flush listener drops the row of any poem whose
+row or lines change, so nothing stale is ever served and reads fall back to serializing
+the live poem. PATCH /edit-poem freezes the edited poem again.
+Poems published outside the ORM (import-poems) are frozen by freeze_published_poems.
+"""
+
+import json
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import delete, event, insert, inspect, select
+from sqlalchemy.orm import selectinload
+from .database import RoutingSession, db
+from .models import Poem, PoemDetails, PublishedPoem
+from .serializers import poem_to_json
+
+
+logger = logging.getLogger(__name__)
+
+FREEZE_BATCH_SIZE = 500
+
+
+def _frozen_row(poem, body, now):
+    return {
+        'poem_id': poem.id,
+        'lines': json.dumps([detail.content for detail in poem.poem_details], ensure_ascii=False),
+        'body': body,
+        'frozen_at': now,
+    }
+
+
+def freeze_poem(poem):
+    """
+    Store a published poem's lines and response JSON, replacing any earlier freeze.
+    Runs in the caller's transaction; the caller commits.
+
+    The poem is rendered as it is in memory, after a flush for the ids and version.
+    """
+    # A line added by poem_id alone is missing from an already loaded collection
+    if 'poem_details' in inspect(poem).dict:
+        lines = poem.poem_details
+        for obj in list(db.session.new):
+            if isinstance(obj, PoemDetails) and obj.poem_id == poem.id and obj not in lines:
+                lines.append(obj)
+    db.session.flush()
+    body = poem_to_json(poem)
+    conn = db.session.connection()
+    published = PublishedPoem.__table__
+    conn.execute(delete(published).where(published.c.poem_id == poem.id))
+    conn.execute(insert(published), [_frozen_row(poem, body, datetime.now(timezone.utc))])
+    return body
+
+
+def frozen_poem_json(poem_id):
+    """
+    The stored PoemResponse JSON of a frozen poem, or None when the poem is not frozen.
+    """
+    published = PublishedPoem.__table__
+    return db.session.execute(select(published.c.body).where(published.c.poem_id == poem_id)).scalar()
+
+
+def freeze_published_poems(batch_size=FREEZE_BATCH_SIZE):
+    """
+    Freeze every published poem that is not frozen yet, e.g. after a bulk import.
+    """
+    published = PublishedPoem.__table__
+    pending = select(Poem.id).where(
+        Poem.is_published == True, ~Poem.id.in_(select(published.c.poem_id))
+    ).order_by(Poem.id)
+    poem_ids = db.session.execute(pending).scalars().all()
+
+    for start in range(0, len(poem_ids), batch_size):
+        poems = Poem.query.options(selectinload(Poem.poem_details)).filter(
+            Poem.id.in_(poem_ids[start:start + batch_size])
+        ).all()
+        now = datetime.now(timezone.utc)
+        db.session.connection().execute(insert(published), [_frozen_row(poem, poem_to_json(poem), now) for poem in poems])
+        db.session.commit()
+    logger.info('Froze %s published poems. 🧊', len(poem_ids))
+    return len(poem_ids)
+
+
+def _may_be_frozen(session, poem_id):
+    # Only a published poem is frozen. Poems outside the session, or whose flag is not
+    # loaded, are checked by the DELETE itself; reading the flag here would query anyway
+    poem = session.identity_map.get(session.identity_key(Poem, poem_id))
+    if poem is None:
+        return True
+    state = inspect(poem)
+    if 'is_published' not in state.dict:
+        return True
+    return bool(poem.is_published) or True in (state.attrs.is_published.history.deleted or ())
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def unfreeze_changed_poems(session, flush_context, instances):
+    """
+    Before a flush changes a published poem or its lines, drop the poem's frozen row.
+    Lines added to open poems, the usual case, cost nothing.
+    """
+    poem_ids = set()
+    for obj in session.new:
+        if isinstance(obj, PoemDetails):
+            poem_ids.add(obj.poem_id if obj.poem_id is not None else getattr(obj.poem, 'id', None))
+    for obj in session.dirty:
+        if isinstance(obj, Poem) and session.is_modified(obj, include_collections=False):
+            poem_ids.add(obj.id)
+        elif isinstance(obj, PoemDetails) and session.is_modified(obj):
+            # A line moved to another poem changes both
+            poem_ids.update(inspect(obj).attrs.poem_id.history.deleted or ())
+            poem_ids.add(obj.poem_id)
+    for obj in session.deleted:
+        if isinstance(obj, Poem):
+            poem_ids.add(obj.id)
+        elif isinstance(obj, PoemDetails):
+            poem_ids.update(inspect(obj).attrs.poem_id.history.deleted or (obj.poem_id,))
+    poem_ids.discard(None)
+    poem_ids = [poem_id for poem_id in poem_ids if _may_be_frozen(session, poem_id)]
+    if not poem_ids:
+        return
+
+    published = PublishedPoem.__table__
+    session.connection().execute(delete(published).where(published.c.poem_id.in_(poem_ids)))
@@ -0,0 +1,71 @@
+"""
+EXPLAIN checks for the queries the app runs on every request.
+
+Each key query is compiled for the current database and its plan is inspected to make
+sure it is served by an index rather than a full table scan. Run it after a migration
+or against a production snapshot:
+    flask --app main check-query-plans
+"""
+
+from sqlalchemy import select, text
+from .database import db
+from .models import Poem, PoemDetails
+from .poem_utils import contributions_feed_select, contributions_select
+from .poet_index import poet_prefix_select
+
+
+def _key_queries():
+    """
+    (name, statement, expected indexes) for the hot read paths. The planner may pick any
+    of the expected indexes, e.g. SQLite prefers the composite listing index over the
+    partial one for open collaborative poems.
+    """
+    return [
+        ('poem lines in submission order', contributions_select(1),
+         ('ix_poem_details_poem_id_submitted_at',)),
+        ('last contribution to a poem',
+         contributions_select(1).order_by(None)
+         .order_by(PoemDetails.submitted_at.desc(), PoemDetails.id.desc()).limit(1),
+         ('ix_poem_details_poem_id_submitted_at',)),
+        ('contributions by poet', select(PoemDetails.id).where(PoemDetails.poet_id == 1),
+         ('ix_poem_details_poet_id_submitted_at',)),
+        ('activity feed', contributions_feed_select().limit(20),
+         ('ix_poem_details_submitted_at',)),
+        ('activity feed by poet', contributions_feed_select().where(PoemDetails.poet_id == 1).limit(20),
+         ('ix_poem_details_poet_id_submitted_at',)),
+        ('published poems listing',
+         select(Poem.id).where(Poem.is_published == True, Poem.is_collaborative == False),
+         ('ix_poems_published_collaborative',)),
+        ('poems by poet',
+         select(Poem.id).where(Poem.poet_id == 1, Poem.is_collaborative == False),
+         ('ix_poems_poet_id_collaborative',)),
+        ('open collaborative poems',
+         select(Poem.id).where(Poem.is_collaborative == True, Poem.is_published == False),
+         ('ix_poems_open_collaborative', 'ix_poems_published_collaborative')),
+        ('poet name prefix', poet_prefix_select('ann'),
+         ('ix_poets_lower_poet_name',)),
+    ]
+
+
+def explain(statement):
+    """
+    Return the plan of `statement` on the current database as a list of text lines.
+    """
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    if db.engine.dialect.name == 'sqlite':
+        rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {compiled}')).all()
+        return [row[-1] for row in rows]
+    rows = db.session.execute(text(f'EXPLAIN {compiled}')).all()
+    return [row[0] for row in rows]
+
+
+def check_query_plans():
+    """
+    Explain every key query. Returns a list of (name, expected indexes, uses index, plan lines).
+    """
+    results = []
+    for name, statement, indexes in _key_queries():
+        plan = explain(statement)
+        uses_index = any(index in line for index in indexes for line in plan)
+        results.append((name, indexes, uses_index, plan))
+    return results
@@ -0,0 +1,327 @@
+"""
+Admission control for submissions and AI-backed routes: token buckets per poet, per IP
+and one global bucket for the routes that call the AI.
+
+A bucket holds up to `capacity` tokens and refills continuously at capacity/period;
+every request takes one token from each of its buckets, or none at all when one of them
+is empty, and is then rejected with 429. The per-poet and per-IP check runs right after
+the JWT is decoded, before any database or AI work. The global AI bucket is only charged
+(with `admit('ai')`) once a submission is known to go to the model.
+
+Buckets live in process memory by default. With RATE_LIMIT_STORAGE_URL set to a Redis
+URL (needs the `redis` package), they are shared by every worker and host; if Redis
+becomes unreachable the limiter falls back to its in-memory buckets, and leaves Redis
+alone for RATE_LIMIT_STORE_RETRY_SECONDS before trying it again.
+
+Configuration (see config.Config):
+    RATE_LIMIT_ENABLED: turn the limiter off entirely (e.g. for load tests).
+    RATE_LIMIT_PER_POET / RATE_LIMIT_PER_IP / RATE_LIMIT_AI_GLOBAL: "N/second|minute|hour|day".
+    RATE_LIMIT_STORAGE_URL: optional shared store, e.g. redis://localhost:6379/0.
+    RATE_LIMIT_STORE_RETRY_SECONDS: how long to skip the shared store after it failed.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from flask import g, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from .asgi import run_blocking
+
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate(value):
+    """
+    Parse "20/minute" into (capacity, period in seconds).
+    """
+    count, _, period = value.partition('/')
+    try:
+        return int(count), PERIODS[period.strip().lower()]
+    except (KeyError, ValueError) as e:
+        raise ValueError(f'Invalid rate limit "{value}", expected e.g. "20/minute".') from e
+
+
+class MemoryBucketStore:
+    """
+    Token buckets in a dict guarded by a lock. Buckets that have refilled completely carry
+    no information, so they are dropped whenever the dict grows past `max_keys`.
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, buckets, now):
+        """
+        Take one token from each of `buckets` [(key, capacity, period)], or none when one
+        of them is empty. Returns (allowed, [tokens left in each bucket]).
+        """
+        with self._lock:
+            levels = []
+            for key, capacity, period in buckets:
+                tokens, updated_at = self._buckets.get(key, (capacity, now))
+                levels.append(min(capacity, tokens + (now - updated_at) * capacity / period))
+            allowed = all(tokens >= 1 for tokens in levels)
+            if allowed:
+                levels = [tokens - 1 for tokens in levels]
+            for (key, _, _), tokens in zip(buckets, levels):
+                self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, levels
+
+    def _prune(self, now):
+        # Called with the lock held. A bucket idle for longer than the longest period is full
+        for key, (tokens, updated_at) in list(self._buckets.items()):
+            if now - updated_at > PERIODS['day']:
+                del self._buckets[key]
+        if len(self._buckets) > self.max_keys:
+            self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RedisBucketStore:
+    """
+    The same token buckets in Redis, all of a request's buckets updated atomically by one
+    Lua script so that every worker sees one budget.
+    """
+
+    name = 'redis'
+
+    # KEYS: the buckets; ARGV: now, then capacity and refill rate of each bucket
+    TAKE_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local levels = {}
+    local allowed = 1
+    for i, key in ipairs(KEYS) do
+        local capacity = tonumber(ARGV[2 * i])
+        local rate = tonumber(ARGV[2 * i + 1])
+        local bucket = redis.call('HMGET', key, 'tokens', 'updated_at')
+        local tokens = tonumber(bucket[1]) or capacity
+        local updated_at = tonumber(bucket[2]) or now
+        levels[i] = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+        if levels[i] < 1 then
+            allowed = 0
+        end
+    end
+    local result = {allowed}
+    for i, key in ipairs(KEYS) do
+        local capacity = tonumber(ARGV[2 * i])
+        local rate = tonumber(ARGV[2 * i + 1])
+        if allowed == 1 then
+            levels[i] = levels[i] - 1
+        end
+        redis.call('HSET', key, 'tokens', levels[i], 'updated_at', now)
+        redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+        result[i + 1] = tostring(levels[i])
+    end
+    return result
+    """
+
+    def __init__(self, url, prefix='poetica:ratelimit:'):
+        import redis    # Optional dependency, only needed for a shared store
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self._take = self._client.register_script(self.TAKE_SCRIPT)
+
+    def take(self, buckets, now):
+        args = [now]
+        for _, capacity, period in buckets:
+            args.extend((capacity, capacity / period))
+        allowed, *levels = self._take(keys=[self.prefix + key for key, _, _ in buckets], args=args)
+        return bool(allowed), [float(tokens) for tokens in levels]
+
+    def __len__(self):
+        return 0
+
+
+class RateLimiter:
+    """
+    Holds the rules, the bucket store and the per-rule counters of this process.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.rules = {}
+        self.memory = MemoryBucketStore()
+        self.store = self.memory
+        self.store_retry_seconds = 30
+        # While time.monotonic() is below this, the shared store is skipped (circuit open)
+        self._store_down_until = 0.0
+        self.metrics = {'allowed': Counter(), 'limited': Counter(), 'store_errors': 0, 'store_skipped': 0}
+
+    def configure(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.rules = {
+            'poet': parse_rate(app.config.get('RATE_LIMIT_PER_POET', '20/minute')),
+            'ip': parse_rate(app.config.get('RATE_LIMIT_PER_IP', '60/minute')),
+            'ai': parse_rate(app.config.get('RATE_LIMIT_AI_GLOBAL', '300/minute')),
+        }
+        self.memory = MemoryBucketStore()
+        self.store = self.memory
+        self.store_retry_seconds = app.config.get('RATE_LIMIT_STORE_RETRY_SECONDS', 30)
+        self._store_down_until = 0.0
+        storage_url = app.config.get('RATE_LIMIT_STORAGE_URL')
+        if storage_url:
+            self.store = RedisBucketStore(storage_url)
+            logger.info('🚦 Rate limit buckets are shared through Redis')
+
+    def _take(self, buckets, now):
+        if self.store is self.memory:
+            return self.memory.take(buckets, now)
+        if time.monotonic() < self._store_down_until:
+            # The store failed recently: don't make every request wait for its timeout
+            self.metrics['store_skipped'] += 1
+            return self.memory.take(buckets, now)
+        try:
+            # A network round trip: off the event loop under the ASGI server
+            return run_blocking(self.store.take, buckets, now)
+        except Exception as e:
+            # A shared store outage must not take the submissions down with it
+            self.metrics['store_errors'] += 1
+            self._store_down_until = time.monotonic() + self.store_retry_seconds
+            logger.warning('Rate limit store unavailable, using in-process buckets for %ss: %s',
+                           self.store_retry_seconds, e)
+            return self.memory.take(buckets, now)
+
+    def check(self, rule_names, poet_id, ip):
+        """
+        Take a token from every bucket that applies, or from none of them when one is
+        empty. Returns (allowed, budget), where budget describes the empty bucket or else
+        the tightest one: rule, limit, remaining and seconds to refill.
+        """
+        identities = {'poet': poet_id, 'ip': ip, 'ai': 'global'}
+        rules = [
+            (name, identities[name]) for name in rule_names
+            if identities.get(name) is not None and name in self.rules
+        ]
+        if not rules:
+            return True, None
+
+        allowed, levels = self._take(
+            [(f'{name}:{identity}', *self.rules[name]) for name, identity in rules], time.time()
+        )
+        if not allowed:
+            name, tokens = next((name, tokens) for (name, _), tokens in zip(rules, levels) if tokens < 1)
+            self.metrics['limited'][name] += 1
+            return False, self._budget(name, tokens, empty=True)
+
+        budget = None
+        for (name, _), tokens in zip(rules, levels):
+            self.metrics['allowed'][name] += 1
+            current = self._budget(name, tokens, empty=False)
+            if budget is None or current['remaining'] < budget['remaining']:
+                budget = current
+        return True, budget
+
+    def _budget(self, name, tokens, empty):
+        capacity, period = self.rules[name]
+        return {
+            'rule': name,
+            'limit': capacity,
+            'remaining': max(0, math.floor(tokens)),
+            # Seconds until the next token (when empty) or until the bucket is full again
+            'reset': math.ceil((1 - tokens if empty else capacity - tokens) * period / capacity),
+        }
+
+    def snapshot(self):
+        """
+        Counters and rules of this process, for the admin endpoint.
+        """
+        return {
+            'enabled': self.enabled,
+            'store': self.store.name,
+            'store_errors': self.metrics['store_errors'],
+            'store_skipped': self.metrics['store_skipped'],
+            'store_available': time.monotonic() >= self._store_down_until,
+            'tracked_buckets': len(self.memory),
+            'rules': {
+                name: {
+                    'limit': capacity,
+                    'period_seconds': period,
+                    'allowed': self.metrics['allowed'][name],
+                    'limited': self.metrics['limited'][name],
+                }
+                for name, (capacity, period) in self.rules.items()
+            },
+        }
+
+
+limiter = RateLimiter()
+
+
+def _budget_headers(budget):
+    return {
+        'X-RateLimit-Limit': str(budget['limit']),
+        'X-RateLimit-Remaining': str(budget['remaining']),
+        'X-RateLimit-Reset': str(budget['reset']),
+        'X-RateLimit-Scope': budget['rule'],
+    }
+
+
+def admit(*rule_names):
+    """
+    Take a token from the request's buckets for `rule_names` ('poet', 'ip', 'ai').
+    Returns a 429 response when one of them is empty, else None; the tightest bucket
+    taken from during the request is reported in the X-RateLimit-* headers.
+    """
+    if not limiter.enabled:
+        return None
+
+    identity = get_jwt_identity() or {}
+    allowed, budget = limiter.check(rule_names, identity.get('poet_id'), request.remote_addr)
+    if not allowed:
+        # The 429 reports the empty bucket, not one taken from earlier in the request
+        g.pop('rate_limit_budget', None)
+        response = jsonify({'error': 'Whoa, that is a lot of poetry at once. Take a breath and try again soon. 🐢'})
+        response.headers.update(_budget_headers(budget))
+        response.headers['Retry-After'] = str(budget['reset'])
+        return response, 429
+
+    current = g.get('rate_limit_budget')
+    if budget and (current is None or budget['remaining'] < current['remaining']):
+        g.rate_limit_budget = budget
+    return None
+
+
+def rate_limit(*rule_names):
+    """
+    Route decorator (below @jwt_required()): reject the request with 429 when the poet's
+    or the client IP's bucket is empty. Views charge the global AI bucket themselves,
+    with `admit('ai')`, once they know the request goes to the model.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limited = admit(*rule_names)
+            if limited:
+                return limited
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def init_rate_limiter(app):
+    """
+    Configure the limiter and add the remaining-budget headers to limited routes' responses.
+    """
+    limiter.configure(app)
+
+    @app.after_request
+    def add_rate_limit_headers(response):
+        budget = g.pop('rate_limit_budget', None)
+        if budget:
+            response.headers.update(_budget_headers(budget))
+        return response
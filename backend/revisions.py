@@ -0,0 +1,263 @@
+"""
+Revision history of poems: GET /poem/<id>/revisions and point-in-time reconstruction.
+
+Every edit of a poem (PATCH /edit-poem) appends a revision to `poem_revisions`
+(models.PoemRevision), in the same transaction as the edit. Most revisions are deltas
+against the previous revision, holding only what changed:
+
+    {"title": ..., "poem_type_id": ..., "is_published": ...,    changed poem fields
+     "added": [[line_id, poet_id, content], ...],               new lines, in order
+     "changed": [[line_id, content], ...],                      edited lines
+     "removed": [line_id, ...]}                                 deleted lines
+
+Contributions are not revisions of their own, so adding a line costs nothing here: the
+lines added since the previous revision are part of the next edit's delta.
+
+A snapshot holds the whole poem ({"title", "poem_type_id", "is_published", "lines"}). The
+first edit of a poem stores a snapshot of the poem as it was before, and a new snapshot
+is written whenever REVISION_MAX_REPLAY deltas have piled up since the last one. Storage
+therefore grows with the size of the edits rather than of the poem, and rebuilding any
+revision reads one snapshot and fewer than REVISION_MAX_REPLAY deltas in one indexed
+range query.
+"""
+
+import json
+import logging
+from datetime import datetime, timezone
+from flask import current_app, has_app_context, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from pydantic import TypeAdapter
+from sqlalchemy import delete, event, insert, select
+from .database import RoutingSession, db
+from .models import Poem, PoemRevision
+from .schemas import PoemAtRevisionResponse, PoemRevisionPageResponse
+
+
+logger = logging.getLogger(__name__)
+
+REVISION_MAX_REPLAY = 100
+REVISION_PAGE_SIZE = 20
+REVISION_MAX_PAGE_SIZE = 100
+
+# The poem fields a revision records
+_POEM_FIELDS = ('title', 'poem_type_id', 'is_published')
+
+revision_page_adapter = TypeAdapter(PoemRevisionPageResponse)
+poem_at_revision_adapter = TypeAdapter(PoemAtRevisionResponse)
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def _max_replay():
+    if has_app_context():
+        return max(1, current_app.config.get('REVISION_MAX_REPLAY', REVISION_MAX_REPLAY))
+    return REVISION_MAX_REPLAY
+
+
+def _editor_id():
+    # The poet behind the change, when it comes from an authenticated request
+    if not has_request_context():
+        return None
+    try:
+        return (get_jwt_identity() or {}).get('poet_id')
+    except RuntimeError:
+        return None
+
+
+def poem_state(poem):
+    """
+    The recorded state of a loaded poem: the snapshot data of its current attributes
+    and lines, read from memory.
+    """
+    return {
+        'title': poem.title,
+        'poem_type_id': poem.poem_type_id,
+        'is_published': bool(poem.is_published),
+        'lines': [[detail.id, detail.poet_id, detail.content] for detail in poem.poem_details],
+    }
+
+
+def _diff(old, new):
+    """
+    The delta that turns state `old` into state `new`, empty when they are the same.
+    """
+    delta = {name: new[name] for name in _POEM_FIELDS if new[name] != old[name]}
+    old_lines = {line_id: content for line_id, _, content in old['lines']}
+    new_ids = {line_id for line_id, _, _ in new['lines']}
+    added = [line for line in new['lines'] if line[0] not in old_lines]
+    changed = [[line_id, content] for line_id, _, content in new['lines']
+               if line_id in old_lines and old_lines[line_id] != content]
+    removed = [line_id for line_id in old_lines if line_id not in new_ids]
+    for name, value in (('added', added), ('changed', changed), ('removed', removed)):
+        if value:
+            delta[name] = value
+    return delta
+
+
+def _replay(rows):
+    state = json.loads(rows[0].data)
+    for row in rows[1:]:
+        _apply(state, json.loads(row.data))
+    return state
+
+
+def _snapshot_row(poem_id, number, data, poet_id, now):
+    encoded = _dumps(data)
+    return {
+        'poem_id': poem_id, 'number': number, 'kind': 'snapshot', 'base': number, 'data': encoded,
+        'snapshot_bytes': len(encoded), 'delta_bytes': 0, 'poet_id': poet_id, 'created_at': now,
+    }
+
+
+def record_edit(poem, before):
+    """
+    Append the revision of an edit of `poem`: `before` is poem_state() from before the
+    edit, the poem's attributes and lines hold the edited state.
+
+    Call it after the flush that bumped the poem's version. That UPDATE holds the poem's
+    row until the commit, so concurrent edits of one poem (the losers get a 412 anyway)
+    number their revisions one after the other.
+    """
+    conn = db.session.connection()
+    revisions = PoemRevision.__table__
+    latest = conn.execute(
+        select(revisions.c.number, revisions.c.base, revisions.c.snapshot_bytes, revisions.c.delta_bytes)
+        .where(revisions.c.poem_id == poem.id)
+        .order_by(revisions.c.number.desc())
+        .limit(1)
+    ).first()
+
+    now = datetime.now(timezone.utc)
+    after = poem_state(poem)
+    rows = []
+    if latest is None:
+        # The poem as it was before its first edit
+        rows.append(_snapshot_row(poem.id, 1, before, None, now))
+        previous, number, base = before, 1, 1
+        snapshot_bytes, delta_bytes = rows[0]['snapshot_bytes'], 0
+    else:
+        previous = _replay(conn.execute(
+            select(revisions.c.data)
+            .where(revisions.c.poem_id == poem.id, revisions.c.number.between(latest.base, latest.number))
+            .order_by(revisions.c.number)
+        ).all())
+        number, base = latest.number, latest.base
+        snapshot_bytes, delta_bytes = latest.snapshot_bytes, latest.delta_bytes
+
+    delta = _diff(previous, after)
+    if delta:
+        number += 1
+        poet_id = _editor_id()
+        if number - base >= _max_replay():
+            rows.append(_snapshot_row(poem.id, number, after, poet_id, now))
+        else:
+            encoded = _dumps(delta)
+            rows.append({
+                'poem_id': poem.id, 'number': number, 'kind': 'delta', 'base': base, 'data': encoded,
+                'snapshot_bytes': snapshot_bytes, 'delta_bytes': delta_bytes + len(encoded),
+                'poet_id': poet_id, 'created_at': now,
+            })
+    if rows:
+        conn.execute(insert(revisions), rows)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def forget_deleted_poems(session, flush_context):
+    """
+    Drop the history of deleted poems. ON DELETE CASCADE does the same where foreign keys
+    are enforced.
+    """
+    poem_ids = [obj.id for obj in session.deleted if isinstance(obj, Poem)]
+    if poem_ids:
+        revisions = PoemRevision.__table__
+        session.connection().execute(delete(revisions).where(revisions.c.poem_id.in_(poem_ids)))
+
+
+def _apply(state, delta):
+    for name in _POEM_FIELDS:
+        if name in delta:
+            state[name] = delta[name]
+    removed = set(delta.get('removed', ()))
+    changed = dict(delta.get('changed', ()))
+    lines = []
+    for line_id, poet_id, content in state['lines']:
+        if line_id not in removed:
+            lines.append([line_id, poet_id, changed.get(line_id, content)])
+    lines.extend(delta.get('added', ()))
+    state['lines'] = lines
+
+
+def poem_at_revision(poem_id, number=None, at=None):
+    """
+    The poem as it was at revision `number`, or at the time `at` (the newest revision
+    made until then), as JSON bytes. None when there is no such revision.
+    """
+    revisions = PoemRevision.__table__
+    target = select(revisions.c.number, revisions.c.base).where(revisions.c.poem_id == poem_id)
+    if number is not None:
+        target = target.where(revisions.c.number == number)
+    if at is not None:
+        target = target.where(revisions.c.created_at <= at)
+    target = db.session.execute(target.order_by(revisions.c.number.desc()).limit(1)).first()
+    if target is None:
+        return None
+
+    rows = db.session.execute(
+        select(revisions.c.number, revisions.c.kind, revisions.c.data, revisions.c.poet_id, revisions.c.created_at)
+        .where(revisions.c.poem_id == poem_id, revisions.c.number.between(target.base, target.number))
+        .order_by(revisions.c.number)
+    ).all()
+    state = _replay(rows)
+
+    last = rows[-1]
+    return poem_at_revision_adapter.dump_json(poem_at_revision_adapter.validate_python({
+        'poem_id': poem_id,
+        'revision': last.number,
+        'poet_id': last.poet_id,
+        'created_at': last.created_at,
+        'replayed': len(rows) - 1,
+        'title': state['title'],
+        'poem_type_id': state['poem_type_id'],
+        'is_published': state['is_published'],
+        'details': [{'id': line_id, 'poet_id': poet_id, 'content': content}
+                    for line_id, poet_id, content in state['lines']],
+    }))
+
+
+def _summary(kind, data):
+    if kind == 'snapshot':
+        return {'lines': len(data['lines'])}
+    summary = {name: len(data[name]) for name in ('added', 'changed', 'removed') if name in data}
+    summary.update({name: data[name] for name in _POEM_FIELDS if name in data})
+    return summary
+
+
+def revision_page(poem_id, before=None, limit=REVISION_PAGE_SIZE):
+    """
+    One page of a poem's revisions, newest first, each with a summary of what changed,
+    as JSON bytes. `before` is the revision number to continue below (`next_before`).
+    """
+    revisions = PoemRevision.__table__
+    query = (
+        select(revisions.c.number, revisions.c.kind, revisions.c.data, revisions.c.poet_id, revisions.c.created_at)
+        .where(revisions.c.poem_id == poem_id)
+        .order_by(revisions.c.number.desc())
+        .limit(limit + 1)
+    )
+    if before is not None:
+        query = query.where(revisions.c.number < before)
+    rows = db.session.execute(query).all()
+
+    page = [{
+        'revision': row.number,
+        'kind': row.kind,
+        'poet_id': row.poet_id,
+        'created_at': row.created_at,
+        'changes': _summary(row.kind, json.loads(row.data)),
+    } for row in rows[:limit]]
+    next_before = rows[limit - 1].number if len(rows) > limit else None
+    return revision_page_adapter.dump_json(revision_page_adapter.validate_python(
+        {'poem_id': poem_id, 'revisions': page, 'next_before': next_before}
+    ))
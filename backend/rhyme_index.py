@@ -0,0 +1,140 @@
+"""
+Rhyme suggestions: "words that rhyme with X and have N syllables" (GET /suggest/rhymes).
+
+The bundled lexicon (see rhymes.load_lexicon) is turned into an inverted index from
+rhyme key to words, bucketed by syllable count, held in a few flat arrays instead of
+thousands of small Python objects:
+
+    _words      every word, UTF-8, back to back in one bytes object
+    _offsets    array('I'): where word i starts in _words (plus an end sentinel)
+    _postings   array('I'): word ids ordered by (rhyme key, syllables, word id)
+    _starts     array('I'): where each (rhyme key, syllables) bucket starts in _postings
+    _syllables  array('B'): the syllable count of each bucket
+    _keys       {rhyme key: (first bucket, end bucket)}
+
+Word ids are lexicon positions, which are frequency ranks, so every bucket lists the
+most common words first. A lookup is one dict probe plus array slicing.
+
+The index is built once, in create_app. Under `gunicorn --preload` that happens in the
+master and the arrays are inherited by every worker; reading them never writes to their
+buffers, so the pages stay shared copy-on-write instead of being copied per worker.
+"""
+
+import logging
+import time
+from array import array
+from itertools import chain, islice
+from .rhymes import _WORD, load_lexicon, word_rhyme
+
+
+logger = logging.getLogger(__name__)
+
+SUGGESTION_LIMIT = 20
+SUGGESTION_MAX_LIMIT = 100
+
+
+class RhymeIndex:
+    """
+    Read-only inverted index from rhyme key to words, bucketed by syllable count.
+    """
+
+    def __init__(self, lexicon):
+        started = time.perf_counter()
+        words = list(lexicon)
+        encoded = [word.encode('utf-8') for word in words]
+
+        self._offsets = array('I', [0])
+        for word in encoded:
+            self._offsets.append(self._offsets[-1] + len(word))
+        self._words = b''.join(encoded)
+
+        order = sorted(range(len(words)), key=lambda word_id: (*lexicon[words[word_id]], word_id))
+        self._postings = array('I', order)
+        self._starts = array('I')
+        self._syllables = array('B')
+        bucket_keys = []
+        previous = None
+        for position, word_id in enumerate(order):
+            bucket = lexicon[words[word_id]]
+            if bucket != previous:
+                self._starts.append(position)
+                self._syllables.append(min(bucket[1], 255))
+                bucket_keys.append(bucket[0])
+                previous = bucket
+        self._starts.append(len(order))
+
+        # Buckets of one rhyme key are adjacent
+        self._keys = {}
+        for bucket, key in enumerate(bucket_keys):
+            first, _ = self._keys.get(key, (bucket, bucket))
+            self._keys[key] = (first, bucket + 1)
+
+        self.build_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def word(self, word_id):
+        return self._words[self._offsets[word_id]:self._offsets[word_id + 1]].decode('utf-8')
+
+    def lookup(self, key, syllables=None, exclude=None, limit=SUGGESTION_LIMIT):
+        """
+        Up to `limit` words with this rhyme key (and syllable count), most frequent first.
+        """
+        first, end = self._keys.get(key, (0, 0))
+        # Buckets are ordered by word id, i.e. by frequency: the first limit + 1 ids of each
+        # are enough to find the overall most frequent ones, even with `exclude` among them
+        word_ids = sorted(chain.from_iterable(
+            self._postings[self._starts[bucket]:min(self._starts[bucket + 1], self._starts[bucket] + limit + 1)]
+            for bucket in range(first, end)
+            if syllables is None or self._syllables[bucket] == syllables
+        ))
+        return list(islice((word for word in map(self.word, word_ids) if word != exclude), limit))
+
+    def stats(self):
+        return {
+            'words': len(self),
+            'rhyme_keys': len(self._keys),
+            'buckets': len(self._syllables),
+            'array_bytes': (
+                len(self._words)
+                + sum(len(a) * a.itemsize for a in (self._offsets, self._postings, self._starts, self._syllables))
+            ),
+            'build_ms': self.build_ms,
+        }
+
+
+_index = None
+
+
+def rhyme_index():
+    """
+    The process's index, built on first use if create_app has not built it yet.
+    """
+    global _index
+    if _index is None:
+        _index = RhymeIndex(load_lexicon())
+        logger.info('Rhyme index built: %s 🎶', _index.stats())
+    return _index
+
+
+def suggest_rhymes(word, syllables=None, limit=SUGGESTION_LIMIT):
+    """
+    Words rhyming with `word`, optionally with exactly `syllables` syllables.
+    Raises ValueError for anything that is not a single word.
+    """
+    words = _WORD.findall((word or '').lower())
+    if len(words) != 1:
+        raise ValueError('Please provide a single word to rhyme with.')
+    if syllables is not None and syllables < 1:
+        raise ValueError('syllables must be a positive number.')
+
+    word = words[0]
+    key, word_syllables = word_rhyme(word)
+    return {
+        'word': word,
+        'rhyme_key': key,
+        'word_syllables': word_syllables,
+        'syllables': syllables,
+        'suggestions': rhyme_index().lookup(key, syllables, exclude=word, limit=limit),
+    }
@@ -0,0 +1,324 @@
+"""
+Local rhyme engine: phonetic rhyme keys for words and lines, and rhyme-scheme checks.
+
+A word's rhyme key is its pronunciation from the last stressed vowel to the end, in
+ARPAbet without stress marks ('love' -> 'AH V', 'nation' -> 'EY SH AH N'); two words
+rhyme when their keys are equal. Keys come from the bundled lexicon
+(lexicon/rhymes.tsv.gz, ~35k common words, see lexicon/build_lexicon.py). Words it does
+not know are derived from a known stem ('lovers' -> 'lover' + Z), or else from spelling
+rules that approximate the sound of the last syllable.
+
+Every line's end-rhyme key is stored in poem_details.rhyme_key when the line is saved
+(a before_flush listener), so checking a new line against a scheme such as 'AABBA'
+compares stored keys and never calls out to anything.
+"""
+
+import gzip
+import logging
+import os
+import re
+from functools import lru_cache
+from sqlalchemy import event, inspect
+from .database import RoutingSession
+from .models import PoemDetails
+
+
+logger = logging.getLogger(__name__)
+
+LEXICON_PATH = os.path.join(os.path.dirname(__file__), 'lexicon', 'rhymes.tsv.gz')
+
+_WORD = re.compile(r"[a-z]+(?:'[a-z]+)?")
+_VOWEL_PHONEMES = {'AA', 'AE', 'AH', 'AO', 'AW', 'AY', 'EH', 'ER', 'EY', 'IH', 'IY', 'OW', 'OY', 'UH', 'UW'}
+_VOICELESS = {'P', 'T', 'K', 'F', 'TH'}
+_SIBILANTS = {'S', 'Z', 'SH', 'ZH', 'CH', 'JH'}
+
+
+def rhyme_key_from_phonemes(phonemes):
+    """
+    ARPAbet phonemes with stress digits (CMU style) -> (rhyme key, syllables).
+    The key starts at the last primary-stressed vowel, or the last stressed or any vowel.
+    """
+    vowels = [i for i, phoneme in enumerate(phonemes) if phoneme[-1].isdigit()]
+    if not vowels:
+        return ' '.join(phonemes), 0
+    start = vowels[-1]
+    for stress in ('1', '2'):
+        stressed = [i for i in vowels if phonemes[i].endswith(stress)]
+        if stressed:
+            start = stressed[-1]
+            break
+    return ' '.join(phoneme.rstrip('012') for phoneme in phonemes[start:]), len(vowels)
+
+
+@lru_cache(maxsize=1)
+def load_lexicon():
+    """
+    {word: (rhyme key, syllables)} from the bundled lexicon, most frequent word first,
+    read once per process.
+    """
+    lexicon = {}
+    with gzip.open(LEXICON_PATH, 'rt', encoding='utf-8') as f:
+        for line in f:
+            word, key, syllables = line.rstrip('\n').split('\t')
+            lexicon[word] = (key, int(syllables))
+    logger.debug("Rhyme lexicon loaded: %s words", len(lexicon))
+    return lexicon
+
+
+# Spelling rules for words outside the lexicon. Each rule is (spelling, phonemes, is_vowel);
+# at every position the longest matching spelling wins.
+_SPELLING_RULES = [
+    ('ire', ['AY', 'ER'], True), ('are', ['EH', 'R'], True), ('ore', ['AO', 'R'], True), ('ure', ['UH', 'R'], True),
+    ('ies', ['IY', 'Z'], True), ('ind', ['AY', 'N', 'D'], True), ('ild', ['AY', 'L', 'D'], True),
+    ('old', ['OW', 'L', 'D'], True), ('ey', ['IY'], True),
+    ('ition', ['IH', 'SH', 'AH', 'N'], True), ('ision', ['IH', 'ZH', 'AH', 'N'], True),
+    ('ear', ['IH', 'R'], True), ('eer', ['IH', 'R'], True), ('air', ['EH', 'R'], True), ('our', ['AW', 'ER'], True),
+    ('all', ['AO', 'L'], True), ('alk', ['AO', 'K'], True),
+    ('eigh', ['EY'], True), ('augh', ['AO'], True), ('ough', ['AO'], True), ('igh', ['AY'], True),
+    ('tion', ['SH', 'AH', 'N'], True), ('sion', ['ZH', 'AH', 'N'], True), ('cian', ['SH', 'AH', 'N'], True),
+    ('ture', ['CH', 'ER'], True), ('sure', ['ZH', 'ER'], True), ('ious', ['IY', 'AH', 'S'], True),
+    ('eous', ['IY', 'AH', 'S'], True), ('ous', ['AH', 'S'], True), ('eau', ['OW'], True),
+    ('ee', ['IY'], True), ('ea', ['IY'], True), ('ai', ['EY'], True), ('ay', ['EY'], True),
+    ('ei', ['IY'], True), ('oa', ['OW'], True), ('oe', ['OW'], True), ('oo', ['UW'], True),
+    ('ou', ['AW'], True), ('oi', ['OY'], True), ('oy', ['OY'], True), ('au', ['AO'], True),
+    ('aw', ['AO'], True), ('ow', ['OW'], True), ('ew', ['UW'], True), ('ue', ['UW'], True), ('ui', ['UW'], True),
+    ('tch', ['CH'], False), ('dge', ['JH'], False), ('ch', ['CH'], False), ('sh', ['SH'], False),
+    ('th', ['TH'], False), ('ph', ['F'], False), ('wh', ['W'], False), ('wr', ['R'], False),
+    ('kn', ['N'], False), ('ck', ['K'], False), ('nk', ['NG', 'K'], False), ('ng', ['NG'], False), ('qu', ['K', 'W'], False),
+    ('gh', [], False), ('x', ['K', 'S'], False),
+]
+_CONSONANT_SOUNDS = {
+    'b': 'B', 'c': 'K', 'd': 'D', 'f': 'F', 'g': 'G', 'h': 'HH', 'j': 'JH', 'k': 'K', 'l': 'L',
+    'm': 'M', 'n': 'N', 'p': 'P', 'q': 'K', 'r': 'R', 's': 'S', 't': 'T', 'v': 'V', 'w': 'W', 'z': 'Z',
+}
+_LONG_VOWELS = {'a': 'EY', 'e': 'IY', 'i': 'AY', 'o': 'OW', 'u': 'UW', 'y': 'AY'}
+_SHORT_VOWELS = {'a': 'AE', 'e': 'EH', 'i': 'IH', 'o': 'AA', 'u': 'AH', 'y': 'IH'}
+_R_VOWELS = {'a': ['AA', 'R'], 'o': ['AO', 'R'], 'e': ['ER'], 'i': ['ER'], 'u': ['ER'], 'y': ['ER']}
+# Only matched at the end of a word
+_FINAL_SPELLINGS = {'ire', 'are', 'ore', 'ure', 'ies', 'ind', 'ild', 'old', 'ey'}
+# After a vowel and one consonant, these keep the vowel long: 'make', 'makes', 'making', 'later'
+_LONG_VOWEL_ENDINGS = re.compile(r'^([^aeiouyx](e|es|ed|er|ers|ing|ings|ely|ement|ements|eness)$|[tsc]ions?$)')
+_REDUCED = {'AE': 'AH', 'EH': 'AH', 'AA': 'AH', 'AO': 'AH', 'UH': 'AH'}
+_VOICED_ENDINGS = _VOWEL_PHONEMES | {'B', 'D', 'G', 'V', 'DH', 'M', 'N', 'NG', 'L', 'R', 'JH'}
+# Endings that leave the stress of the word they are added to, endings that pull it onto
+# the syllable just before them, and endings that take it themselves
+_NEUTRAL_ENDINGS = ('ings', 'ing', 'ers', 'er', 'ed', 'es', 's', 'ly', 'ness', 'less', 'ful', 'est', 'ments', 'ment')
+_PRE_STRESS_ENDINGS = ('ical', 'ity', 'ic', 'ian', 'ial', 'ious', 'eous', 'tion', 'sion', 'ia')
+_STRONG_ENDINGS = ('ee', 'eer', 'oo', 'oon', 'ese', 'ette', 'ique', 'ade')
+_UNSTRESSED_PREFIXES = ('a', 'ac', 'ad', 'ap', 'at', 'be', 'com', 'con', 'de', 'dis', 'em', 'en', 'ex', 'for',
+                        'im', 'mis', 'pre', 'pro', 're', 'un')
+
+
+def _is_vowel(word, i):
+    letter = word[i]
+    if letter in 'aeiou':
+        return True
+    # y is a vowel unless it starts a syllable ('yes', 'beyond')
+    return letter == 'y' and i > 0 and not (i + 1 < len(word) and word[i + 1] in 'aeiou')
+
+
+def _spell(word):
+    """
+    Approximate a word's sounds from its spelling: a list of (phonemes, is_vowel) tokens.
+    """
+    tokens, i = [], 0
+    silent_e = len(word) > 2 and word.endswith('e') and not _is_vowel(word, len(word) - 2)
+    # 'loved', 'tunes': the e is silent unless it separates t/d or a hissing sound from the ending
+    silent_e_before = None
+    if len(word) > 3 and word[-2:] in ('ed', 'es') and not _is_vowel(word, len(word) - 3):
+        hissing = word[-3] in 'sxzc' or word[-4:-2] in ('ch', 'sh') or word[-3] == 'g'
+        if not (word.endswith('ed') and word[-3] in 'td') and not (word.endswith('es') and hissing):
+            silent_e_before = len(word) - 2
+    while i < len(word):
+        if silent_e and i == len(word) - 1:
+            if word[-2] == 'l' and not _is_vowel(word, len(word) - 3):
+                tokens.insert(len(tokens) - 1, (['AH'], True))     # 'tumble', 'jostle'
+            break
+        if i == silent_e_before:
+            i += 1
+            continue
+        for spelling, phonemes, is_vowel in _SPELLING_RULES:
+            if word.startswith(spelling, i) and (spelling not in _FINAL_SPELLINGS or i + len(spelling) == len(word)):
+                tokens.append((phonemes, is_vowel))
+                i += len(spelling)
+                break
+        else:
+            letter = word[i]
+            if _is_vowel(word, i):
+                rest = word[i + 1:]
+                if rest[:1] == 'r' and not (len(rest) > 1 and rest[1] in 'aeiouy'):
+                    tokens.append((_R_VOWELS[letter], True))
+                    i += 2
+                    continue
+                if not rest:
+                    # Open final vowel: 'go', 'hi', 'sky' / 'happy'
+                    single = not any(is_vowel for _, is_vowel in tokens)
+                    phoneme = {'a': 'AH', 'e': 'IY', 'i': 'IY', 'o': 'OW', 'u': 'UW'}.get(letter)
+                    phoneme = phoneme or ('AY' if single else 'IY')
+                elif _LONG_VOWEL_ENDINGS.match(rest):
+                    phoneme = _LONG_VOWELS[letter]     # Silent e: 'make', 'rose', 'later'
+                else:
+                    phoneme = _SHORT_VOWELS[letter]
+                tokens.append(([phoneme], True))
+            elif letter in _CONSONANT_SOUNDS:
+                phoneme = _CONSONANT_SOUNDS[letter]
+                following = word[i + 1:i + 2]
+                if letter == 'c' and following in ('e', 'i', 'y'):
+                    phoneme = 'S'
+                elif letter == 'g' and following in ('e', 'i', 'y') and i + 1 < len(word) - 1:
+                    phoneme = 'JH'
+                elif letter == 'g' and following == 'e' and silent_e:
+                    phoneme = 'JH'     # 'cage'
+                elif letter == 's' and 0 < i < len(word) - 1 and _is_vowel(word, i - 1) and _is_vowel(word, i + 1):
+                    phoneme = 'Z'      # 'rose', 'music'
+                if not (tokens and tokens[-1] == ([phoneme], False)):     # Doubled letters: 'll', 'ss'
+                    tokens.append(([phoneme], False))
+            i += 1
+    # A final s after a voiced sound is a z ('dreams', 'slippers', 'goes'), but not after a
+    # single short vowel ('bus', 'this')
+    if len(tokens) > 1 and word.endswith('s') and not word.endswith('ss') and tokens[-1] == (['S'], False):
+        short_vowel = word[-2] in 'aiou' and not _is_vowel(word, len(word) - 3)
+        if tokens[-2][0] and tokens[-2][0][-1] in _VOICED_ENDINGS and not short_vowel:
+            tokens[-1] = (['Z'], False)
+    return tokens
+
+
+def _vowel_count(word):
+    return sum(1 for _, is_vowel in _spell(word) if is_vowel)
+
+
+def _stressed_vowel(word, count):
+    """
+    Guess which of a word's `count` vowel sounds carries the main stress.
+    """
+    if count <= 1:
+        return 0
+    for ending in _PRE_STRESS_ENDINGS:
+        if word.endswith(ending) and len(word) > len(ending) + 1:
+            return max(0, count - 1 - _vowel_count(ending))
+    for ending in _NEUTRAL_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 3:
+            base = word[:-len(ending)]
+            base_count = _vowel_count(base)
+            if 0 < base_count <= count:
+                return _stressed_vowel(base, base_count)
+    if word.endswith(_STRONG_ENDINGS):
+        return count - 1
+    if count <= 3 and word.startswith(_UNSTRESSED_PREFIXES) and len(word) > 4:
+        return 1
+    return 0 if count == 2 else max(0, count - 3)
+
+
+def _spelled_rime(word):
+    """
+    Rhyme key phonemes for a word outside the lexicon, from its spelling.
+    """
+    tokens = _spell(word)
+    vowel_positions = [i for i, (_, is_vowel) in enumerate(tokens) if is_vowel]
+    if not vowel_positions:
+        return [phoneme for phonemes, _ in tokens for phoneme in phonemes]
+    start = vowel_positions[_stressed_vowel(word, len(vowel_positions))]
+    phonemes = []
+    for i, (sounds, is_vowel) in enumerate(tokens[start:], start=start):
+        if is_vowel and i != start:
+            # Unstressed vowels after the stress are mostly reduced ('-on', '-el')
+            sounds = [_REDUCED.get(sound, sound) for sound in sounds]
+        phonemes.extend(sound for sound in sounds if sound != 'HH')
+    return phonemes
+
+
+def _with_suffix(word, lexicon):
+    """
+    Key of an inflected word whose stem is in the lexicon ('dreams', 'dreamed', 'dreaming').
+    """
+    def stem_key(stem):
+        doubled = len(stem) > 2 and stem[-1] == stem[-2]
+        for candidate in (stem, stem + 'e', stem[:-1] if doubled or stem.endswith('e') else None):
+            if candidate and candidate in lexicon:
+                return lexicon[candidate]
+        return None
+
+    for suffix in ("'s", 's', 'es', 'ed', 'ing', 'er', 'ly'):
+        if not word.endswith(suffix) or len(word) - len(suffix) < 2:
+            continue
+        found = stem_key(word[:-len(suffix)])
+        if found is None:
+            continue
+        key, syllables = found
+        last = key.split()[-1]
+        if suffix in ("'s", 's', 'es'):
+            extra = ['IH', 'Z'] if last in _SIBILANTS else ['S'] if last in _VOICELESS else ['Z']
+        elif suffix == 'ed':
+            extra = ['IH', 'D'] if last in ('T', 'D') else ['T'] if last in _VOICELESS | {'S', 'SH', 'CH'} else ['D']
+        else:
+            extra = {'ing': ['IH', 'NG'], 'er': ['ER'], 'ly': ['L', 'IY']}[suffix]
+        return ' '.join([key] + extra), syllables + sum(1 for phoneme in extra if phoneme in _VOWEL_PHONEMES)
+    return None
+
+
+@lru_cache(maxsize=65536)
+def word_rhyme(word):
+    """
+    (rhyme key, syllables) of a single word, or None when it has no letters.
+    """
+    word = word.lower().strip("'")
+    if not word:
+        return None
+    lexicon = load_lexicon()
+    if word in lexicon:
+        return lexicon[word]
+    found = _with_suffix(word, lexicon)
+    if found:
+        return found
+
+    from .poem_utils import count_syllables
+    return ' '.join(_spelled_rime(word.replace("'", ''))), max(1, count_syllables(word))
+
+
+def word_rhyme_key(word):
+    found = word_rhyme(word)
+    return found[0] if found else None
+
+
+def line_rhyme_key(line):
+    """
+    The rhyme key of a line's last word, or None for a line without words.
+    """
+    words = _WORD.findall((line or '').lower())
+    return word_rhyme_key(words[-1]) if words else None
+
+
+def rhyme_scheme_error(scheme, previous_keys, new_key):
+    """
+    Check the next line of a poem against a rhyme scheme such as 'ABAB' or 'AABBA'.
+
+    previous_keys are the rhyme keys of the poem's lines so far, in order. The new line
+    must rhyme with the earlier lines carrying the same letter in its stanza (the scheme
+    repeats for poems longer than it); 'X' marks an unrhymed line. Returns None when the
+    line fits, otherwise the 1-based number of the line it should rhyme with.
+    """
+    if not scheme:
+        return None
+    scheme = scheme.replace(' ', '').upper()
+    index = len(previous_keys)
+    stanza_start = index - index % len(scheme)
+    letter = scheme[index % len(scheme)]
+    if letter == 'X':
+        return None
+    for position in range(stanza_start, index):
+        if scheme[position % len(scheme)] == letter:
+            return None if previous_keys[position] == new_key else position + 1
+    return None
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def store_rhyme_keys(session, flush_context, instances):
+    """
+    Keep poem_details.rhyme_key in step with the content of new and edited lines.
+    """
+    for obj in session.new:
+        if isinstance(obj, PoemDetails):
+            obj.rhyme_key = line_rhyme_key(obj.content)
+    for obj in session.dirty:
+        if isinstance(obj, PoemDetails) and inspect(obj).attrs.content.history.has_changes():
+            obj.rhyme_key = line_rhyme_key(obj.content)
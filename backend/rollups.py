@@ -0,0 +1,297 @@
+"""
+Pre-aggregated poet statistics: daily buckets per poet and poem type (models.PoetDailyStats).
+
+Answering "contributions per poet this week" from poem_details means scanning every line
+in the range. Instead, every flush adjusts the buckets it affects, in the same transaction:
+    - new, edited and deleted lines move one contribution in or out of their bucket
+      (the day they were submitted);
+    - poems that are created, published, deleted, retyped or handed to another poet are
+      recounted: their totals are read before the flush and again after it, and the
+      difference is applied. Publications count on the day the poem was published
+      (poems.published_at).
+Days are UTC days, whatever the time zone of the database session.
+Stats and leaderboards then only read buckets. `rebuild_rollups` recomputes everything
+from history (e.g. after a bulk import, or when adding the table to an existing database).
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import Date, delete, event, func, insert, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from .database import RoutingSession, db
+from .models import Poem, PoemDetails, PoetDailyStats, Poet
+from .poet_utils import DELETED_POET_EMAIL
+
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_DAYS = 7
+LEADERBOARD_SIZE = 10
+LEADERBOARD_MAX_SIZE = 100
+
+# Changes to these attributes move a whole poem's counts between buckets
+_POEM_ATTRIBUTES = ('is_published', 'poem_type_id', 'poet_id', 'published_at')
+_LINE_ATTRIBUTES = ('poem_id', 'poet_id', 'submitted_at')
+
+
+def _new_totals():
+    # (poet_id, poem_type_id, day) -> [contributions, poems_published]
+    return defaultdict(lambda: [0, 0])
+
+
+def _as_day(value, default):
+    if not isinstance(value, datetime):
+        return value or default
+    # Naive values are UTC already (SQLite hands them back that way)
+    return (value.astimezone(timezone.utc) if value.tzinfo else value).date()
+
+
+def _utc_day(conn, column):
+    # PostgreSQL's date() of a timestamptz follows the session's TimeZone setting
+    if conn.dialect.name == 'postgresql':
+        return func.date(column.op('AT TIME ZONE')('UTC'), type_=Date)
+    return func.date(column, type_=Date)
+
+
+def _poem_totals(conn, poem_ids=None):
+    """
+    Count lines and publications per bucket, for the given poems or for the whole history.
+    """
+    poems, details = Poem.__table__, PoemDetails.__table__
+    line_day = _utc_day(conn, details.c.submitted_at)
+    poem_day = _utc_day(conn, poems.c.published_at)
+
+    lines = (
+        select(details.c.poet_id, poems.c.poem_type_id, line_day, func.count())
+        .join(poems, poems.c.id == details.c.poem_id)
+        .group_by(details.c.poet_id, poems.c.poem_type_id, line_day)
+    )
+    published = (
+        select(poems.c.poet_id, poems.c.poem_type_id, poem_day, func.count())
+        .where(poems.c.is_published == True, poems.c.published_at.isnot(None))
+        .group_by(poems.c.poet_id, poems.c.poem_type_id, poem_day)
+    )
+    if poem_ids is not None:
+        lines = lines.where(details.c.poem_id.in_(poem_ids))
+        published = published.where(poems.c.id.in_(poem_ids))
+
+    totals = _new_totals()
+    for poet_id, poem_type_id, day, count in conn.execute(lines):
+        totals[(poet_id, poem_type_id, day)][0] += count
+    for poet_id, poem_type_id, day, count in conn.execute(published):
+        totals[(poet_id, poem_type_id, day)][1] += count
+    return totals
+
+
+def _add_to_buckets(conn, deltas):
+    """
+    Add the (contributions, poems_published) deltas to their buckets, creating missing ones.
+    """
+    rows = [
+        {'poet_id': poet_id, 'poem_type_id': poem_type_id, 'day': day,
+         'contributions': contributions, 'poems_published': published}
+        for (poet_id, poem_type_id, day), (contributions, published) in deltas.items()
+        if (contributions or published) and None not in (poet_id, poem_type_id, day)
+    ]
+    if not rows:
+        return
+
+    stats = PoetDailyStats.__table__
+    dialect = {'postgresql': postgresql, 'sqlite': sqlite}.get(conn.dialect.name)
+    if dialect is not None:
+        statement = dialect.insert(stats)
+        conn.execute(statement.on_conflict_do_update(
+            index_elements=['poet_id', 'poem_type_id', 'day'],
+            set_={
+                'contributions': stats.c.contributions + statement.excluded.contributions,
+                'poems_published': stats.c.poems_published + statement.excluded.poems_published,
+            },
+        ), rows)
+        return
+
+    for row in rows:
+        result = conn.execute(
+            update(stats)
+            .where(stats.c.poet_id == row['poet_id'], stats.c.poem_type_id == row['poem_type_id'],
+                   stats.c.day == row['day'])
+            .values(contributions=stats.c.contributions + row['contributions'],
+                    poems_published=stats.c.poems_published + row['poems_published'])
+        )
+        if result.rowcount == 0:
+            conn.execute(insert(stats).values(**row))
+
+
+def rebuild_rollups():
+    """
+    Recompute every bucket from poems and poem_details.
+    """
+    with db.engine.begin() as conn:
+        conn.execute(delete(PoetDailyStats.__table__))
+        totals = _poem_totals(conn)
+        _add_to_buckets(conn, totals)
+    logger.info('Poet statistics rebuilt: %s daily buckets. 📊', len(totals))
+    return len(totals)
+
+
+def _changed(state, attributes):
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+def _previous(state, name):
+    # The value before this flush (the current one when it did not change)
+    history = state.attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else getattr(state.obj(), name)
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def collect_rollup_changes(session, flush_context, instances):
+    """
+    Before the flush, while the database still holds the old state: note the line moves
+    and read the current totals of the poems that will be recounted.
+    """
+    recount = set()
+    new_poems = []
+    for obj in session.new:
+        if isinstance(obj, Poem):
+            new_poems.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Poem) and _changed(inspect(obj), _POEM_ATTRIBUTES):
+            recount.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Poem):
+            recount.add(obj.id)
+
+    today = datetime.now(timezone.utc).date()
+    moves = []     # (sign, poet_id, poem_id, day)
+    for obj in session.new:
+        if isinstance(obj, PoemDetails):
+            poem_id = obj.poem_id if obj.poem_id is not None else getattr(obj.poem, 'id', None)
+            # Lines of new poems are counted with their poem after the flush
+            if poem_id is not None and poem_id not in recount:
+                moves.append((1, obj.poet_id, poem_id, _as_day(obj.submitted_at, today)))
+    for obj in session.dirty:
+        if isinstance(obj, PoemDetails):
+            state = inspect(obj)
+            if not _changed(state, _LINE_ATTRIBUTES):
+                continue
+            old_poem_id = _previous(state, 'poem_id')
+            if old_poem_id not in recount:
+                moves.append((-1, _previous(state, 'poet_id'), old_poem_id,
+                              _as_day(_previous(state, 'submitted_at'), today)))
+            if obj.poem_id not in recount:
+                moves.append((1, obj.poet_id, obj.poem_id, _as_day(obj.submitted_at, today)))
+    for obj in session.deleted:
+        if isinstance(obj, PoemDetails):
+            state = inspect(obj)
+            old_poem_id = _previous(state, 'poem_id')
+            if old_poem_id not in recount:
+                moves.append((-1, _previous(state, 'poet_id'), old_poem_id,
+                              _as_day(_previous(state, 'submitted_at'), today)))
+
+    if not (recount or new_poems or moves):
+        session.info.pop('rollups', None)
+        return
+
+    conn = session.connection()
+    deltas = _new_totals()
+    if moves:
+        poems = Poem.__table__
+        poem_types = dict(conn.execute(
+            select(poems.c.id, poems.c.poem_type_id).where(poems.c.id.in_({poem_id for _, _, poem_id, _ in moves}))
+        ).all())
+        for sign, poet_id, poem_id, day in moves:
+            deltas[(poet_id, poem_types.get(poem_id), day)][0] += sign
+    if recount:
+        for key, (contributions, published) in _poem_totals(conn, recount).items():
+            deltas[key][0] -= contributions
+            deltas[key][1] -= published
+
+    session.info['rollups'] = (recount, new_poems, deltas)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def apply_rollup_changes(session, flush_context):
+    """
+    After the flush: add the new totals of the recounted poems and write all deltas.
+    """
+    pending = session.info.pop('rollups', None)
+    if pending is None:
+        return
+    recount, new_poems, deltas = pending
+
+    conn = session.connection()
+    recount = recount | {poem.id for poem in new_poems}
+    if recount:
+        for key, (contributions, published) in _poem_totals(conn, recount).items():
+            deltas[key][0] += contributions
+            deltas[key][1] += published
+    _add_to_buckets(conn, deltas)
+
+
+def _since(days):
+    return datetime.now(timezone.utc).date() - timedelta(days=days - 1) if days else None
+
+
+def poet_stats(poet_id, days=None):
+    """
+    A poet's contributions and publications, in total, per poem type and per day.
+    With `days`, only the last `days` days (today included) are counted.
+    """
+    stats = PoetDailyStats.__table__
+    query = (
+        select(stats.c.day, stats.c.poem_type_id, stats.c.contributions, stats.c.poems_published)
+        .where(stats.c.poet_id == poet_id)
+        .order_by(stats.c.day)
+    )
+    since = _since(days)
+    if since:
+        query = query.where(stats.c.day >= since)
+
+    totals = {'contributions': 0, 'poems_published': 0}
+    by_type = defaultdict(lambda: {'contributions': 0, 'poems_published': 0})
+    by_day = defaultdict(lambda: {'contributions': 0, 'poems_published': 0})
+    for row in db.session.execute(query):
+        if not (row.contributions or row.poems_published):
+            continue
+        for bucket in (totals, by_type[row.poem_type_id], by_day[row.day]):
+            bucket['contributions'] += row.contributions
+            bucket['poems_published'] += row.poems_published
+
+    return {
+        'poet_id': poet_id,
+        'days': days,
+        'since': since.isoformat() if since else None,
+        **totals,
+        'by_poem_type': [{'poem_type_id': key, **value} for key, value in sorted(by_type.items())],
+        'daily': [{'day': key.isoformat(), **value} for key, value in by_day.items()],
+    }
+
+
+def leaderboard(days=LEADERBOARD_DAYS, limit=LEADERBOARD_SIZE, poem_type_id=None):
+    """
+    Poets with the most contributions over the last `days` days, then by publications.
+    The anonymous poet holding deleted accounts' lines is left out.
+    """
+    stats = PoetDailyStats.__table__
+    contributions = func.sum(stats.c.contributions).label('contributions')
+    published = func.sum(stats.c.poems_published).label('poems_published')
+    query = (
+        select(stats.c.poet_id, Poet.poet_name, contributions, published)
+        .join(Poet, Poet.id == stats.c.poet_id)
+        .where(stats.c.day >= _since(days), Poet.email != DELETED_POET_EMAIL)
+        .group_by(stats.c.poet_id, Poet.poet_name)
+        .having(contributions + published > 0)
+        .order_by(contributions.desc(), published.desc(), stats.c.poet_id)
+        .limit(limit)
+    )
+    if poem_type_id:
+        query = query.where(stats.c.poem_type_id == poem_type_id)
+
+    return [
+        {'rank': rank, 'poet_id': row.poet_id, 'poet_name': row.poet_name,
+         'contributions': row.contributions, 'poems_published': row.poems_published}
+        for rank, row in enumerate(db.session.execute(query), start=1)
+    ]
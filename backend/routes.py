@@ -1,11 +1,14 @@
 from datetime import datetime, timezone
-from flask import Blueprint, json, jsonify, request
+from flask import Blueprint, Response, json, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.exc import StaleDataError
 from .models import Poem, PoemDetails, PoemType, Poet
-from .database import db
+from .database import db, read_from_primary
 from .schemas import (
+    DraftAnnotate,
     PoemCreate, 
     PoemTypeResponse, 
     PoemResponse, 
@@ -19,13 +22,36 @@ from .submit_poem_details import (
     is_authorized_poet
 )
 from .poem_utils import get_poem_by_id, get_poem_by_title
-from .poet_utils import fetch_poet, get_all_poets_query, get_current_poet, get_or_create_deleted_poet
+from .drafts import annotate_draft, poem_type_criteria
+from .export_utils import iter_ndjson
+from .asgi import ai_bound
+from .idempotency import idempotent
+from .lifecycle import readiness
+from .rate_limit import rate_limit
+from .activity import ACTIVITY_MAX_PAGE_SIZE, ACTIVITY_PAGE_SIZE, feed
+from .lobby import LOBBY_MAX_PAGE_SIZE, LOBBY_PAGE_SIZE, lobby_page
+from .poet_index import AUTOCOMPLETE_LIMIT, AUTOCOMPLETE_MAX_LIMIT, autocomplete_poets
+from .published import freeze_poem, frozen_poem_json
+from .revisions import (
+    REVISION_MAX_PAGE_SIZE, REVISION_PAGE_SIZE, poem_at_revision, poem_state, record_edit, revision_page,
+)
+from .rhyme_index import SUGGESTION_LIMIT, SUGGESTION_MAX_LIMIT, suggest_rhymes
+from .rollups import LEADERBOARD_DAYS, LEADERBOARD_MAX_SIZE, LEADERBOARD_SIZE, leaderboard, poet_stats
+from .serializers import json_response, poem_page_to_json, poem_to_json
+from .poet_utils import (
+    PROFILE_MAX_RECENT,
+    PROFILE_RECENT,
+    fetch_poet,
+    get_all_poets_query,
+    get_current_poet,
+    get_or_create_deleted_poet,
+    poet_profile,
+)
 import logging
 from flask_jwt_extended.exceptions import JWTDecodeError
 
 
-# Configure logging
-logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
 
 routes = Blueprint('routes', __name__)
 
@@ -41,6 +67,16 @@ def home():
     return jsonify(message=f'You are (almost) welcomed here, dear poet(esse) {poet.poet_name} with ID {poet.id}. 🍸'), 200
 
 
+@routes.route('/readyz', methods=['GET'])
+def readyz():
+    """
+    Readiness of this worker: 200 once its warmup (connection pools, caches, AI client)
+    has finished, 503 until then.
+    """
+    ready, details = readiness()
+    return jsonify(details), 200 if ready else 503
+
+
 @routes.route('/poet/me', methods=['GET'])
 @jwt_required()
 def get_poet():
@@ -48,7 +84,7 @@ def get_poet():
     Retrieves the profile of the logged-in poet(esse).
     """
     current_poet = get_current_poet()
-    print(f"DEBUG: Retrieved JWT Identity in /poet route -> {current_poet}")
+    logger.debug("Retrieved JWT identity in /poet route -> %s", current_poet)
     
     if not current_poet:
             return jsonify({'error': 'Poet not found'}), 404
@@ -75,15 +111,42 @@ def get_poet_by_id(poet_id):
         return jsonify(poet_response.model_dump(exclude={"password_hash"})), 200
     
     except Exception as e:
-        print(f"ERROR: {str(e)}")
+        logger.error('Error fetching poet: %s', e)
         return jsonify({'error': str(e)}), 500
     
 
+@routes.route('/poet/<int:poet_id>/profile', methods=['GET'])
+@jwt_required()
+def get_poet_profile(poet_id):
+    """
+    A poet's profile page in one call: the poet, their counts (poems, published and
+    collaborative poems, contributions, collaborations) and their most recent poems and
+    contributions, read in a single query. Other poets only see published and
+    collaborative poems.
+
+    Query parameters:
+        limit: recent poems and contributions to include (default 5, at most 20).
+    """
+    limit = min(max(request.args.get('limit', type=int, default=PROFILE_RECENT), 1), PROFILE_MAX_RECENT)
+    try:
+        viewer_id = (get_jwt_identity() or {}).get('poet_id')
+        body = poet_profile(poet_id, viewer_id=viewer_id, limit=limit)
+        if body is None:
+            return jsonify({'error': 'Poet not found'}), 404
+        return json_response(body)
+
+    except Exception as e:
+        logger.error('Error fetching profile of poet %s: %s', poet_id, e)
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
+
+
 @routes.route('/poet/<identifier>', methods=['GET'])
 @jwt_required()
 def get_poet_by_identifier(identifier):
     """
     Retrieves information of a specific poet by poet_id or poet_name.
+    A name resolves to the best autocomplete match: the poet with exactly that name
+    (in any case), else the shortest name starting with it.
     """
     try:
         # Check if identifier is an integer
@@ -91,8 +154,9 @@ def get_poet_by_identifier(identifier):
             # Fetch by ID
             poet = Poet.query.filter(Poet.id == int(identifier)).first()
         else:
-            # Fetch by name (case-insensitive)
-            poet = Poet.query.filter(Poet.poet_name.ilike(f"%{identifier}%")).first()
+            # Fetch by name (case-insensitive), from the poet name index
+            matches = autocomplete_poets(identifier, limit=1)
+            poet = fetch_poet(matches[0]['id']) if matches else None
 
         if not poet:
             return jsonify({'error': 'Poet not found'}), 404
@@ -102,10 +166,35 @@ def get_poet_by_identifier(identifier):
         return jsonify(poet_response.model_dump(exclude={"password_hash"})), 200
 
     except Exception as e:
-        print(f"ERROR: {str(e)}")
+        logger.error('Error fetching poet: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
+@routes.route('/poets/autocomplete', methods=['GET'])
+@jwt_required()
+def get_poet_autocomplete():
+    """
+    Poets whose name starts with `prefix` (any case), for search-as-you-type: the exact
+    name first, then shorter names before longer ones, then alphabetically. Served from
+    the worker's in-memory poet name index.
+
+    Query parameters:
+        prefix: the start of the name.
+        limit: poets to return (default 10, at most 50).
+    """
+    prefix = request.args.get('prefix', '').strip()
+    if not prefix:
+        return jsonify({'error': 'Please type the start of a poet(esse) name in ?prefix=. 🔎'}), 400
+    limit = min(max(request.args.get('limit', type=int, default=AUTOCOMPLETE_LIMIT), 1), AUTOCOMPLETE_MAX_LIMIT)
+
+    try:
+        return jsonify({'prefix': prefix, 'poets': autocomplete_poets(prefix, limit=limit)}), 200
+
+    except Exception as e:
+        logger.error("Error autocompleting poet names for '%s': %s", prefix, e)
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
+
+
 @routes.route('/all-poets', methods=['GET'])
 @jwt_required()
 def get_poets():
@@ -140,7 +229,52 @@ def get_poets():
         return jsonify(response_data), 200
 
     except Exception as e:
-        logging.error(f"Error fetching poets: {str(e)}")
+        logger.error('Error fetching poets: %s', e)
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
+
+
+@routes.route('/stats/poets/<int:poet_id>', methods=['GET'])
+@jwt_required()
+def get_poet_stats(poet_id):
+    """
+    A poet's contributions and published poems, in total, per poem type and per day,
+    read from the daily rollups. `days` limits the stats to the last N days.
+    """
+    days = request.args.get('days', type=int)
+    if days is not None and days < 1:
+        return jsonify({'error': 'days must be a positive number. 📅'}), 400
+
+    try:
+        if not fetch_poet(poet_id):
+            return jsonify({'error': 'Poet not found'}), 404
+
+        return jsonify(poet_stats(poet_id, days=days)), 200
+
+    except Exception as e:
+        logger.error('Error fetching poet stats: %s', e)
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
+
+
+@routes.route('/leaderboard', methods=['GET'])
+@jwt_required()
+def get_leaderboard():
+    """
+    The poets with the most contributions over the last `days` days (default 7),
+    optionally for one poem type, read from the daily rollups.
+    """
+    days = request.args.get('days', type=int, default=LEADERBOARD_DAYS)
+    limit = min(max(request.args.get('limit', type=int, default=LEADERBOARD_SIZE), 1), LEADERBOARD_MAX_SIZE)
+    if days < 1:
+        return jsonify({'error': 'days must be a positive number. 📅'}), 400
+
+    try:
+        return jsonify({
+            'days': days,
+            'poets': leaderboard(days=days, limit=limit, poem_type_id=request.args.get('poem_type_id', type=int)),
+        }), 200
+
+    except Exception as e:
+        logger.error('Error fetching the leaderboard: %s', e)
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
 
 
@@ -185,7 +319,7 @@ def delete_poet():
 
     except Exception as e:
         db.session.rollback()
-        logging.error(f"Error deleting poet(esse): {str(e)}")
+        logger.error('Error deleting poet(esse): %s', e)
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
 
 
@@ -200,27 +334,28 @@ def fetch_poem_by_identifier(identifier):
 
     Returns:
         JSON response containing poem details if found, or an error message if not found.
+        A published poem looked up by ID is served from its frozen row as stored.
     """
     try:
         # Determine if the identifier is a digit (ID) or a string (title)
         if identifier.isdigit():
+            body = frozen_poem_json(int(identifier))
+            if body is not None:
+                return json_response(body)
             poem = get_poem_by_id(int(identifier))
         else:
             poem = get_poem_by_title(identifier)
 
         # Check if the poem was found
         if not poem:
-            logging.error(f'Poem with identifier "{identifier}" not found. 🪰')
+            logger.error('Poem with identifier "%s" not found. 🪰', identifier)
             return jsonify({'error': 'Poem not found. 🌛'}), 404
 
-        # Validate and serialize poem information using PoemResponse schema
-        poem_data = poem.to_dict()
-        poem_response = PoemResponse.model_validate(poem_data)
-
-        return jsonify(poem_response.model_dump()), 200
+        # Serialize the poem and its details straight to JSON with the PoemResponse schema
+        return json_response(poem_to_json(poem))
 
     except Exception as e:
-        logging.error(f"Error fetching poem with identifier '{identifier}': {str(e)}")
+        logger.error("Error fetching poem with identifier '%s': %s", identifier, e)
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
 
 
@@ -231,20 +366,22 @@ def fetch_poem_by_id(poem_id):
     Retrieves a specific poem's details and all its contributions.
     """
     try:
+        # A published poem is served from its frozen row as stored
+        body = frozen_poem_json(poem_id)
+        if body is not None:
+            return json_response(body)
+
         # Fetch the poem details by ID
         poem = get_poem_by_id(poem_id)
         if not poem:
-            logging.error(f'Poem with ID {poem_id} not found. 🪰')
+            logger.error('Poem with ID %s not found. 🪰', poem_id)
             return jsonify({'error': 'Poem not found. 🌛'}), 404
 
-        # Validate and serialize poem information using PoemResponse schema
-        poem_data = poem.to_dict()
-        poem_response = PoemResponse.model_validate(poem_data)
-
-        return jsonify(poem_response.model_dump()), 200
+        # Serialize the poem and its details straight to JSON with the PoemResponse schema
+        return json_response(poem_to_json(poem))
 
     except Exception as e:
-        logging.error(f"Error fetching poem with ID {poem_id}: {str(e)}")
+        logger.error('Error fetching poem with ID %s: %s', poem_id, e)
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
 
 
@@ -280,25 +417,68 @@ def get_poems_with_five_filters():
         if title:
             query = query.filter(Poem.title.ilike(f"%{title}%"))
 
-        # Paginate the results
-        poems_paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Paginate the results, loading the details of the whole page in one extra query
+        poems_paginated = query.options(selectinload(Poem.poem_details)).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
 
-        # Build response data for each poem, using the Poem model's `to_dict` method
-        poems_response = [poem.to_dict() for poem in poems_paginated.items]
+        # Serialize the page and its pagination metadata straight to JSON
+        return json_response(poem_page_to_json(poems_paginated))
+    
+    except Exception as e:
+        logger.error('Error fetching paginated poems: %s', e)
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
 
-        # Prepare pagination metadata
-        response_data = {
-            'total': poems_paginated.total,
-            'page': poems_paginated.page,
-            'per_page': poems_paginated.per_page,
-            'total_pages': poems_paginated.pages,
-            'poems': poems_response
-        }
 
-        return jsonify(response_data), 200
-    
+@routes.route('/poem/<int:poem_id>/revisions', methods=['GET'])
+@jwt_required()
+def get_poem_revisions(poem_id):
+    """
+    The poem's revision history, newest first: who changed it, when, and a summary of
+    each change (lines added, changed or removed, poem fields changed).
+
+    Query parameters:
+        before: `next_before` of the previous page.
+        limit: revisions per page (default 20, at most 100).
+    """
+    limit = min(max(request.args.get('limit', type=int, default=REVISION_PAGE_SIZE), 1), REVISION_MAX_PAGE_SIZE)
+    try:
+        if not get_poem_by_id(poem_id):
+            return jsonify({'error': 'Poem not found. 🌛'}), 404
+        return json_response(revision_page(poem_id, before=request.args.get('before', type=int), limit=limit))
+
+    except Exception as e:
+        logger.error('Error fetching revisions of poem %s: %s', poem_id, e)
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
+
+
+@routes.route('/poem/<int:poem_id>/revisions/<int:number>', methods=['GET'])
+@routes.route('/poem/<int:poem_id>/revisions/as-of', methods=['GET'])
+@jwt_required()
+def get_poem_at_revision(poem_id, number=None):
+    """
+    The poem as it was at revision `number`, or with /as-of?at=<ISO 8601 time>, as it was
+    at that moment. Rebuilt from the nearest snapshot and the deltas after it.
+    """
+    at = None
+    if number is None:
+        try:
+            at = datetime.fromisoformat(request.args.get('at', ''))
+        except ValueError:
+            return jsonify({'error': 'Please give the moment as an ISO 8601 time, e.g. ?at=2024-11-09T12:00:00Z. 🕰'}), 400
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+
+    try:
+        if not get_poem_by_id(poem_id):
+            return jsonify({'error': 'Poem not found. 🌛'}), 404
+        body = poem_at_revision(poem_id, number=number, at=at)
+        if body is None:
+            return jsonify({'error': 'No such revision of this poem. 🕰'}), 404
+        return json_response(body)
+
     except Exception as e:
-        logging.error(f"Error fetching paginated poems: {str(e)}")
+        logger.error('Error rebuilding poem %s at a revision: %s', poem_id, e)
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
 
 
@@ -310,8 +490,7 @@ def get_poems_with_two_filters():
     If is_collaborative=true, we show only collaborative poems that are not yet published.
     Otherwise, we show only published poems.
     page and per_page are handled by SQLAlchemy’s paginate method on the query object.
-    Since Poem includes a relationship with PoemDetails, calling to_dict() on each Poem object will also serialize each poem’s details into the response. 
-    The poem_dict['details'] in Poem.to_dict() uses PoemDetails.to_dict() to format each PoemDetails entry.
+    Each poem is serialized with its details (loaded for the whole page at once) using the PoemResponse schema.
     This route returns a JSON response that includes paginated poem results with details,
     filtered according to the is_collaborative and is_published criteria.
     """
@@ -331,28 +510,164 @@ def get_poems_with_two_filters():
             # Show only published poems
             query = query.filter(Poem.is_published == True)
 
-        # Paginate the results
-        poems_paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Paginate the results, loading the details of the whole page in one extra query
+        poems_paginated = query.options(selectinload(Poem.poem_details)).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
 
-        # Build response data for each poem, using the Poem model's `to_dict` method
-        poems_response = [poem.to_dict() for poem in poems_paginated.items]
+        # Serialize the page and its pagination metadata straight to JSON
+        return json_response(poem_page_to_json(poems_paginated))
+    
+    except Exception as e:
+        logger.error('Error fetching paginated poems: %s', e)
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
 
-        # Prepare pagination metadata
-        response_data = {
-            'total': poems_paginated.total,
-            'page': poems_paginated.page,
-            'per_page': poems_paginated.per_page,
-            'total_pages': poems_paginated.pages,
-            'poems': poems_response
-        }
 
-        return jsonify(response_data), 200
-    
+@routes.route('/activity', methods=['GET'])
+@jwt_required()
+def get_activity():
+    """
+    Recent contributions across the platform (or by one poet), newest first.
+    The first page of the global feed is served from memory.
+
+    Query parameters:
+        poet_id: only contributions by this poet.
+        cursor: `next_cursor` of the previous page.
+        limit: contributions per page (default 20, at most 100).
+    """
+    limit = min(max(request.args.get('limit', type=int, default=ACTIVITY_PAGE_SIZE), 1), ACTIVITY_MAX_PAGE_SIZE)
+
+    try:
+        return json_response(feed.page(
+            poet_id=request.args.get('poet_id', type=int),
+            cursor=request.args.get('cursor'),
+            limit=limit,
+        ))
+
+    except ValueError as e:
+        return jsonify({'error': f'{str(e)} 🧭'}), 400
+
+    except Exception as e:
+        logger.error('Error fetching the activity feed: %s', e)
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
+
+
+@routes.route('/lobby', methods=['GET'])
+@jwt_required()
+def get_collaboration_lobby():
+    """
+    The collaboration lobby: open collaborative poems with their progress
+    (line count, remaining slots, last contributor), most recently active first.
+    Poems the requesting poet wrote the last line of are left out.
+
+    Query parameters:
+        cursor: `next_cursor` of the previous page.
+        limit: poems per page (default 20, at most 100).
+        poem_type_id: only poems of this type.
+    """
+    poet_id = get_jwt_identity().get('poet_id')
+    limit = min(max(request.args.get('limit', type=int, default=LOBBY_PAGE_SIZE), 1), LOBBY_MAX_PAGE_SIZE)
+
+    try:
+        return json_response(lobby_page(
+            poet_id,
+            cursor=request.args.get('cursor'),
+            limit=limit,
+            poem_type_id=request.args.get('poem_type_id', type=int),
+        ))
+
+    except ValueError as e:
+        return jsonify({'error': f'{str(e)} 🧭'}), 400
+
+    except Exception as e:
+        logger.error('Error fetching the collaboration lobby: %s', e)
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
+
+
+@routes.route('/suggest/rhymes', methods=['GET'])
+@jwt_required()
+def get_rhyme_suggestions():
+    """
+    Words that rhyme with `word`, most common first, served from the in-memory rhyme index.
+
+    Query parameters:
+        word: the word to rhyme with.
+        syllables: only suggest words with this many syllables.
+        limit: number of suggestions (default 20, at most 100).
+    """
+    limit = min(max(request.args.get('limit', type=int, default=SUGGESTION_LIMIT), 1), SUGGESTION_MAX_LIMIT)
+
+    try:
+        return jsonify(suggest_rhymes(
+            request.args.get('word'),
+            syllables=request.args.get('syllables', type=int),
+            limit=limit,
+        )), 200
+
+    except ValueError as e:
+        return jsonify({'error': f'{str(e)} 🎶'}), 400
+
     except Exception as e:
-        logging.error(f"Error fetching paginated poems: {str(e)}")
+        logger.error('Error suggesting rhymes: %s', e)
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
 
 
+@routes.route('/drafts/annotate', methods=['POST'])
+@jwt_required()
+def annotate_draft_lines():
+    """
+    Syllable counts for the lines of a draft that changed since the previous call, checked
+    against the poem type's structure with the local counter. Cheap enough to call on every
+    pause in the editor, so it is not rate limited.
+
+    Body: poem_type_id, content (the whole draft) and previous_hashes (the `hash` of every
+    line from earlier responses, in line order).
+    """
+    try:
+        draft = DraftAnnotate(**request.json)
+        criteria = poem_type_criteria(draft.poem_type_id)
+        if criteria is None:
+            return jsonify({'error': 'Poem type not found. 🔍'}), 404
+
+        return jsonify(annotate_draft(criteria, draft.content, draft.previous_hashes)), 200
+
+    except ValidationError as e:
+        return jsonify({'status': 'error', 'message': 'Validation failed', 'errors': e.errors()}), 400
+
+    except Exception as e:
+        logger.error('Error annotating draft: %s', e)
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
+
+
+@routes.route('/export/poems.ndjson', methods=['GET'])
+@jwt_required()
+def export_poems():
+    """
+    Streams every published poem with its lines as NDJSON, one poem per line, in ascending id order.
+    Optional filters: poem_type_id, poet_id, since and until (ISO 8601, on creation date).
+    To resume an interrupted download, pass the id of the last received poem as `after`.
+    The response is generated row by row, so memory stays flat regardless of corpus size.
+    """
+    try:
+        since = request.args.get('since')
+        until = request.args.get('until')
+        filters = {
+            'poem_type_id': request.args.get('poem_type_id', type=int),
+            'poet_id': request.args.get('poet_id', type=int),
+            'since': datetime.fromisoformat(since) if since else None,
+            'until': datetime.fromisoformat(until) if until else None,
+            'after_id': request.args.get('after', type=int),
+        }
+    except ValueError:
+        return jsonify({'error': 'Dates must be in ISO 8601 format, e.g. 2024-11-18 or 2024-11-18T12:00:00. 📅'}), 400
+
+    return Response(
+        stream_with_context(iter_ndjson(**filters)),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename=poems.ndjson'}
+    )
+
+
 @routes.route('/poem-types', methods=['GET'])
 def get_poem_types():
     """
@@ -367,7 +682,7 @@ def get_poem_types():
             try:
                 poem_type.criteria = json.loads(poem_type.criteria)
             except json.JSONDecodeError as e:
-                logging.error(f"Error decoding criteria JSON for PoemType ID {poem_type.id}: {str(e)}")
+                logger.error('Error decoding criteria JSON for PoemType ID %s: %s', poem_type.id, e)
                 poem_type.criteria = {}
         
         # Validate using the PoemTypeResponse schema        
@@ -381,6 +696,8 @@ def get_poem_types():
 
 @routes.route('/create-poem', methods=['POST'])
 @jwt_required()
+@rate_limit('poet', 'ip')
+@idempotent
 def create_poem():
     """
     This route handles the creation of a new poem by a logged-in poet, before any lines are added.
@@ -425,13 +742,10 @@ def create_poem():
         db.session.commit()
         db.session.refresh(new_poem)
 
-        # Manually print the new_poem fields
-        print("New Poem created:", new_poem.id, new_poem.title, new_poem.created_at)
+        logger.debug("New Poem created: %s %s %s", new_poem.id, new_poem.title, new_poem.created_at)
 
-        # Use PoemResponse Pydantic model to return the poem data
-        poem_response = PoemResponse.model_validate(new_poem)
-
-        return jsonify(poem_response.model_dump(exclude={"details"})), 201
+        # The new poem has no lines yet
+        return json_response(poem_to_json(new_poem, exclude={'details'}), 201)
 
     except JWTDecodeError:
         return jsonify({'error': 'Invalid token. Please log in again. ☔️'}), 401
@@ -452,6 +766,8 @@ def create_poem():
 
 @routes.route('/submit-poem', methods=['POST'])
 @jwt_required()
+@rate_limit('poet', 'ip')
+@idempotent
 def submit_poem():
     """
     This route handles the creation of a new poem. 
@@ -492,16 +808,9 @@ def submit_poem():
         db.session.commit()
         db.session.refresh(new_poem)
 
-        # Manually print the new_poem fields
-        print("New Poem created:", new_poem.id, new_poem.title, new_poem.created_at)
-
-        # Use PoemResponse Pydantic model to return the poem data
-        poem_response = PoemResponse.model_validate(new_poem)
+        logger.debug("New Poem created: %s %s %s", new_poem.id, new_poem.title, new_poem.created_at)
 
-        # Print the validated Pydantic model
-        print("Pydantic Model:", poem_response)
-
-        return jsonify(poem_response.model_dump()), 201
+        return json_response(poem_to_json(new_poem), 201)
 
     except JWTDecodeError:
         return jsonify({'error': 'Invalid token. Please log in again. ☔️'}), 401
@@ -522,6 +831,8 @@ def submit_poem():
 
 @routes.route('/submit-individual-poem', methods=['POST'])
 @jwt_required()
+@rate_limit('poet', 'ip')
+@idempotent
 def submit_individual_poem():
     """
     This route handles the full submission of a single, complete poem by one poet.
@@ -535,22 +846,25 @@ def submit_individual_poem():
         return process_individual_poem(poem_data)
 
     except ValidationError as e:
-        logging.error(f"Validation Error: {e.errors()}")
+        logger.error('Validation Error: %s', e.errors())
         return jsonify({'status': 'error', 'message': 'Validation failed', 'errors': e.errors()}), 400
 
     #except SQLAlchemyError as db_error:
-        #logging.error(f"Database error for poet {poet_id} with poem {poem_data.dict()}: {str(db_error)}")
+        #logger.error(f"Database error for poet {poet_id} with poem {poem_data.dict()}: {str(db_error)}")
         #db.session.rollback()
         #return jsonify({'status': 'error', 'message': 'A database error occurred.'}), 500
 
     except Exception as e:
-        logging.error(f"Error submitting individual poem: {str(e)}")
+        logger.error('Error submitting individual poem: %s', e)
         db.session.rollback()
         return jsonify({'status': 'error', 'message': f'An error occurred: {str(e)}'}), 500
 
 
 @routes.route('/submit-collab-poem', methods=['POST'])
+@ai_bound
 @jwt_required()
+@rate_limit('poet', 'ip')
+@idempotent
 def submit_collaborative_contribution():
     """
     This route handles the contribution of lines to a collaborative poem, 
@@ -570,7 +884,7 @@ def submit_collaborative_contribution():
         poem = get_poem_by_id(poem_details_data.poem_id)
 
         if not poem:
-            logging.error('Poem not found when fetching by ID.')
+            logger.error('Poem not found when fetching by ID.')
             return jsonify({'error': 'Poem not found. ✨'}), 404
 
         # Authorization: Ensure the user is allowed to submit content for this poem
@@ -586,26 +900,60 @@ def submit_collaborative_contribution():
             return jsonify({'error': 'This is not a collaborative poem. 🐋'}), 400
 
     except ValidationError as e:
-        logging.error(f"Validation error: {e.errors()}")
+        logger.error('Validation error: %s', e.errors())
         return jsonify({'errors': e.errors()}), 400
 
     except ValueError as e:
-        logging.error(f"Error: {str(e)}")
+        logger.error('Error: %s', e)
         return jsonify({'error': str(e)}), 404
 
     except Exception as e:
-        logging.error(f"Error submitting collaborative contribution: {str(e)}")
+        logger.error('Error submitting collaborative contribution: %s', e)
         db.session.rollback()
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
 
 
+def edit_conflict(poem):
+    """
+    412 for an edit based on an outdated version of the poem, with the current ETag.
+    """
+    response = jsonify({
+        'error': 'This poem was changed since you opened it. Reload it and apply your edit again. 🌀',
+        'version': poem.version if poem else None,
+    })
+    response.status_code = 412
+    if poem:
+        response.set_etag(str(poem.version))
+    return response
+
+
+def edit_precondition_required(poem):
+    """
+    428 for an edit sent without If-Match, with the current ETag to send back.
+    """
+    response = jsonify({
+        'error': 'Send the ETag of the poem you edited in If-Match, or If-Match: * to overwrite it. 🌀',
+        'version': poem.version,
+    })
+    response.status_code = 428
+    response.set_etag(str(poem.version))
+    return response
+
+
 @routes.route('/edit-poem/<int:poem_id>', methods=['GET', 'PATCH'])
 @jwt_required()
+@read_from_primary
 def edit_poem(poem_id):
     """
     This route allows:
-    - GET: Fetching the existing poem's metadata and content for editing.
-    - POST: Editing and saving the poem's metadata and content.
+    - GET: Fetching the existing poem's metadata and content for editing, with its
+      version as ETag.
+    - PATCH: Editing and saving the poem's metadata and content. The ETag must be sent
+      back in If-Match (428 without it; If-Match: * overwrites whatever is saved): if
+      someone else saved the poem in between, the edit is refused with 412.
+      Only the lines whose content really changes are written, in one statement. The
+      edit is appended to the poem's revision history (see revisions.py), and a
+      published poem is frozen again with the edited content (see published.py).
     """
     try:
         poet = get_current_poet()
@@ -628,22 +976,28 @@ def edit_poem(poem_id):
         if request.method == 'GET':
             db.session.refresh(poem)
 
-            poem_response = poem.to_dict()  # Convert the SQLAlchemy model to a dictionary
-            print(f"DEBUG: Full poem dictionary: {poem_response}")
-            # return jsonify(poem_response), 200
-            poem_response = PoemResponse.model_validate(poem_response)
-            return jsonify(poem_response.model_dump()), 200
+            response = json_response(poem_to_json(poem))
+            response.set_etag(str(poem.version))
+            return response
     
-        # Handle PUT request to update poem metadata and details
+        # Handle PATCH request to update poem metadata and details
         elif request.method == 'PATCH':
             poem_update_data = PoemUpdate(**request.json)
 
-            # Update poem fields if provided
-            if poem_update_data.title is not None:
+            if not request.if_match:
+                return edit_precondition_required(poem)
+            if not request.if_match.contains(str(poem.version)):
+                return edit_conflict(poem)
+
+            before = poem_state(poem)
+            changed = False
+            # Update poem fields if provided and different
+            if poem_update_data.title is not None and poem_update_data.title != poem.title:
                 poem.title = poem_update_data.title
-            if poem_update_data.poem_type_id is not None:
+                changed = True
+            if poem_update_data.poem_type_id is not None and poem_update_data.poem_type_id != poem.poem_type_id:
                 poem.poem_type_id = poem_update_data.poem_type_id
-            poem.updated_at = datetime.now(timezone.utc)
+                changed = True
 
             # Update existing PoemDetails entries
             if poem_update_data.details:
@@ -651,33 +1005,51 @@ def edit_poem(poem_id):
                 existing_details = {detail.id: detail for detail in poem.poem_details}
 
                 for details_data in poem_update_data.details:
-                    if details_data.id and details_data.id in existing_details:
-                        # Update content of each existing detail as provided
-                        existing_detail = existing_details[details_data.id]
-
-                        # Logic for Collaborative Poems
-                        # Allow editing only if the current user is the contributor
-                        if poem.is_collaborative and existing_detail.poet_id != poet.id:
-                            continue    # Skip if the current user is not the contributor
-
-                        # Update the content of each existing detail if the poet is authorized
-                        existing_detail.content = details_data.content
-                        existing_detail.submitted_at = datetime.now(timezone.utc)
-
+                    existing_detail = existing_details.get(details_data.id)
+                    if existing_detail is None or details_data.content is None:
+                        continue
+                    # Logic for Collaborative Poems
+                    # Allow editing only if the current user is the contributor
+                    if poem.is_collaborative and existing_detail.poet_id != poet.id:
+                        continue    # Skip if the current user is not the contributor
+                    if details_data.content == existing_detail.content:
+                        continue
+                    # The line keeps its submitted_at, and with it its place in the poem.
+                    # The unit of work writes all edited lines in one executemany UPDATE.
+                    existing_detail.content = details_data.content
+                    changed = True
+
+            if changed:
+                # Also bumps the version, in an UPDATE that only matches the version we read
+                poem.updated_at = datetime.now(timezone.utc)
+                try:
+                    db.session.flush()
+                except StaleDataError:
+                    db.session.rollback()
+                    return edit_conflict(get_poem_by_id(poem_id))
+                record_edit(poem, before)
+
+            # Everything the response shows is in memory already (updated_at renders like
+            # a read, see schemas.Timestamp): serialize before the commit expires it,
+            # instead of reloading the poem afterwards
+            if changed and poem.is_published:
+                # The flush dropped the poem's frozen row: freeze the edited poem again
+                body = freeze_poem(poem)
+            else:
+                body = poem_to_json(poem)
+            version = poem.version
             db.session.commit()
-            db.session.refresh(poem)
-
-            updated_poem_response = poem.to_dict()
 
-            poem_response = PoemResponse.model_validate(updated_poem_response)
-            return jsonify(poem_response.model_dump()), 200
+            response = json_response(body)
+            response.set_etag(str(version))
+            return response
 
     except ValidationError as e:
-        logging.error(f"Validation error: {e.errors()}")
+        logger.error('Validation error: %s', e.errors())
         return jsonify({'errors': e.errors()}), 400
 
     except Exception as e:
-            logging.error(f"Error editing poem: {str(e)}")
+            logger.error('Error editing poem: %s', e)
             db.session.rollback()
             return jsonify({'status': 'error', 'message': f'An error occurred: {str(e)}'}), 500 
 
@@ -716,6 +1088,6 @@ def delete_poem(poem_id):
         }), 200
 
     except Exception as e:
-        logging.error(f"Error deleting poem: {str(e)}")
+        logger.error('Error deleting poem: %s', e)
         db.session.rollback()
         return jsonify({'status': 'error', 'message': f'An error occurred: {str(e)}'}), 500
@@ -1,6 +1,19 @@
-from pydantic import BaseModel, EmailStr, Field
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+from pydantic import AfterValidator, AliasChoices, BaseModel, EmailStr, Field
+from datetime import datetime, timezone
+from typing import Annotated, List, Optional, Dict, Any
+
+
+def as_utc(value):
+    """
+    A timestamp in UTC. Timestamps are stored in UTC, but SQLite hands them back naive.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+# Every timestamp the API returns: ISO 8601 in UTC, e.g. 2024-11-18T12:00:00.123456Z
+Timestamp = Annotated[datetime, AfterValidator(as_utc)]
 
 
 # Models for Poem Type
@@ -34,7 +47,7 @@ class PoemDetailsUpdate(BaseModel):
 
 class PoemDetailsResponse(PoemDetailsCreate):
     id: int
-    submitted_at: datetime
+    submitted_at: Timestamp
 
     class Config:
         from_attributes = True
@@ -50,12 +63,52 @@ class PoetCreate(BaseModel):
 
 class PoetResponse(PoetCreate):
     id: int
-    created_at: datetime
+    created_at: Timestamp
 
     class Config:
         from_attributes = True  # Allows reading data from SQLAlchemy objects
 
 
+class PoetSummary(BaseModel):
+    id: int
+    poet_name: str
+    email: str
+    created_at: Optional[Timestamp] = None
+
+
+class PoetProfileCounts(BaseModel):
+    poems: int
+    published_poems: int
+    collaborative_poems: int
+    contributions: int
+    # Collaborative poems the poet wrote at least one line of
+    collaborations: int
+
+
+class PoetProfilePoem(BaseModel):
+    id: int
+    title: str
+    poem_type_id: int
+    is_collaborative: Optional[bool] = False
+    is_published: Optional[bool] = False
+    created_at: Optional[Timestamp] = None
+
+
+class PoetProfileContribution(BaseModel):
+    id: int
+    poem_id: int
+    poem_title: str
+    content: str
+    submitted_at: Optional[Timestamp] = None
+
+
+class PoetProfileResponse(BaseModel):
+    poet: PoetSummary
+    counts: PoetProfileCounts
+    recent_poems: List[PoetProfilePoem]
+    recent_contributions: List[PoetProfileContribution]
+
+
 # Models for Poem
 
 class PoemCreate(BaseModel):
@@ -73,10 +126,103 @@ class PoemUpdate(BaseModel):
 
 class PoemResponse(PoemCreate):
     id: int
-    created_at: datetime
-    details: Optional[List[PoemDetailsResponse]] = []
+    created_at: Timestamp
+    # Read straight from the ORM relationship (`poem_details`) as well as from dicts (`details`)
+    details: Optional[List[PoemDetailsResponse]] = Field(
+        default=[], validation_alias=AliasChoices('details', 'poem_details')
+    )
     is_published: Optional[bool] = False
-    updated_at: Optional[datetime] = None
+    updated_at: Optional[Timestamp] = None
+    version: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class PoemListResponse(BaseModel):
+    total: int
+    page: int
+    per_page: int
+    total_pages: int
+    poems: List[PoemResponse]
+
+    class Config:
+        from_attributes = True
+
+
+class LobbyEntryResponse(BaseModel):
+    poem_id: int
+    title: str
+    poem_type_id: int
+    poet_id: int
+    line_count: int
+    max_lines: Optional[int] = None
+    remaining_slots: Optional[int] = None
+    last_contributor_id: Optional[int] = None
+    last_activity_at: Timestamp
 
     class Config:
         from_attributes = True
+
+
+class LobbyPageResponse(BaseModel):
+    poems: List[LobbyEntryResponse]
+    next_cursor: Optional[str] = None
+
+
+class ActivityEventResponse(BaseModel):
+    id: int
+    poem_id: int
+    poem_title: str
+    poet_id: int
+    poet_name: str
+    content: str
+    submitted_at: Optional[Timestamp] = None
+
+
+class ActivityPageResponse(BaseModel):
+    events: List[ActivityEventResponse]
+    next_cursor: Optional[str] = None
+
+
+class PoemRevisionSummary(BaseModel):
+    revision: int
+    kind: str
+    poet_id: Optional[int] = None
+    created_at: Timestamp
+    # Line counts of a delta (added, changed, removed) and the poem fields it changed;
+    # the number of lines of a snapshot
+    changes: dict
+
+
+class PoemRevisionPageResponse(BaseModel):
+    poem_id: int
+    revisions: List[PoemRevisionSummary]
+    next_before: Optional[int] = None
+
+
+class PoemRevisionLine(BaseModel):
+    id: int
+    poet_id: int
+    content: str
+
+
+class PoemAtRevisionResponse(BaseModel):
+    poem_id: int
+    revision: int
+    poet_id: Optional[int] = None
+    created_at: Timestamp
+    replayed: int
+    title: str
+    poem_type_id: int
+    is_published: bool
+    details: List[PoemRevisionLine]
+
+
+# Models for Drafts
+
+class DraftAnnotate(BaseModel):
+    poem_type_id: int
+    content: str = Field(..., max_length=10000)
+    # Line hashes from the previous annotation, in line order
+    previous_hashes: List[str] = Field(default=[], max_length=500)
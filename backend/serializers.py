@@ -0,0 +1,70 @@
+"""
+Precompiled JSON serializers for poem responses.
+
+The old path went Poem.to_dict() -> PoemResponse.model_validate -> model_dump -> jsonify,
+i.e. four passes over every poem and its details, three of them in Python. Here a
+TypeAdapter reads the ORM attributes directly (from_attributes) and dumps JSON bytes,
+both inside pydantic-core. Datetimes are rendered as ISO 8601 in UTC (schemas.Timestamp).
+
+Responses still built with jsonify go through JSONProvider, which renders datetimes and
+orders keys the same way, so every endpoint speaks one format.
+"""
+
+from datetime import datetime
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+from pydantic import TypeAdapter
+from .schemas import PoemListResponse, PoemResponse, as_utc
+
+
+poem_adapter = TypeAdapter(PoemResponse)
+poem_list_adapter = TypeAdapter(PoemListResponse)
+
+
+def poem_to_json(poem, exclude=None):
+    """
+    Serialize a Poem row (with its details, unless excluded) to JSON bytes.
+    """
+    return poem_adapter.dump_json(poem_adapter.validate_python(poem, from_attributes=True), exclude=exclude)
+
+
+def poem_page_to_json(pagination):
+    """
+    Serialize a Flask-SQLAlchemy pagination of Poem rows, with its pagination metadata, to JSON bytes.
+    """
+    return poem_list_adapter.dump_json(poem_list_adapter.validate_python({
+        'total': pagination.total,
+        'page': pagination.page,
+        'per_page': pagination.per_page,
+        'total_pages': pagination.pages,
+        'poems': pagination.items,
+    }, from_attributes=True))
+
+
+def timestamp_to_json(value):
+    """
+    A datetime as the API writes it, e.g. 2024-11-18T12:00:00.123456Z.
+    """
+    return as_utc(value).isoformat().replace('+00:00', 'Z')
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    jsonify with the serializers' conventions: ISO 8601 UTC datetimes instead of
+    RFC 822 dates, and keys in the order the schemas declare them.
+    """
+
+    sort_keys = False
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, datetime):
+            return timestamp_to_json(o)
+        return DefaultJSONProvider.default(o)
+
+
+def json_response(body, status=200):
+    """
+    Wrap already-encoded JSON bytes in a response, skipping jsonify's re-encoding.
+    """
+    return Response(body, status=status, mimetype='application/json')
@@ -2,16 +2,23 @@
 This file handles the overall submission process for individual and collaborative poems.
 """
 
+import logging
 from flask import jsonify, request
-from backend.poetry_validators.poem_val import validate_consecutive_contributions_new, validate_max_lines
+from backend.poetry_validators.poem_val import (
+    validate_consecutive_contributions_new, validate_max_lines, validate_rhyme_scheme
+)
 from .database import db
 from .models import PoemDetails
 from .schemas import PoemDetailsResponse
 from .poem_utils import get_poem_by_id, get_poem_type_by_id, get_poem_contributions
+from .published import freeze_poem
+from .rate_limit import admit
 from backend.poetry_validators.free_verse import handle_free_verse, handle_free_verse_new
 from backend.poetry_validators.haiku import handle_haiku
 # from backend.poetry_validators.nonet import handle_nonet
-# import logging
+
+
+logger = logging.getLogger(__name__)
 
 
 def is_authorized_poet(poem, authenticated_poet_id):
@@ -66,6 +73,15 @@ def process_individual_poem(poem_details_data):
             'error': 'This poem is collaborative and cannot be submitted as an individual poem. 🛼'
         }), 400
 
+    # Rhyme scheme, for poem types that have one: the same check as for collaborative lines
+    poem_type = get_poem_type_by_id(existing_poem.poem_type_id)
+    if poem_type:
+        rhyme_error = validate_rhyme_scheme(
+            poem_type, get_poem_contributions(existing_poem.id), poem_details_data.content
+        )
+        if rhyme_error:
+            return rhyme_error
+
     # Save the individual poem content
     poem_details = PoemDetails(
         poem_id=poem_details_data.poem_id,
@@ -75,6 +91,8 @@ def process_individual_poem(poem_details_data):
     db.session.add(poem_details)
 
     existing_poem.is_published = True
+    # Published poems never change again: store the rendered poem for its readers
+    freeze_poem(existing_poem)
 
     db.session.commit()
 
@@ -89,12 +107,12 @@ def process_collaborative_poem(poem, poem_details_data, poet_id):
     """
     # Step 1: Fetch and validate the poem type
     poem_type = get_poem_type_by_id(poem.poem_type_id)
-    print(f"Poem type retrieved: {poem_type.name if poem_type else 'None'}")
+    logger.debug("Poem type retrieved: %s", poem_type.name if poem_type else 'None')
 
     if not poem_type:
         return jsonify({'error': 'Poem type was not found. ⚡️'}), 404
 
-    print(f"Is the poem published? {'Yes' if poem.is_published else 'No'}")
+    logger.debug("Is the poem published? %s", 'Yes' if poem.is_published else 'No')
 
     # Step 2: Check if the poem is already completed (published)
     if poem.is_published:
@@ -118,15 +136,24 @@ def process_collaborative_poem(poem, poem_details_data, poet_id):
         max_lines_validation, status_code = validate_max_lines(poem_type, existing_contributions)
         if status_code != 200:
             return max_lines_validation, status_code
+
+    # Step 5: Rhyme scheme, for poem types that have one
+    rhyme_error = validate_rhyme_scheme(poem_type, existing_contributions_data, poem_details_data.content)
+    if rhyme_error:
+        return rhyme_error
     
     current_poem_content = poem_details_data.content
 
-    print(f"Delegating to handler for poem type: {poem_type.name}")
+    logger.debug("Delegating to handler for poem type: %s", poem_type.name)
 
     # Delegate control to specific poem type handlers (Haiku, Free Verse, etc.)
     if poem_type.name == "Free Verse":
         return handle_free_verse_new(existing_contributions, current_poem_content, poem, poem_details_data, poet_id)
     elif poem_type.name == "Haiku":
+        # Haiku lines are validated by the AI: only now take a token from its global budget
+        limited = admit('ai')
+        if limited:
+            return limited
         return handle_haiku(existing_contributions, current_poem_content, poem, poem_details_data, poet_id)
     # elif poem_type.name == "Nonet":
         # return handle_nonet(existing_contributions, current_poem_content, poem, poem_details_data, poet_id)
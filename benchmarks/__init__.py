@@ -0,0 +1,14 @@
+"""
+Local benchmark tooling for poeticaVENA.
+
+- seed.py: bulk generator for poets, poems of every PoemType and their contributions.
+- fake_ai.py: a stand-in for the OpenAI chat completions API, so load tests never hit the real one.
+- scenarios.py: the browse / read / contribute / edit scenarios the load driver replays.
+- load.py: multi-worker HTTP load driver.
+- report.py: throughput and latency percentile reporting.
+
+Everything runs locally against SQLite or a local Postgres, e.g.:
+    python -m benchmarks.seed --database-url sqlite:////tmp/poetica-bench.db --poets 100000
+    python -m benchmarks.fake_ai --port 5055 --latency-ms 400
+    python -m benchmarks.load --base-url http://localhost:5001 --workers 4 --concurrency 16 --duration 60
+"""
@@ -0,0 +1,128 @@
+"""
+How many AI-bound submissions one app process keeps in flight.
+
+Every virtual poet logs in and opens a collaborative Haiku; then all of them submit a first
+line at the same moment, each needing an AI validation. Served by threads, a burst larger
+than the thread count queues behind the AI's latency; served on the event loop (asgi.py),
+the whole burst waits for the AI together.
+
+Run the app against the stand-in AI once per mode, with rate limiting off:
+    python -m benchmarks.fake_ai --port 5055 --latency-ms 400
+    export OPENAI_BASE_URL=http://localhost:5055/v1 RATE_LIMIT_ENABLED=false DATABASE_URL=sqlite:////tmp/poetica-bench.db
+    gunicorn -w 1 --threads 8 -b 127.0.0.1:5001 main:app      # threads
+    uvicorn asgi:app --port 5001                               # ASGI
+    python -m benchmarks.ai_concurrency --poets 1-400 --concurrency 200 --rounds 3
+"""
+
+import argparse
+import asyncio
+import time
+
+from .load import parse_poet_range
+from .report import format_report, summarize, write_json
+from .scenarios import Recorder
+from .seed import BENCH_PASSWORD, make_line, poet_email
+
+LABEL = 'POST /submit-collab-poem'
+# Logins and poem creation are setup, not measured; keep them from flooding the server
+SETUP_CONCURRENCY = 16
+
+
+async def log_in(client, poet_number, setup):
+    async with setup:
+        response = await client.post('/auth/login', json={'email': poet_email(poet_number), 'password': BENCH_PASSWORD})
+        response.raise_for_status()
+        headers = {'Authorization': f"Bearer {response.json()['access_token']}"}
+        poet_id = (await client.get('/poet/me', headers=headers)).json()['id']
+    return headers, poet_id
+
+
+async def open_haiku(client, poet, title, setup):
+    headers, poet_id = poet
+    async with setup:
+        response = await client.post('/create-poem', headers=headers, json={
+            'title': title, 'poem_type_id': 1, 'poet_id': poet_id, 'is_collaborative': True,
+        })
+        response.raise_for_status()
+    return response.json()['id']
+
+
+async def submit_line(client, poet, poem_id, content, recorder):
+    headers, poet_id = poet
+    started = time.perf_counter()
+    try:
+        response = await client.post('/submit-collab-poem', headers=headers, json={
+            'poem_id': poem_id, 'poet_id': poet_id, 'content': content,
+        })
+    except Exception as e:
+        recorder.record_error(LABEL, e)
+        return
+    recorder.record(LABEL, time.perf_counter() - started, response.status_code)
+
+
+async def run(options):
+    import httpx
+    import random
+
+    rng = random.Random(options['seed'])
+    first, last = options['poets']
+    numbers = [first + index % (last - first + 1) for index in range(options['concurrency'])]
+    setup = asyncio.Semaphore(SETUP_CONCURRENCY)
+    recorder = Recorder()
+    measured = 0.0
+
+    # Servers close idle keep-alive connections (gunicorn after 2s): setup opens a connection
+    # per request and every burst gets a fresh client, so none is reused after going stale
+    base = {'base_url': options['base_url'], 'timeout': options['timeout']}
+    async with httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=0), **base) as client:
+        poets = await asyncio.gather(*(log_in(client, number, setup) for number in numbers))
+        run_id = f'{time.time():.0f}'
+        rounds = []
+        for round_number in range(options['rounds']):
+            rounds.append(await asyncio.gather(*(
+                open_haiku(client, poet, f'Burst {run_id}-{round_number}-{index}', setup)
+                for index, poet in enumerate(poets)
+            )))
+
+    limits = httpx.Limits(max_connections=options['concurrency'])
+    for poem_ids in rounds:
+        async with httpx.AsyncClient(limits=limits, **base) as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                submit_line(client, poet, poem_id, make_line(rng), recorder)
+                for poet, poem_id in zip(poets, poem_ids)
+            ))
+            measured += time.perf_counter() - started
+    return recorder, measured
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure concurrent AI-bound submissions against a running server.')
+    parser.add_argument('--base-url', default='http://localhost:5001')
+    parser.add_argument('--poets', type=parse_poet_range, default=(1, 1000),
+                        help='Range of seeded poet ids to log in as, e.g. 1-400.')
+    parser.add_argument('--concurrency', type=int, default=200, help='Submissions sent at the same moment.')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path.')
+    args = parser.parse_args(argv)
+
+    recorder, measured = asyncio.run(run({
+        'base_url': args.base_url,
+        'poets': args.poets,
+        'concurrency': args.concurrency,
+        'rounds': args.rounds,
+        'timeout': args.timeout,
+        'seed': args.seed,
+    }))
+    report = summarize(recorder, measured)
+    print(format_report(report))
+    # 201 accepted, 400 rejected by the AI: both are finished validations
+    print(f"Statuses: {report['endpoints'].get(LABEL, {}).get('statuses', {})}")
+    if args.json_path:
+        write_json(report, args.json_path)
+
+
+if __name__ == '__main__':
+    main()
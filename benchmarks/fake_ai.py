@@ -0,0 +1,114 @@
+"""
+Stand-in for the OpenAI chat completions API.
+
+Load tests must not spend real tokens, so point the app at this server instead:
+    python -m benchmarks.fake_ai --port 5055 --latency-ms 400
+    OPENAI_BASE_URL=http://localhost:5055/v1 OPENAI_API_KEY=bench RATE_LIMIT_ENABLED=false python main.py
+
+Every completion waits --latency-ms (plus jitter) to mimic the model, then answers 'Pass',
+or 'Fail' for a --fail-ratio share of lines. Batched validation prompts (JSON mode) get
+one JSON verdict per line.
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeAIHandler(BaseHTTPRequestHandler):
+    latency_ms = 400
+    jitter_ms = 100
+    fail_ratio = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+
+        if not self.path.endswith('/chat/completions'):
+            self.send_error(404)
+            return
+
+        time.sleep(max(0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000)
+
+        prompt = ' '.join(message.get('content', '') for message in payload.get('messages', []))
+        if (payload.get('response_format') or {}).get('type') == 'json_object':
+            content = self.answer_batch(prompt)
+        else:
+            content = self.answer(prompt)
+        body = json.dumps({
+            'id': f'chatcmpl-bench-{random.getrandbits(32):08x}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'gpt-4o-mini'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': len(prompt.split()),
+                'completion_tokens': len(content.split()),
+                'total_tokens': len(prompt.split()) + len(content.split()),
+            },
+        }).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def answer(self, prompt):
+        """
+        The verdict for a single-line validation prompt.
+        """
+        if random.random() < self.fail_ratio:
+            return 'Fail: the line has the wrong number of syllables.'
+        return 'Pass'
+
+    def answer_batch(self, prompt):
+        """
+        The JSON verdicts for a batched validation prompt, one per line id.
+        """
+        match = re.search(r'Lines: (\[.*?\])\s*\n', prompt, re.DOTALL)
+        lines = json.loads(match.group(1)) if match else []
+        results = []
+        for line in lines:
+            if random.random() < self.fail_ratio:
+                results.append({'id': line['id'], 'verdict': 'Fail', 'reason': 'The line has the wrong number of syllables.'})
+            else:
+                results.append({'id': line['id'], 'verdict': 'Pass'})
+        return json.dumps({'results': results})
+
+    def log_message(self, format, *args):
+        # Keep the benchmark console quiet
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run a stand-in OpenAI chat completions server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--latency-ms', type=float, default=400)
+    parser.add_argument('--jitter-ms', type=float, default=100)
+    parser.add_argument('--fail-ratio', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    FakeAIHandler.latency_ms = args.latency_ms
+    FakeAIHandler.jitter_ms = min(args.jitter_ms, args.latency_ms)
+    FakeAIHandler.fail_ratio = args.fail_ratio
+
+    server = ThreadingHTTPServer((args.host, args.port), FakeAIHandler)
+    server.daemon_threads = True
+    print(f'Fake AI listening on http://{args.host}:{args.port}/v1 🤖')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
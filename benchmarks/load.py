@@ -0,0 +1,136 @@
+"""
+Multi-worker HTTP load driver.
+
+Spawns --workers processes, each running --concurrency threads. Every thread logs in as a
+different seeded poet (see benchmarks/seed.py) and replays a weighted mix of the scenarios
+in benchmarks/scenarios.py until --duration runs out. Results are merged and reported as
+throughput and latency percentiles per endpoint.
+
+Usage:
+    python -m benchmarks.load --base-url http://localhost:5001 --poets 1-100000 \
+        --workers 4 --concurrency 16 --duration 60 --mix browse=50,read=30,contribute=15,edit=5
+"""
+
+import argparse
+import random
+import threading
+import time
+from multiprocessing import Pool
+
+from .report import format_report, summarize, write_json
+from .scenarios import DEFAULT_MIX, SCENARIOS, Recorder, VirtualPoet
+
+
+def parse_mix(value):
+    """
+    Parse 'browse=50,read=30' into {'browse': 50, 'read': 30}.
+    """
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f'Unknown scenario: {name}')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def parse_poet_range(value):
+    first, _, last = value.partition('-')
+    return int(first), int(last or first)
+
+
+def run_thread(options, poet_number, recorder, thread_seed):
+    """
+    One virtual poet: log in, then replay scenarios until the deadline.
+    """
+    import httpx
+
+    rng = random.Random(thread_seed)
+    names = list(options['mix'])
+    weights = [options['mix'][name] for name in names]
+
+    with httpx.Client(base_url=options['base_url'], timeout=options['timeout']) as client:
+        poet = VirtualPoet(client, poet_number, recorder)
+        try:
+            poet.login()
+        except Exception as e:
+            recorder.record_error('POST /auth/login', e)
+            return
+
+        # Wait for the measured window so every virtual poet starts at the same time
+        time.sleep(max(0, options['started'] - time.time()))
+        deadline = options['started'] + options['duration']
+        while time.time() < deadline:
+            SCENARIOS[rng.choices(names, weights)[0]](poet, rng)
+
+
+def run_worker(args):
+    """
+    Entry point of a worker process. Returns its Recorder for merging.
+    """
+    worker_index, options = args
+    first, last = options['poets']
+    # One recorder per thread, merged at the end, so recording needs no locking
+    recorders, threads = [], []
+    for thread_index in range(options['concurrency']):
+        slot = worker_index * options['concurrency'] + thread_index
+        poet_number = first + slot % (last - first + 1)
+        recorder = Recorder()
+        thread = threading.Thread(
+            target=run_thread,
+            args=(options, poet_number, recorder, options['seed'] * 1000 + slot),
+            daemon=True,
+        )
+        thread.start()
+        recorders.append(recorder)
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    merged = Recorder()
+    for recorder in recorders:
+        merged.merge(recorder)
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Drive HTTP load against a running poeticaVENA server.')
+    parser.add_argument('--base-url', default='http://localhost:5001')
+    parser.add_argument('--poets', type=parse_poet_range, default=(1, 1000),
+                        help='Range of seeded poet ids to log in as, e.g. 1-100000.')
+    parser.add_argument('--workers', type=int, default=2, help='Number of driver processes.')
+    parser.add_argument('--concurrency', type=int, default=8, help='Virtual poets per worker process.')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of load after login.')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path.')
+    args = parser.parse_args(argv)
+
+    # Leave a few seconds for every virtual poet to log in before the measured window opens
+    options = {
+        'base_url': args.base_url,
+        'poets': args.poets,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'timeout': args.timeout,
+        'mix': args.mix,
+        'seed': args.seed,
+        'started': time.time() + 5,
+    }
+
+    with Pool(args.workers) as pool:
+        recorders = pool.map(run_worker, [(index, options) for index in range(args.workers)])
+
+    merged = Recorder()
+    for recorder in recorders:
+        merged.merge(recorder)
+
+    report = summarize(merged, args.duration)
+    print(format_report(report))
+    if args.json_path:
+        write_json(report, args.json_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Throughput and latency percentile reporting for benchmark runs.
+"""
+
+import json
+
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    """
+    Linear-interpolated percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def summarize(recorder, elapsed):
+    """
+    Build the report dict: one row per request label plus an overall row.
+    Latencies are reported in milliseconds, throughput in requests per second.
+    """
+    def row(latencies, statuses, errors):
+        values = sorted(latencies)
+        server_errors = sum(count for status, count in statuses.items() if int(status) >= 500)
+        return {
+            'requests': len(values),
+            'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0.0,
+            'errors': server_errors + sum(errors.values()),
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            **{f'p{pct}_ms': round(percentile(values, pct) * 1000, 2) for pct in PERCENTILES},
+            'max_ms': round(values[-1] * 1000, 2) if values else 0.0,
+        }
+
+    labels = sorted(set(recorder.latencies) | set(recorder.errors))
+    report = {
+        'elapsed_s': round(elapsed, 2),
+        'endpoints': {
+            label: row(
+                recorder.latencies.get(label, []),
+                recorder.statuses.get(label, {}),
+                recorder.errors.get(label, {}),
+            )
+            for label in labels
+        },
+    }
+
+    all_statuses = {}
+    for statuses in recorder.statuses.values():
+        for status, count in statuses.items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+    all_errors = {}
+    for errors in recorder.errors.values():
+        for name, count in errors.items():
+            all_errors[name] = all_errors.get(name, 0) + count
+    report['overall'] = row(
+        [value for values in recorder.latencies.values() for value in values], all_statuses, all_errors
+    )
+    return report
+
+
+def format_report(report):
+    """
+    Render the report as a fixed-width text table.
+    """
+    columns = ['requests', 'throughput_rps', 'errors'] + [f'p{pct}_ms' for pct in PERCENTILES] + ['max_ms']
+    width = max([len(label) for label in report['endpoints']] + [len('overall')]) + 2
+    lines = [
+        f"Elapsed: {report['elapsed_s']}s",
+        'endpoint'.ljust(width) + ''.join(column.rjust(15) for column in columns),
+    ]
+    for label, row in list(report['endpoints'].items()) + [('overall', report['overall'])]:
+        lines.append(label.ljust(width) + ''.join(str(row[column]).rjust(15) for column in columns))
+    return '\n'.join(lines)
+
+
+def write_json(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,161 @@
+"""
+Scenario definitions replayed by the load driver.
+
+Each scenario is a function taking a VirtualPoet and a random.Random and issuing the requests
+a real poet would make for that action. Requests are timed per label (e.g. 'GET /all-poems'),
+so the report shows which endpoint is slow, not just which scenario.
+"""
+
+import time
+
+from .seed import BENCH_PASSWORD, make_line, poet_email
+
+
+class Recorder:
+    """
+    Collects latencies (seconds), status codes and transport errors per request label.
+    """
+
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = {}
+
+    def record(self, label, seconds, status):
+        self.latencies.setdefault(label, []).append(seconds)
+        statuses = self.statuses.setdefault(label, {})
+        statuses[status] = statuses.get(status, 0) + 1
+
+    def record_error(self, label, error):
+        errors = self.errors.setdefault(label, {})
+        name = type(error).__name__
+        errors[name] = errors.get(name, 0) + 1
+
+    def merge(self, other):
+        for label, values in other.latencies.items():
+            self.latencies.setdefault(label, []).extend(values)
+        for label, statuses in other.statuses.items():
+            merged = self.statuses.setdefault(label, {})
+            for status, count in statuses.items():
+                merged[status] = merged.get(status, 0) + count
+        for label, errors in other.errors.items():
+            merged = self.errors.setdefault(label, {})
+            for name, count in errors.items():
+                merged[name] = merged.get(name, 0) + count
+
+
+class VirtualPoet:
+    """
+    One logged-in seeded poet issuing requests through its own HTTP client.
+    """
+
+    def __init__(self, client, poet_number, recorder):
+        self.client = client
+        self.poet_number = poet_number
+        self.recorder = recorder
+        self.poet_id = None
+        self.known_poem_ids = []
+        self.total_pages = {}
+
+    def login(self):
+        response = self.client.post('/auth/login', json={
+            'email': poet_email(self.poet_number),
+            'password': BENCH_PASSWORD,
+        })
+        response.raise_for_status()
+        self.client.headers['Authorization'] = f"Bearer {response.json()['access_token']}"
+        self.poet_id = self.client.get('/poet/me').json()['id']
+
+    def call(self, label, method, path, **kwargs):
+        """
+        Issue and time one request. Returns the response, or None on a transport error.
+        """
+        started = time.perf_counter()
+        try:
+            response = self.client.request(method, path, **kwargs)
+        except Exception as e:
+            self.recorder.record_error(label, e)
+            return None
+        self.recorder.record(label, time.perf_counter() - started, response.status_code)
+        return response
+
+    def list_poems(self, rng, label, **params):
+        """
+        Fetch a random page of /all-poems for the given filters, remembering how many pages exist.
+        """
+        key = tuple(sorted(params.items()))
+        page = rng.randint(1, self.total_pages.get(key, 1))
+        response = self.call(label, 'GET', '/all-poems', params={**params, 'page': page, 'per_page': 10})
+        if response is None or response.status_code != 200:
+            return []
+        data = response.json()
+        self.total_pages[key] = max(data.get('total_pages') or 1, 1)
+        return data.get('poems', [])
+
+
+def browse(poet, rng):
+    """
+    Page through published poems.
+    """
+    poems = poet.list_poems(rng, 'GET /all-poems')
+    poet.known_poem_ids = [poem['id'] for poem in poems] or poet.known_poem_ids
+
+
+def read(poet, rng):
+    """
+    Open one poem the poet has seen while browsing.
+    """
+    if not poet.known_poem_ids:
+        browse(poet, rng)
+    if poet.known_poem_ids:
+        poet.call('GET /poem/<identifier>', 'GET', f'/poem/{rng.choice(poet.known_poem_ids)}')
+
+
+def contribute(poet, rng):
+    """
+    Pick an open collaborative poem from the lobby and add a line to it.
+    """
+    poems = poet.list_poems(rng, 'GET /all-poems?is_collaborative=true', is_collaborative='true')
+    if not poems:
+        return
+    poem = rng.choice(poems)
+    poet.call('POST /submit-collab-poem', 'POST', '/submit-collab-poem', json={
+        'poem_id': poem['id'],
+        'poet_id': poet.poet_id,
+        'content': make_line(rng),
+    })
+
+
+def edit(poet, rng):
+    """
+    Open one of the poet's own individual poems in the editor and rewrite a line.
+    """
+    poems = poet.list_poems(
+        rng, 'GET /all-poems?poet_id=me', is_collaborative='false', poet_id=poet.poet_id
+    )
+    if not poems:
+        return
+    poem_id = rng.choice(poems)['id']
+    response = poet.call('GET /edit-poem', 'GET', f'/edit-poem/{poem_id}')
+    if response is None or response.status_code != 200:
+        return
+    details = response.json().get('details') or []
+    if not details:
+        return
+    detail = rng.choice(details)
+    poet.call('PATCH /edit-poem', 'PATCH', f'/edit-poem/{poem_id}', headers={
+        'If-Match': response.headers.get('ETag', '*'),
+    }, json={
+        'poem_type_id': None,
+        'details': [{'id': detail['id'], 'content': make_line(rng)}],
+    })
+
+
+SCENARIOS = {
+    'browse': browse,
+    'read': read,
+    'contribute': contribute,
+    'edit': edit,
+}
+
+DEFAULT_MIX = {'browse': 50, 'read': 30, 'contribute': 15, 'edit': 5}
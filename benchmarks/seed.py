@@ -0,0 +1,254 @@
+"""
+Fast bulk data generator for load testing.
+
+Creates poets, poems across every PoemType in the database (individual and collaborative,
+published and still open) and their ordered contributions. Rows are generated with explicit
+primary keys and written with executemany in large chunks on a single connection,
+so a few million PoemDetails rows take minutes instead of hours. The tables the app derives
+from them (collaboration lobby, daily stats, frozen published poems) are rebuilt at the end,
+and every line gets its rhyme key, so the seeded data looks like the app wrote it.
+
+Every seeded poet can log in with `poet<N>@bench.poetica` / BENCH_PASSWORD,
+which is what the load driver (benchmarks/load.py) relies on.
+
+Usage:
+    python -m benchmarks.seed --database-url sqlite:////tmp/poetica-bench.db --poets 100000 --poems-per-poet 4
+"""
+
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+
+BENCH_PASSWORD = 'benchmark-pass'
+BENCH_EMAIL_DOMAIN = 'bench.poetica'
+
+WORDS = [
+    'moon', 'river', 'silent', 'autumn', 'leaves', 'falling', 'morning', 'light', 'cherry', 'blossom',
+    'winter', 'snow', 'over', 'mountain', 'whisper', 'shadow', 'ocean', 'waves', 'gentle', 'breeze',
+    'golden', 'evening', 'stars', 'dancing', 'forest', 'quiet', 'rain', 'petals', 'drifting', 'sky',
+    'little', 'frog', 'pond', 'ancient', 'summer', 'grass', 'dreams', 'wander', 'heron', 'lantern',
+    'velvet', 'ember', 'crimson', 'meadow', 'echo', 'harbor', 'willow', 'sparrow', 'hollow', 'tide',
+]
+TITLE_WORDS = ['Ode', 'Song', 'Verses', 'Notes', 'Letters', 'Hymn', 'Fragments', 'Elegy', 'Sketch', 'Ballad']
+
+
+def poet_email(index):
+    """
+    Email of the seeded poet with the given id (seeded poets are named after their id).
+    """
+    return f'poet{index}@{BENCH_EMAIL_DOMAIN}'
+
+
+def make_line(rng):
+    """
+    A random line of three to seven words from the benchmark vocabulary.
+    """
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 7)))
+
+
+def line_count_for(rng, criteria, is_open):
+    """
+    Number of lines a generated poem gets, based on its PoemType criteria.
+    Open collaborative poems stop short of their max_lines so they can still take contributions.
+    """
+    max_lines = (criteria or {}).get('max_lines')
+    if max_lines is None:
+        return rng.randint(1, 12) if is_open else rng.randint(3, 24)
+    return rng.randint(0, max_lines - 1) if is_open else max_lines
+
+
+def next_id(conn, table):
+    """
+    First free primary key of a table, so rows can be generated with explicit ids.
+    """
+    from sqlalchemy import func, select
+
+    return (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def bump_sequences(conn, tables):
+    """
+    On Postgres, explicit ids leave the serial sequences behind, so move them past the seeded rows.
+    """
+    if conn.dialect.name != 'postgresql':
+        return
+    for table in tables:
+        conn.exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"(SELECT COALESCE(MAX(id), 1) FROM {table.name}))"
+        )
+
+
+def flush(conn, table, rows):
+    """
+    Write a chunk of rows with a single executemany and commit it.
+    """
+    from sqlalchemy import insert
+
+    if rows:
+        conn.execute(insert(table), rows)
+        conn.commit()
+        rows.clear()
+
+
+def seed(poets=1000, poems_per_poet=3, collaborative_ratio=0.4, open_ratio=0.5, days=90,
+         chunk_size=10000, random_seed=42):
+    """
+    Generate the benchmark data set. Must run inside an application context.
+    Returns a dict with the number of rows written per table.
+    """
+    from werkzeug.security import generate_password_hash
+    from sqlalchemy import select
+    from backend.database import db
+    from backend.lobby import rebuild_lobby
+    from backend.models import Poet, Poem, PoemType, PoemDetails
+    from backend.published import freeze_published_poems
+    from backend.rhymes import line_rhyme_key
+    from backend.rollups import rebuild_rollups
+
+    rng = random.Random(random_seed)
+    poets_table, poems_table, details_table = Poet.__table__, Poem.__table__, PoemDetails.__table__
+    # One hash for everyone: hashing is deliberately slow and would dominate the seeding time
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    now = datetime.now(timezone.utc)
+    counts = {'poets': 0, 'poems': 0, 'poem_details': 0}
+    started = time.perf_counter()
+
+    with db.engine.connect() as conn:
+        if conn.dialect.name == 'sqlite':
+            conn.exec_driver_sql('PRAGMA synchronous=OFF')
+            conn.exec_driver_sql('PRAGMA journal_mode=WAL')
+
+        poem_types = [
+            (poem_type_id, criteria)
+            for poem_type_id, criteria in conn.execute(select(PoemType.__table__.c.id, PoemType.__table__.c.criteria))
+        ]
+        if not poem_types:
+            raise RuntimeError('No poem types found. Start the app once so initialize_poem_types() can run. 🍬')
+
+        # Step 1: Poets, with explicit ids so poems can reference them without a round trip
+        first_poet_id = next_id(conn, poets_table)
+        rows = []
+        for index in range(first_poet_id, first_poet_id + poets):
+            rows.append({
+                'id': index,
+                'poet_name': f'benchpoet{index}',
+                'email': poet_email(index),
+                'password_hash': password_hash,
+                'created_at': now - timedelta(days=rng.uniform(0, days)),
+            })
+            if len(rows) >= chunk_size:
+                counts['poets'] += len(rows)
+                flush(conn, poets_table, rows)
+        counts['poets'] += len(rows)
+        flush(conn, poets_table, rows)
+        last_poet_id = first_poet_id + poets - 1
+
+        # Step 2: Poems and their ordered contributions
+        poem_id = next_id(conn, poems_table)
+        detail_id = next_id(conn, details_table)
+        poem_rows, detail_rows = [], []
+
+        for poet_id in range(first_poet_id, last_poet_id + 1):
+            for number in range(poems_per_poet):
+                poem_type_id, criteria = rng.choice(poem_types)
+                is_collaborative = rng.random() < collaborative_ratio
+                is_open = is_collaborative and rng.random() < open_ratio
+                created_at = now - timedelta(days=rng.uniform(0, days))
+
+                poem_rows.append({
+                    'id': poem_id,
+                    'poet_id': poet_id,
+                    'poem_type_id': poem_type_id,
+                    'title': f'{rng.choice(TITLE_WORDS)} of the {rng.choice(WORDS)} #{number + 1}',
+                    'is_collaborative': is_collaborative,
+                    'is_published': not is_open,
+                    'created_at': created_at,
+                })
+
+                contributor_id = poet_id
+                for line_number in range(line_count_for(rng, criteria, is_open)):
+                    if is_collaborative and line_number > 0 and poets > 1:
+                        # Never the same poet twice in a row, as validate_consecutive_contributions_new requires
+                        previous_id = contributor_id
+                        while contributor_id == previous_id:
+                            contributor_id = rng.randint(first_poet_id, last_poet_id)
+                    content = make_line(rng)
+                    detail_rows.append({
+                        'id': detail_id,
+                        'poem_id': poem_id,
+                        'poet_id': contributor_id,
+                        'content': content,
+                        'submitted_at': created_at + timedelta(minutes=line_number + 1),
+                        'rhyme_key': line_rhyme_key(content),
+                    })
+                    detail_id += 1
+
+                poem_id += 1
+
+                if len(detail_rows) >= chunk_size:
+                    counts['poems'] += len(poem_rows)
+                    counts['poem_details'] += len(detail_rows)
+                    flush(conn, poems_table, poem_rows)
+                    flush(conn, details_table, detail_rows)
+
+        counts['poems'] += len(poem_rows)
+        counts['poem_details'] += len(detail_rows)
+        flush(conn, poems_table, poem_rows)
+        flush(conn, details_table, detail_rows)
+
+        bump_sequences(conn, [poets_table, poems_table, details_table])
+        conn.commit()
+
+    # The rows went in through Core, past the ORM events that keep these up to date
+    rebuild_lobby()
+    rebuild_rollups()
+    freeze_published_poems()
+
+    counts['seconds'] = round(time.perf_counter() - started, 2)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Seed the poeticaVENA database with benchmark data.')
+    parser.add_argument('--database-url', help='Database to seed (defaults to DATABASE_URL).')
+    parser.add_argument('--poets', type=int, default=1000)
+    parser.add_argument('--poems-per-poet', type=int, default=3)
+    parser.add_argument('--collaborative-ratio', type=float, default=0.4)
+    parser.add_argument('--open-ratio', type=float, default=0.5,
+                        help='Share of collaborative poems left unpublished and open for contributions.')
+    parser.add_argument('--days', type=int, default=90, help='Spread creation dates over this many days.')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        # Config reads DATABASE_URL at import time, so set it before the app is imported
+        os.environ['DATABASE_URL'] = args.database_url
+
+    from backend import create_app
+
+    app = create_app()
+    with app.app_context():
+        counts = seed(
+            poets=args.poets,
+            poems_per_poet=args.poems_per_poet,
+            collaborative_ratio=args.collaborative_ratio,
+            open_ratio=args.open_ratio,
+            days=args.days,
+            chunk_size=args.chunk_size,
+            random_seed=args.seed,
+        )
+
+    rows = counts['poets'] + counts['poems'] + counts['poem_details']
+    print(
+        f"Seeded {counts['poets']} poets, {counts['poems']} poems and {counts['poem_details']} lines "
+        f"in {counts['seconds']}s ({rows / max(counts['seconds'], 0.001):,.0f} rows/s). 🌾"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Microbenchmark: per-poem cost of serializing poem responses.
+
+Compares the previous path (Poem.to_dict -> PoemResponse.model_validate -> model_dump -> jsonify)
+with the precompiled TypeAdapter path in backend/serializers.py, on poems already loaded
+with their details so only serialization is measured.
+
+Usage:
+    python -m benchmarks.serialization --poems 2000 --lines 9
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+
+def old_path(poem):
+    from flask import jsonify
+    from backend.schemas import PoemResponse
+
+    return jsonify(PoemResponse.model_validate(poem.to_dict()).model_dump()).get_data()
+
+
+def new_path(poem):
+    from backend.serializers import poem_to_json
+
+    return poem_to_json(poem)
+
+
+def measure(function, poems, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for poem in poems:
+            function(poem)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(poems) * 1_000_000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the per-poem serialization cost.')
+    parser.add_argument('--poems', type=int, default=2000)
+    parser.add_argument('--lines', type=int, default=9, help='Lines (PoemDetails) per poem.')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    database = os.path.join(tempfile.mkdtemp(), 'serialization.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+
+    from sqlalchemy.orm import selectinload
+    from backend import create_app
+    from backend.database import db
+    from backend.models import Poem, PoemDetails, Poet
+
+    app = create_app()
+    with app.app_context(), app.test_request_context():
+        poet = Poet(poet_name='benchpoet', email='bench@bench.poetica', password_hash='x')
+        db.session.add(poet)
+        db.session.flush()
+        now = datetime.now(timezone.utc)
+        for number in range(args.poems):
+            poem = Poem(title=f'poem {number}', poem_type_id=3, poet_id=poet.id, is_published=True, created_at=now)
+            poem.poem_details = [
+                PoemDetails(poet_id=poet.id, content=f'line {line} of poem {number}',
+                            submitted_at=now + timedelta(seconds=line))
+                for line in range(args.lines)
+            ]
+            db.session.add(poem)
+        db.session.commit()
+        db.session.expunge_all()
+
+        poems = Poem.query.options(selectinload(Poem.poem_details)).all()
+        # Touch the relationship so both paths start from fully loaded rows
+        for poem in poems:
+            poem.poem_details
+
+        assert len(new_path(poems[0])) > 0 and len(old_path(poems[0])) > 0
+        before = measure(old_path, poems, args.repeat)
+        after = measure(new_path, poems, args.repeat)
+
+    print(f'{args.poems} poems x {args.lines} lines, best of {args.repeat} runs')
+    print(f'  to_dict + model_validate + model_dump + jsonify: {before:8.1f} µs/poem')
+    print(f'  TypeAdapter.dump_json (serializers.poem_to_json): {after:8.1f} µs/poem')
+    print(f'  speed-up: {before / after:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
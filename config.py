@@ -7,3 +7,59 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'one_more_secret_key')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Read replicas for GET requests (see backend/database.py), e.g. "postgresql://replica1/db,postgresql://replica2/db"
+    SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()]
+    # How long a client reads from the primary after a write, so it sees its own changes
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', '5'))
+
+    # In-memory activity feed (see backend/activity.py): newest contributions kept, and how long
+    # a worker trusts its buffer and rendered pages before re-reading the database
+    ACTIVITY_BUFFER_SIZE = int(os.environ.get('ACTIVITY_BUFFER_SIZE', '200'))
+    ACTIVITY_CACHE_SECONDS = float(os.environ.get('ACTIVITY_CACHE_SECONDS', '5'))
+
+    # How long a worker's in-memory poet name index (see backend/poet_index.py) is used
+    # before it is reloaded in the background to pick up the other workers' changes
+    POET_INDEX_REFRESH_SECONDS = float(os.environ.get('POET_INDEX_REFRESH_SECONDS', '30'))
+
+    # Poets allowed on the /admin endpoints, e.g. "elis@gmail.com,ops@poetica.app"
+    ADMIN_EMAILS = [email.strip().lower() for email in os.environ.get('ADMIN_EMAILS', '').split(',') if email.strip()]
+
+    # Token-bucket admission control (see backend/rate_limit.py), rates as "N/second|minute|hour|day"
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_PER_POET = os.environ.get('RATE_LIMIT_PER_POET', '20/minute')
+    RATE_LIMIT_PER_IP = os.environ.get('RATE_LIMIT_PER_IP', '60/minute')
+    RATE_LIMIT_AI_GLOBAL = os.environ.get('RATE_LIMIT_AI_GLOBAL', '300/minute')
+    RATE_LIMIT_STORAGE_URL = os.environ.get('RATE_LIMIT_STORAGE_URL')   # e.g. redis://localhost:6379/0
+    # After a shared store failure, use the in-process buckets for this long before retrying it
+    RATE_LIMIT_STORE_RETRY_SECONDS = float(os.environ.get('RATE_LIMIT_STORE_RETRY_SECONDS', '30'))
+
+    # Micro-batching of AI validations (see backend/ai_batching.py): lines arriving within
+    # AI_BATCH_WAIT_MS of each other share one request of up to AI_BATCH_MAX_SIZE lines
+    AI_BATCH_ENABLED = os.environ.get('AI_BATCH_ENABLED', 'true').lower() == 'true'
+    AI_BATCH_MAX_SIZE = int(os.environ.get('AI_BATCH_MAX_SIZE', '8'))
+    AI_BATCH_WAIT_MS = float(os.environ.get('AI_BATCH_WAIT_MS', '15'))
+
+    # How often the in-memory AI usage counters are added to ai_usage_stats / ai_verdict_stats
+    AI_USAGE_FLUSH_SECONDS = float(os.environ.get('AI_USAGE_FLUSH_SECONDS', '60'))
+
+    # How long Idempotency-Key outcomes are kept for replay (see backend/idempotency.py)
+    IDEMPOTENCY_TTL_HOURS = float(os.environ.get('IDEMPOTENCY_TTL_HOURS', '24'))
+
+    # Poem revision history (see backend/revisions.py): fewer than this many deltas are
+    # replayed to rebuild a revision, as a full snapshot is stored at least that often
+    REVISION_MAX_REPLAY = int(os.environ.get('REVISION_MAX_REPLAY', '100'))
+
+    # Database connections each worker opens during warmup, per engine (see backend/lifecycle.py)
+    WARMUP_DB_CONNECTIONS = int(os.environ.get('WARMUP_DB_CONNECTIONS', '2'))
+
+    # ASGI mode (asgi.py): threads for the ordinary routes, and the async-driver URL of the
+    # primary for AI-bound routes (default: a PostgreSQL DATABASE_URL with asyncpg if installed)
+    ASGI_THREADS = int(os.environ.get('ASGI_THREADS', '32'))
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
+
+    # Logging (see backend/logging_config.py)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_LEVELS = os.environ.get('LOG_LEVELS', '')   # e.g. "backend.routes=DEBUG,backend.ai_val=INFO"
+    LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '1.0'))
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
@@ -0,0 +1,44 @@
+"""Add AI usage and verdict stats
+
+Revision ID: 1a6d3f8b2c94
+Revises: f08c2a4e6b31
+Create Date: 2026-10-19 15:21:47.118230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1a6d3f8b2c94'
+down_revision = 'f08c2a4e6b31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ai_usage_stats',
+    sa.Column('period_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('form', sa.String(length=50), nullable=False),
+    sa.Column('outcome', sa.String(length=20), nullable=False),
+    sa.Column('calls', sa.Integer(), nullable=False),
+    sa.Column('lines', sa.Integer(), nullable=False),
+    sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+    sa.Column('completion_tokens', sa.Integer(), nullable=False),
+    sa.Column('latency_ms', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('period_start', 'model', 'form', 'outcome')
+    )
+    op.create_table('ai_verdict_stats',
+    sa.Column('period_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('form', sa.String(length=50), nullable=False),
+    sa.Column('ai_verdict', sa.String(length=10), nullable=False),
+    sa.Column('counter_verdict', sa.String(length=10), nullable=False),
+    sa.Column('lines', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('period_start', 'form', 'ai_verdict', 'counter_verdict')
+    )
+
+
+def downgrade():
+    op.drop_table('ai_verdict_stats')
+    op.drop_table('ai_usage_stats')
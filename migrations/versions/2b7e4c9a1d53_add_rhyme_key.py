@@ -0,0 +1,26 @@
+"""Add rhyme key to poem details
+
+Revision ID: 2b7e4c9a1d53
+Revises: 1a6d3f8b2c94
+Create Date: 2026-10-19 17:02:11.482915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b7e4c9a1d53'
+down_revision = '1a6d3f8b2c94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('poem_details', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rhyme_key', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('poem_details', schema=None) as batch_op:
+        batch_op.drop_column('rhyme_key')
@@ -0,0 +1,26 @@
+"""Add version to poems
+
+Revision ID: 3c8f1a6e4d72
+Revises: 2b7e4c9a1d53
+Create Date: 2026-10-19 19:24:37.106512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8f1a6e4d72'
+down_revision = '2b7e4c9a1d53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('poems', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('poems', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,38 @@
+"""Add poem revisions
+
+Revision ID: 4d9a2b7c5e18
+Revises: 3c8f1a6e4d72
+Create Date: 2026-10-19 21:05:52.318740
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d9a2b7c5e18'
+down_revision = '3c8f1a6e4d72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('poem_revisions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('poem_id', sa.Integer(), nullable=False),
+    sa.Column('number', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('base', sa.Integer(), nullable=False),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('snapshot_bytes', sa.Integer(), nullable=False),
+    sa.Column('delta_bytes', sa.Integer(), nullable=False),
+    sa.Column('poet_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['poem_id'], ['poems.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('poem_id', 'number', name='_poem_revision_number_uc')
+    )
+
+
+def downgrade():
+    op.drop_table('poem_revisions')
@@ -0,0 +1,47 @@
+"""Add indexes for the hot query paths
+
+Revision ID: 5b8e3c1d9a47
+Revises: 2ff75b1d2f1d
+Create Date: 2026-10-19 09:12:31.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e3c1d9a47'
+down_revision = '2ff75b1d2f1d'
+branch_labels = None
+depends_on = None
+
+
+def open_collaborative_predicate():
+    is_collaborative = sa.column('is_collaborative', sa.Boolean)
+    is_published = sa.column('is_published', sa.Boolean)
+    return sa.and_(is_collaborative == sa.true(), is_published == sa.false())
+
+
+def upgrade():
+    # A poem's lines in submission order (every read and contribution path)
+    op.create_index('ix_poem_details_poem_id_submitted_at', 'poem_details',
+                    ['poem_id', 'submitted_at', 'id'], if_not_exists=True)
+    # Contributions by poet (delete_poet)
+    op.create_index('ix_poem_details_poet_id', 'poem_details', ['poet_id'], if_not_exists=True)
+    # Listings filtered on publication and collaboration status
+    op.create_index('ix_poems_published_collaborative', 'poems',
+                    ['is_published', 'is_collaborative'], if_not_exists=True)
+    # Poems by poet (/all-poems?poet_id=, delete_poet)
+    op.create_index('ix_poems_poet_id_collaborative', 'poems', ['poet_id', 'is_collaborative'], if_not_exists=True)
+    # Partial index over the collaborative poems still open for contributions
+    op.create_index('ix_poems_open_collaborative', 'poems', ['id'], if_not_exists=True,
+                    postgresql_where=open_collaborative_predicate(),
+                    sqlite_where=open_collaborative_predicate())
+
+
+def downgrade():
+    op.drop_index('ix_poems_open_collaborative', table_name='poems')
+    op.drop_index('ix_poems_poet_id_collaborative', table_name='poems')
+    op.drop_index('ix_poems_published_collaborative', table_name='poems')
+    op.drop_index('ix_poem_details_poet_id', table_name='poem_details')
+    op.drop_index('ix_poem_details_poem_id_submitted_at', table_name='poem_details')
@@ -0,0 +1,31 @@
+"""Add published poems
+
+Revision ID: 5e1b8d3f2a96
+Revises: 4d9a2b7c5e18
+Create Date: 2026-10-19 23:12:40.581204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e1b8d3f2a96'
+down_revision = '4d9a2b7c5e18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('published_poems',
+    sa.Column('poem_id', sa.Integer(), nullable=False),
+    sa.Column('lines', sa.Text(), nullable=False),
+    sa.Column('body', sa.LargeBinary(), nullable=False),
+    sa.Column('frozen_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['poem_id'], ['poems.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('poem_id')
+    )
+
+
+def downgrade():
+    op.drop_table('published_poems')
@@ -0,0 +1,25 @@
+"""Add poet name prefix index
+
+Revision ID: 6f2c9e4a7b31
+Revises: 5e1b8d3f2a96
+Create Date: 2026-10-20 00:41:17.902365
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f2c9e4a7b31'
+down_revision = '5e1b8d3f2a96'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_poets_lower_poet_name', 'poets', [sa.text('lower(poet_name)')], unique=False,
+                    postgresql_ops={'lower(poet_name)': 'text_pattern_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_poets_lower_poet_name', table_name='poets')
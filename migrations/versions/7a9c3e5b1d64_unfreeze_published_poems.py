@@ -0,0 +1,25 @@
+"""Unfreeze published poems rendered with the old timestamp format
+
+Revision ID: 7a9c3e5b1d64
+Revises: 6f2c9e4a7b31
+Create Date: 2026-10-20 09:12:44.518230
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7a9c3e5b1d64'
+down_revision = '6f2c9e4a7b31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Frozen bodies carry naive timestamps; reads fall back to the live poem until
+    # `flask freeze-poems` renders them again in UTC
+    op.execute('DELETE FROM published_poems')
+
+
+def downgrade():
+    op.execute('DELETE FROM published_poems')
@@ -0,0 +1,42 @@
+"""Add the collaboration lobby table
+
+Revision ID: 8d21f6a0c3e5
+Revises: 5b8e3c1d9a47
+Create Date: 2026-10-19 10:05:47.203118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d21f6a0c3e5'
+down_revision = '5b8e3c1d9a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('collaboration_lobby',
+    sa.Column('poem_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('poem_type_id', sa.Integer(), nullable=False),
+    sa.Column('poet_id', sa.Integer(), nullable=False),
+    sa.Column('line_count', sa.Integer(), nullable=False),
+    sa.Column('max_lines', sa.Integer(), nullable=True),
+    sa.Column('remaining_slots', sa.Integer(), nullable=True),
+    sa.Column('last_contributor_id', sa.Integer(), nullable=True),
+    sa.Column('last_activity_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['last_contributor_id'], ['poets.id'], ),
+    sa.ForeignKeyConstraint(['poem_id'], ['poems.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['poem_type_id'], ['poem_types.id'], ),
+    sa.ForeignKeyConstraint(['poet_id'], ['poets.id'], ),
+    sa.PrimaryKeyConstraint('poem_id')
+    )
+    op.create_index('ix_collaboration_lobby_activity', 'collaboration_lobby', ['last_activity_at', 'poem_id'])
+    # Existing open poems are filled in by `flask rebuild-lobby`
+
+
+def downgrade():
+    op.drop_index('ix_collaboration_lobby_activity', table_name='collaboration_lobby')
+    op.drop_table('collaboration_lobby')
@@ -0,0 +1,26 @@
+"""Add idempotency response headers
+
+Revision ID: 8e4b2d6f1a37
+Revises: 7a9c3e5b1d64
+Create Date: 2026-10-20 11:26:08.174529
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4b2d6f1a37'
+down_revision = '7a9c3e5b1d64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('response_headers', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.drop_column('response_headers')
@@ -0,0 +1,34 @@
+"""Add poem published_at
+
+Revision ID: 9c5a7e1f3b82
+Revises: 8e4b2d6f1a37
+Create Date: 2026-10-20 13:48:31.602917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c5a7e1f3b82'
+down_revision = '8e4b2d6f1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('poems', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('published_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Poems published so far: with their last line, or when they were started if they have none.
+    # Run `flask rebuild-stats` afterwards to move their publications to these days
+    op.execute(sa.text(
+        'UPDATE poems SET published_at = COALESCE('
+        '(SELECT MAX(submitted_at) FROM poem_details WHERE poem_details.poem_id = poems.id), created_at) '
+        'WHERE is_published = :published'
+    ).bindparams(published=True))
+
+
+def downgrade():
+    with op.batch_alter_table('poems', schema=None) as batch_op:
+        batch_op.drop_column('published_at')
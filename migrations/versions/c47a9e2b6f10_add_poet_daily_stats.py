@@ -0,0 +1,36 @@
+"""Add daily poet statistics rollups
+
+Revision ID: c47a9e2b6f10
+Revises: 8d21f6a0c3e5
+Create Date: 2026-10-19 11:20:08.641930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47a9e2b6f10'
+down_revision = '8d21f6a0c3e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('poet_daily_stats',
+    sa.Column('poet_id', sa.Integer(), nullable=False),
+    sa.Column('poem_type_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('contributions', sa.Integer(), nullable=False),
+    sa.Column('poems_published', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['poem_type_id'], ['poem_types.id'], ),
+    sa.ForeignKeyConstraint(['poet_id'], ['poets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('poet_id', 'poem_type_id', 'day')
+    )
+    op.create_index('ix_poet_daily_stats_day', 'poet_daily_stats', ['day'])
+    # Existing history is backfilled by `flask rebuild-stats`
+
+
+def downgrade():
+    op.drop_index('ix_poet_daily_stats_day', table_name='poet_daily_stats')
+    op.drop_table('poet_daily_stats')
@@ -0,0 +1,31 @@
+"""Add indexes for the activity feed
+
+Revision ID: e3b5d7f9a214
+Revises: c47a9e2b6f10
+Create Date: 2026-10-19 12:41:55.093276
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b5d7f9a214'
+down_revision = 'c47a9e2b6f10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Contributions newest first, globally and per poet (keyset on submitted_at, id)
+    op.create_index('ix_poem_details_submitted_at', 'poem_details', ['submitted_at', 'id'], if_not_exists=True)
+    op.create_index('ix_poem_details_poet_id_submitted_at', 'poem_details',
+                    ['poet_id', 'submitted_at', 'id'], if_not_exists=True)
+    # Covered by the leading column of ix_poem_details_poet_id_submitted_at
+    op.drop_index('ix_poem_details_poet_id', table_name='poem_details', if_exists=True)
+
+
+def downgrade():
+    op.create_index('ix_poem_details_poet_id', 'poem_details', ['poet_id'], if_not_exists=True)
+    op.drop_index('ix_poem_details_poet_id_submitted_at', table_name='poem_details')
+    op.drop_index('ix_poem_details_submitted_at', table_name='poem_details')
@@ -22,6 +22,13 @@ How it Works:
 Uses Flask's test_cli_runner() method tied to the app fixture.
 """
 
+import os
+
+# config.Config reads the environment when it is imported
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+os.environ.setdefault('OPENAI_API_KEY', 'test-openai-key')
+os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+
 import pytest
 from backend import create_app
 from backend.database import db
@@ -33,7 +40,7 @@ def app():
     Create and configure a new app instance for testing.
     """
     app = create_app()
-    app.config.updater(
+    app.config.update(
         TESTING=True,  # Enables testing mode (disables error catching)
         SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",  # Use in-memory SQLite DB
         SQLALCHEMY_TRACK_MODIFICATIONS=False,   # Suppress warning messages
@@ -61,3 +68,17 @@ def runner(app):
     A test CLI runner for the app (for testing CLI commands).
     """
     return app.test_cli_runner()
+
+
+@pytest.fixture
+def poet(client):
+    """
+    Registers and logs in a poet: poet('ann') returns (poet id, Authorization headers).
+    """
+    def register(poet_name):
+        email = f'{poet_name}@example.com'
+        client.post('/auth/register', json={'poet_name': poet_name, 'email': email, 'password_hash': 'Secret123!'})
+        response = client.post('/auth/login', json={'email': email, 'password': 'Secret123!'})
+        headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+        return client.get('/poet/me', headers=headers).get_json()['id'], headers
+    return register
@@ -0,0 +1,87 @@
+"""
+The activity feed: newest contributions first, the first page served from memory.
+"""
+
+from backend.activity import feed
+from backend.database import db
+from backend.models import Poem, PoemDetails
+
+
+def create_poem(poet_id, title='Feed'):
+    poem = Poem(title=title, poem_type_id=3, poet_id=poet_id, is_collaborative=True)
+    db.session.add(poem)
+    db.session.commit()
+    return poem.id
+
+
+def add_lines(poem_id, poet_id, *contents):
+    for content in contents:
+        db.session.add(PoemDetails(poem_id=poem_id, poet_id=poet_id, content=content))
+        db.session.commit()
+
+
+def contents(page):
+    return [event['content'] for event in page['events']]
+
+
+def activity(client, headers, **query):
+    response = client.get('/activity', headers=headers, query_string=query)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_new_lines_show_up_first_right_away(client, poet):
+    poet_id, headers = poet('chronicler')
+    poem_id = create_poem(poet_id)
+    add_lines(poem_id, poet_id, 'first', 'second')
+    assert contents(activity(client, headers)) == ['second', 'first']
+
+    add_lines(poem_id, poet_id, 'third')
+
+    page = activity(client, headers)
+    assert contents(page) == ['third', 'second', 'first']
+    assert page['events'][0]['poem_title'] == 'Feed'
+    assert page['events'][0]['poet_name'] == 'chronicler'
+
+
+def test_edits_and_deletions_reload_the_feed(client, poet):
+    poet_id, headers = poet('chronicler')
+    poem_id = create_poem(poet_id)
+    add_lines(poem_id, poet_id, 'kept', 'dropped')
+    activity(client, headers)
+
+    db.session.get(Poem, poem_id).title = 'Renamed'
+    db.session.delete(PoemDetails.query.filter_by(content='dropped').one())
+    db.session.commit()
+
+    page = activity(client, headers)
+    assert contents(page) == ['kept']
+    assert page['events'][0]['poem_title'] == 'Renamed'
+
+
+def test_cursor_pages_go_past_the_buffer(client, poet):
+    feed.configure(size=3, max_age=5.0)
+    poet_id, headers = poet('chronicler')
+    poem_id = create_poem(poet_id)
+    add_lines(poem_id, poet_id, *(f'line {index}' for index in range(7)))
+
+    seen, cursor = [], None
+    for _ in range(4):
+        page = activity(client, headers, limit=2, **({'cursor': cursor} if cursor else {}))
+        seen += contents(page)
+        cursor = page['next_cursor']
+
+    assert seen == [f'line {index}' for index in reversed(range(7))]
+    assert cursor is None
+
+
+def test_feed_of_one_poet(client, poet):
+    (ann_id, headers), (bob_id, _) = poet('annabel'), poet('bobbie')
+    poem_id = create_poem(ann_id)
+    add_lines(poem_id, ann_id, 'ann one')
+    add_lines(poem_id, bob_id, 'bob one')
+    add_lines(poem_id, ann_id, 'ann two')
+
+    assert contents(activity(client, headers, poet_id=bob_id)) == ['bob one']
+    assert contents(activity(client, headers, poet_id=ann_id)) == ['ann two', 'ann one']
+    assert client.get('/activity', headers=headers, query_string={'cursor': 'nope'}).status_code == 400
@@ -0,0 +1,95 @@
+"""
+Bulk import: batches of poems written set-based, validated, resumable.
+"""
+
+import json
+
+import pytest
+from backend.bulk_import import IMPORTED_PASSWORD_HASH, import_poems, save_checkpoint
+from backend.models import LobbyEntry, Poem, PoemDetails, Poet, PoetDailyStats, PublishedPoem
+
+
+RECORDS = [
+    {'title': 'Alone', 'poet_name': 'importer', 'poem_type': 'Free Verse',
+     'lines': ['the first line', 'the second line']},
+    {'title': 'Together', 'poet_name': 'importer', 'poem_type': '3', 'is_collaborative': True,
+     'lines': ['mine', {'content': 'yours', 'poet_name': 'guest'}]},
+    {'title': 'Pond', 'poet_name': 'guest', 'poem_type': 'haiku',
+     'lines': ['an old silent pond', 'a frog leaps in with a splash', 'splash silence again']},
+    {'title': 'Too long', 'poet_name': 'guest', 'poem_type': 'Haiku',
+     'lines': ['an old and very silent pond', 'a frog leaps in with a splash', 'splash silence again']},
+    {'title': 'Sonnet', 'poet_name': 'guest', 'poem_type': 'Sonnet', 'lines': ['shall I']},
+    {'poet_name': 'guest', 'poem_type': 'Haiku', 'lines': ['untitled']},
+]
+
+
+@pytest.fixture
+def anthology(tmp_path):
+    path = tmp_path / 'anthology.jsonl'
+    path.write_text(''.join(json.dumps(record) + '\n' for record in RECORDS), encoding='utf-8')
+    return str(path)
+
+
+def test_import_writes_valid_poems_and_rejects_the_rest(app, anthology):
+    stats = import_poems(anthology, batch_size=2, report=lambda message: None)
+
+    assert (stats.records, stats.poems, stats.lines, stats.poets, stats.rejected) == (6, 3, 7, 2, 3)
+    rejects = [json.loads(line) for line in open(f'{anthology}.rejects.jsonl', encoding='utf-8')]
+    assert [reject['record'] for reject in rejects] == [3, 4, 5]
+    assert rejects[0]['reason'].startswith('Line 1 has')
+    assert rejects[1]['reason'] == 'Unknown poem type: Sonnet'
+    assert rejects[2]['reason'] == 'Missing field: title'
+
+    guest = Poet.query.filter_by(poet_name='guest').one()
+    assert guest.password_hash == IMPORTED_PASSWORD_HASH
+    together = Poem.query.filter_by(title='Together').one()
+    lines = PoemDetails.query.filter_by(poem_id=together.id).order_by(PoemDetails.submitted_at).all()
+    assert [(line.content, line.poet_id) for line in lines] == [('mine', together.poet_id), ('yours', guest.id)]
+
+
+def test_import_publishes_finished_poems_and_rebuilds_derived_tables(app, anthology):
+    import_poems(anthology, report=lambda message: None)
+
+    published = {poem.title: poem for poem in Poem.query.filter_by(is_published=True)}
+    assert sorted(published) == ['Alone', 'Pond']
+    assert all(poem.published_at is not None for poem in published.values())
+    assert PublishedPoem.query.count() == 2
+    assert [entry.title for entry in LobbyEntry.query.all()] == ['Together']
+    assert sum(row.contributions for row in PoetDailyStats.query.all()) == 7
+    assert sum(row.poems_published for row in PoetDailyStats.query.all()) == 2
+
+
+def test_rerun_skips_poems_already_imported(app, anthology):
+    import_poems(anthology, report=lambda message: None)
+
+    stats = import_poems(anthology, report=lambda message: None)
+
+    assert (stats.poems, stats.skipped) == (0, 3)
+    assert Poem.query.count() == 3
+
+
+def test_resume_continues_after_the_checkpoint(app, anthology):
+    save_checkpoint(f'{anthology}.checkpoint', 2)
+
+    stats = import_poems(anthology, resume=True, report=lambda message: None)
+
+    assert stats.records == 4
+    assert [poem.title for poem in Poem.query.all()] == ['Pond']
+
+
+def test_import_command_reads_csv(runner, tmp_path):
+    path = tmp_path / 'lines.csv'
+    path.write_text(
+        'title,poet_name,poem_type,content,is_collaborative,contributor\n'
+        'Round,host,Free Verse,we begin,true,\n'
+        'Round,host,Free Verse,and I follow,true,visitor\n',
+        encoding='utf-8',
+    )
+
+    result = runner.invoke(args=['import-poems', str(path)])
+
+    assert result.exit_code == 0, result.output
+    assert 'Import finished' in result.output
+    poem = Poem.query.filter_by(title='Round').one()
+    assert poem.is_collaborative and not poem.is_published
+    assert PoemDetails.query.filter_by(poem_id=poem.id).count() == 2
@@ -0,0 +1,49 @@
+"""
+POST /drafts/annotate: syllable counts for the lines that changed since the last call.
+"""
+
+
+def annotate(client, headers, content, previous_hashes=(), poem_type_id=1):
+    response = client.post('/drafts/annotate', headers=headers, json={
+        'poem_type_id': poem_type_id, 'content': content, 'previous_hashes': list(previous_hashes)})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_lines_are_counted_against_the_form(client, poet):
+    _, headers = poet('drafter')
+
+    body = annotate(client, headers, 'an old silent pond\n\na frog\n')
+
+    assert (body['line_count'], body['max_lines'], body['syllable_structure']) == (2, 3, [5, 7, 5])
+    assert [(line['line'], line['syllables'], line['expected'], line['fits']) for line in body['lines']] == [
+        (1, 5, 5, True), (2, 2, 7, False),
+    ]
+
+
+def test_only_changed_lines_come_back(client, poet):
+    _, headers = poet('drafter')
+    first = annotate(client, headers, 'an old silent pond\na frog')
+    hashes = [line['hash'] for line in first['lines']]
+
+    body = annotate(client, headers, 'an old silent pond\na frog leaps in with a splash\nsplash', hashes)
+
+    assert body['unchanged'] == 1
+    assert [(line['line'], line['fits']) for line in body['lines']] == [(2, True), (3, False)]
+
+
+def test_lines_past_the_form_do_not_fit(client, poet):
+    _, headers = poet('drafter')
+
+    body = annotate(client, headers, 'one\ntwo\nthree\nfour', poem_type_id=1)
+
+    assert body['lines'][-1]['fits'] is False
+    assert annotate(client, headers, 'any line at all', poem_type_id=3)['lines'][0]['fits'] is True
+
+
+def test_unknown_poem_type_is_404(client, poet):
+    _, headers = poet('drafter')
+
+    response = client.post('/drafts/annotate', headers=headers, json={'poem_type_id': 999, 'content': 'a line'})
+
+    assert response.status_code == 404
@@ -0,0 +1,92 @@
+"""
+PATCH /edit-poem: optimistic versioning with If-Match, and writes of changed lines only.
+"""
+
+from backend.database import db
+from backend.models import Poem, PoemDetails
+
+
+def create_poem(poet_id, lines):
+    poem = Poem(title='Grey sea', poem_type_id=3, poet_id=poet_id)
+    db.session.add(poem)
+    db.session.flush()
+    for content in lines:
+        db.session.add(PoemDetails(poem_id=poem.id, poet_id=poet_id, content=content))
+    db.session.commit()
+    return poem.id
+
+
+def test_get_sends_the_version_as_etag(client, poet):
+    poet_id, headers = poet('editor')
+    poem_id = create_poem(poet_id, ['the wide grey sea'])
+
+    response = client.get(f'/edit-poem/{poem_id}', headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] == f'"{response.get_json()["version"]}"'
+
+
+def test_patch_with_current_etag_saves_and_bumps_the_version(client, poet):
+    poet_id, headers = poet('editor')
+    poem_id = create_poem(poet_id, ['the wide grey sea', 'a gull above'])
+    read = client.get(f'/edit-poem/{poem_id}', headers=headers)
+    details = read.get_json()['details']
+
+    response = client.patch(f'/edit-poem/{poem_id}', headers={**headers, 'If-Match': read.headers['ETag']}, json={
+        'title': 'Grey sea', 'poem_type_id': 3,
+        'details': [{'id': details[1]['id'], 'content': 'two gulls above'}],
+    })
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['version'] == read.get_json()['version'] + 1
+    assert response.headers['ETag'] == f'"{body["version"]}"'
+    assert [d['content'] for d in body['details']] == ['the wide grey sea', 'two gulls above']
+
+
+def test_patch_with_stale_etag_is_refused_with_412(client, poet):
+    poet_id, headers = poet('editor')
+    poem_id = create_poem(poet_id, ['the wide grey sea'])
+    stale = client.get(f'/edit-poem/{poem_id}', headers=headers).headers['ETag']
+    client.patch(f'/edit-poem/{poem_id}', headers={**headers, 'If-Match': stale}, json={'title': 'First', 'poem_type_id': 3})
+
+    response = client.patch(f'/edit-poem/{poem_id}', headers={**headers, 'If-Match': stale}, json={'title': 'Second', 'poem_type_id': 3})
+
+    assert response.status_code == 412
+    assert response.headers['ETag'] != stale
+    assert db.session.get(Poem, poem_id).title == 'First'
+
+
+def test_patch_without_if_match_is_refused_with_428(client, poet):
+    poet_id, headers = poet('editor')
+    poem_id = create_poem(poet_id, ['the wide grey sea'])
+
+    response = client.patch(f'/edit-poem/{poem_id}', headers=headers, json={'title': 'Unchecked', 'poem_type_id': 3})
+
+    assert response.status_code == 428
+    assert 'ETag' in response.headers
+    assert db.session.get(Poem, poem_id).title == 'Grey sea'
+
+
+def test_patch_with_if_match_star_overwrites(client, poet):
+    poet_id, headers = poet('editor')
+    poem_id = create_poem(poet_id, ['the wide grey sea'])
+
+    response = client.patch(f'/edit-poem/{poem_id}', headers={**headers, 'If-Match': '*'}, json={'title': 'Forced', 'poem_type_id': 3})
+
+    assert response.status_code == 200
+    assert response.get_json()['title'] == 'Forced'
+
+
+def test_unchanged_patch_keeps_the_version(client, poet):
+    poet_id, headers = poet('editor')
+    poem_id = create_poem(poet_id, ['the wide grey sea'])
+    read = client.get(f'/edit-poem/{poem_id}', headers=headers)
+    details = read.get_json()['details']
+
+    response = client.patch(f'/edit-poem/{poem_id}', headers={**headers, 'If-Match': read.headers['ETag']}, json={
+        'title': 'Grey sea', 'poem_type_id': 3, 'details': [{'id': details[0]['id'], 'content': 'the wide grey sea'}],
+    })
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] == read.headers['ETag']
@@ -0,0 +1,68 @@
+"""
+NDJSON export of the published corpus, streamed poem by poem.
+"""
+
+import json
+
+from backend.database import db
+from backend.export_utils import iter_published_poems
+from backend.models import Poem, PoemDetails
+
+
+def add_poem(poet_id, title, lines, poem_type_id=3, is_published=True):
+    poem = Poem(title=title, poem_type_id=poem_type_id, poet_id=poet_id, is_published=is_published)
+    db.session.add(poem)
+    db.session.flush()
+    for content in lines:
+        db.session.add(PoemDetails(poem_id=poem.id, poet_id=poet_id, content=content))
+    db.session.commit()
+    return poem.id
+
+
+def export(client, headers, **query):
+    response = client.get('/export/poems.ndjson', headers=headers, query_string=query)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_export_streams_published_poems_with_their_lines(client, poet):
+    poet_id, headers = poet('archivist')
+    first = add_poem(poet_id, 'First', ['one', 'two', 'three'])
+    add_poem(poet_id, 'Draft', ['not yet'], is_published=False)
+    second = add_poem(poet_id, 'Second', ['only'], poem_type_id=2)
+
+    poems = export(client, headers)
+
+    assert [(poem['id'], poem['title']) for poem in poems] == [(first, 'First'), (second, 'Second')]
+    assert [line['content'] for line in poems[0]['lines']] == ['one', 'two', 'three']
+    assert [poem['title'] for poem in export(client, headers, poem_type_id=2)] == ['Second']
+    assert [poem['title'] for poem in export(client, headers, after=first)] == ['Second']
+    assert export(client, headers, until='2000-01-01') == []
+
+
+def test_poems_are_whole_across_chunks(app, poet):
+    poet_id, _ = poet('archivist')
+    for index in range(3):
+        add_poem(poet_id, f'Poem {index}', [f'line {index}.{line}' for line in range(3)])
+
+    poems = list(iter_published_poems(chunk_size=2))
+
+    assert [len(poem['lines']) for poem in poems] == [3, 3, 3]
+
+
+def test_bad_dates_are_refused(client, poet):
+    _, headers = poet('archivist')
+
+    assert client.get('/export/poems.ndjson', headers=headers, query_string={'since': 'yesterday'}).status_code == 400
+
+
+def test_export_command_writes_a_file(runner, poet, tmp_path):
+    poet_id, _ = poet('archivist')
+    add_poem(poet_id, 'Kept', ['a line'])
+    output = tmp_path / 'corpus.ndjson'
+
+    result = runner.invoke(args=['export-poems', '--output', str(output)])
+
+    assert result.exit_code == 0, result.output
+    assert [json.loads(line)['title'] for line in output.read_text(encoding='utf-8').splitlines()] == ['Kept']
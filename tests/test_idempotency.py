@@ -0,0 +1,150 @@
+"""
+Idempotency-Key: retries replay the stored outcome instead of running the view again.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from flask import jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from backend import idempotency
+from backend.database import db
+from backend.idempotency import idempotent
+from backend.models import IdempotencyKey, Poem
+
+
+@pytest.fixture(autouse=True)
+def replay_cache(monkeypatch):
+    # Poet ids repeat from one test database to the next: don't replay another test's outcome
+    monkeypatch.setattr(idempotency, '_cache', idempotency._ReplayCache(idempotency.CACHE_SIZE))
+
+
+@pytest.fixture
+def calls(app):
+    """
+    Registers POST /idempotent-view and counts how often it really runs.
+    """
+    calls = []
+
+    @app.route('/idempotent-view', methods=['POST'])
+    @jwt_required()
+    @idempotent
+    def idempotent_view():
+        calls.append(1)
+        response = jsonify({'call': len(calls)})
+        response.status_code = 201
+        response.headers['Location'] = f'/poem/{len(calls)}'
+        response.set_etag(str(len(calls)))
+        return response
+
+    return calls
+
+
+def test_retry_replays_the_first_response(client, poet):
+    poet_id, headers = poet('retrier')
+    headers = {**headers, 'Idempotency-Key': 'create-once'}
+    body = {'title': 'Once', 'poem_type_id': 3, 'poet_id': poet_id}
+
+    first = client.post('/create-poem', json=body, headers=headers)
+    retry = client.post('/create-poem', json=body, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json() == first.get_json()
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert Poem.query.filter_by(title='Once').count() == 1
+
+
+def test_replay_from_the_database_keeps_the_headers(calls, client, poet, monkeypatch):
+    _, headers = poet('retrier')
+    headers = {**headers, 'Idempotency-Key': 'stored'}
+    first = client.post('/idempotent-view', json={}, headers=headers)
+    # Another worker: nothing in its memory
+    monkeypatch.setattr(idempotency, '_cache', idempotency._ReplayCache(idempotency.CACHE_SIZE))
+
+    retry = client.post('/idempotent-view', json={}, headers=headers)
+
+    assert len(calls) == 1
+    assert retry.status_code == 201
+    assert retry.get_json() == {'call': 1}
+    assert retry.headers['Location'] == first.headers['Location']
+    assert retry.headers['ETag'] == first.headers['ETag']
+    assert retry.headers['Content-Type'] == 'application/json'
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_same_key_with_another_body_is_refused_with_422(calls, client, poet):
+    _, headers = poet('retrier')
+    headers = {**headers, 'Idempotency-Key': 'reused'}
+    client.post('/idempotent-view', json={'title': 'one'}, headers=headers)
+
+    response = client.post('/idempotent-view', json={'title': 'two'}, headers=headers)
+
+    assert response.status_code == 422
+    assert len(calls) == 1
+
+
+def test_key_in_progress_is_answered_with_409(calls, client, poet):
+    poet_id, headers = poet('retrier')
+    now = datetime.now(timezone.utc)
+    db.session.add(IdempotencyKey(poet_id=poet_id, key='busy', fingerprint='running',
+                                  created_at=now, expires_at=now + timedelta(hours=1)))
+    db.session.commit()
+
+    response = client.post('/idempotent-view', json={}, headers={**headers, 'Idempotency-Key': 'busy'})
+
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '1'
+    assert calls == []
+
+
+def test_abandoned_key_is_taken_over(calls, client, poet):
+    poet_id, headers = poet('retrier')
+    then = datetime.now(timezone.utc) - idempotency.IN_PROGRESS_TIMEOUT - timedelta(seconds=1)
+    db.session.add(IdempotencyKey(poet_id=poet_id, key='abandoned', fingerprint='died',
+                                  created_at=then, expires_at=then + timedelta(hours=1)))
+    db.session.commit()
+
+    response = client.post('/idempotent-view', json={}, headers={**headers, 'Idempotency-Key': 'abandoned'})
+
+    assert response.status_code == 201
+    assert len(calls) == 1
+
+
+def test_lost_claim_race_is_answered_with_409(app, calls, client, poet):
+    _, headers = poet('retrier')
+
+    def collide(conn, cursor, statement, parameters, context, executemany):
+        # Another request inserts the key each time, and releases it before we can read it
+        if statement.startswith('INSERT INTO idempotency_keys'):
+            raise IntegrityError(statement, parameters, Exception('UNIQUE constraint failed'))
+
+    event.listen(db.engine, 'before_cursor_execute', collide)
+    try:
+        response = client.post('/idempotent-view', json={}, headers={**headers, 'Idempotency-Key': 'raced'})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', collide)
+
+    assert response.status_code == 409
+    assert calls == []
+
+
+def test_server_errors_release_the_key(app, client, poet):
+    failures = []
+
+    @app.route('/flaky-view', methods=['POST'])
+    @jwt_required()
+    @idempotent
+    def flaky_view():
+        failures.append(1)
+        if len(failures) == 1:
+            return jsonify({'error': 'down'}), 503
+        return jsonify({'ok': True}), 201
+
+    _, headers = poet('retrier')
+    headers = {**headers, 'Idempotency-Key': 'flaky'}
+
+    assert client.post('/flaky-view', json={}, headers=headers).status_code == 503
+    assert client.post('/flaky-view', json={}, headers=headers).status_code == 201
+    assert len(failures) == 2
@@ -0,0 +1,104 @@
+"""
+The collaboration lobby: open collaborative poems, maintained on every write.
+"""
+
+from backend.database import db
+from backend.lobby import rebuild_lobby
+from backend.models import LobbyEntry
+
+
+def create(client, poet, title, poem_type_id=3, is_collaborative=True):
+    poet_id, headers = poet
+    return client.post('/create-poem', headers=headers, json={
+        'title': title, 'poem_type_id': poem_type_id, 'poet_id': poet_id,
+        'is_collaborative': is_collaborative}).get_json()['id']
+
+
+def contribute(client, poet, poem_id, content, publish=False):
+    poet_id, headers = poet
+    response = client.post('/submit-collab-poem', headers=headers, json={
+        'poem_id': poem_id, 'poet_id': poet_id, 'content': content, 'publish': publish})
+    assert response.status_code == 201, response.get_json()
+
+
+def lobby(client, poet, **query):
+    response = client.get('/lobby', headers=poet[1], query_string=query)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def titles(page):
+    return [entry['title'] for entry in page['poems']]
+
+
+def stored_rows():
+    db.session.expire_all()
+    return sorted(
+        (e.poem_id, e.title, e.poem_type_id, e.line_count, e.remaining_slots, e.last_contributor_id, e.last_activity_at)
+        for e in LobbyEntry.query.all()
+    )
+
+
+def test_lobby_lists_open_collaborations_most_recently_active_first(client, poet):
+    ann, bob = poet('annabel'), poet('bobbie')
+    counted = create(client, ann, 'Counted', poem_type_id=2)
+    busy = create(client, ann, 'Busy')
+    create(client, ann, 'Alone', is_collaborative=False)
+    finished = create(client, ann, 'Finished')
+    contribute(client, bob, finished, 'the end', publish=True)
+    contribute(client, bob, busy, 'one more line')
+
+    page = lobby(client, ann)
+
+    assert titles(page) == ['Busy', 'Counted']
+    busy_entry, counted_entry = page['poems']
+    assert (busy_entry['line_count'], busy_entry['remaining_slots'], busy_entry['last_contributor_id']) == (1, None, bob[0])
+    assert (counted_entry['poem_id'], counted_entry['line_count'], counted_entry['remaining_slots']) == (counted, 0, 9)
+    assert titles(lobby(client, ann, poem_type_id=2)) == ['Counted']
+
+
+def test_poems_you_wrote_the_last_line_of_are_left_out(client, poet):
+    ann, bob = poet('annabel'), poet('bobbie')
+    poem_id = create(client, ann, 'Turns')
+    contribute(client, ann, poem_id, 'my line')
+
+    assert titles(lobby(client, ann)) == []
+    assert titles(lobby(client, bob)) == ['Turns']
+
+    contribute(client, bob, poem_id, 'your line')
+
+    assert titles(lobby(client, ann)) == ['Turns']
+    assert titles(lobby(client, bob)) == []
+
+
+def test_lobby_pages_follow_the_cursor(client, poet):
+    ann = poet('annabel')
+    for index in range(5):
+        create(client, ann, f'Poem {index}')
+
+    seen, cursor = [], None
+    for _ in range(3):
+        page = lobby(client, ann, limit=2, **({'cursor': cursor} if cursor else {}))
+        seen += titles(page)
+        cursor = page['next_cursor']
+
+    assert seen == [f'Poem {index}' for index in reversed(range(5))]
+    assert cursor is None
+    assert client.get('/lobby', headers=ann[1], query_string={'cursor': 'garbage'}).status_code == 400
+
+
+def test_maintained_rows_equal_a_rebuild(client, poet):
+    ann, bob = poet('annabel'), poet('bobbie')
+    first, second, third = (create(client, ann, title) for title in ('First', 'Second', 'Third'))
+    contribute(client, bob, first, 'bob starts')
+    contribute(client, ann, first, 'ann answers')
+    contribute(client, bob, second, 'bob again')
+    contribute(client, bob, third, 'and closes', publish=True)
+    client.patch(f'/edit-poem/{second}', headers={**ann[1], 'If-Match': '*'}, json={'title': 'Renamed', 'poem_type_id': 2})
+    client.delete('/delete-poet', headers=bob[1])
+
+    maintained = stored_rows()
+    rebuild_lobby()
+
+    assert stored_rows() == maintained
+    assert [row[1] for row in maintained] == ['First', 'Renamed']
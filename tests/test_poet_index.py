@@ -0,0 +1,62 @@
+"""
+Poet name autocomplete: the in-memory index ranks like the database fallback.
+"""
+
+import pytest
+from backend.database import db
+from backend.models import Poet
+from backend.poet_index import poet_index, search_database
+
+
+NAMES = ['Rose', 'rosalind', 'Rosa', 'Rosemary', 'roses_and_thorns', 'rose%', 'Robin', 'Ann']
+
+
+@pytest.fixture
+def poets(app):
+    for index, name in enumerate(NAMES):
+        db.session.add(Poet(poet_name=name, email=f'poet{index}@example.com', password_hash='not-a-real-hash'))
+    db.session.commit()
+    return {poet.poet_name: poet.id for poet in Poet.query.all()}
+
+
+def names(client, headers, prefix, **query):
+    response = client.get('/poets/autocomplete', headers=headers, query_string={'prefix': prefix, **query})
+    assert response.status_code == 200
+    return [poet['poet_name'] for poet in response.get_json()['poets']]
+
+
+def test_exact_name_first_then_shorter_then_alphabetical(client, poet, poets):
+    _, headers = poet('watcher')
+
+    assert names(client, headers, 'ROSE') == ['Rose', 'rose%', 'Rosemary', 'roses_and_thorns']
+    assert names(client, headers, 'ro', limit=3) == ['Rosa', 'Rose', 'Robin']
+    assert names(client, headers, 'rose%') == ['rose%']
+    assert names(client, headers, 'zz') == []
+    assert client.get('/poets/autocomplete', headers=headers).status_code == 400
+
+
+@pytest.mark.parametrize('prefix', ['r', 'ro', 'ROS', 'rose', 'rose_', 'rose%', 'a', 'w', 'x'])
+def test_memory_and_database_agree(app, poets, prefix):
+    poet_index.load()
+
+    assert poet_index.search(prefix, 50) == search_database(prefix, 50)
+
+
+def test_renames_and_deletions_are_applied_on_commit(client, poet, poets):
+    _, headers = poet('watcher')
+    names(client, headers, 'ro')
+
+    db.session.get(Poet, poets['Rosa']).poet_name = 'Petra'
+    db.session.delete(db.session.get(Poet, poets['Robin']))
+    db.session.commit()
+
+    assert names(client, headers, 'ro') == ['Rose', 'rose%', 'rosalind', 'Rosemary', 'roses_and_thorns']
+    assert names(client, headers, 'pet') == ['Petra']
+
+
+def test_poet_by_name_resolves_to_the_best_match(client, poet, poets):
+    _, headers = poet('watcher')
+
+    assert client.get('/poet/rose', headers=headers).get_json()['id'] == poets['Rose']
+    assert client.get('/poet/rosem', headers=headers).get_json()['id'] == poets['Rosemary']
+    assert client.get('/poet/nobody', headers=headers).status_code == 404
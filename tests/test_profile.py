@@ -0,0 +1,75 @@
+"""
+GET /poet/<id>/profile: the poet, their counts and recent work in one query.
+"""
+
+from sqlalchemy import event
+from backend.database import db
+from backend.models import Poem, PoemDetails
+
+
+def add_poem(poet_id, title, lines=(), is_collaborative=False, is_published=False, contributor_id=None):
+    poem = Poem(title=title, poem_type_id=3, poet_id=poet_id,
+                is_collaborative=is_collaborative, is_published=is_published)
+    db.session.add(poem)
+    db.session.flush()
+    for content in lines:
+        db.session.add(PoemDetails(poem_id=poem.id, poet_id=contributor_id or poet_id, content=content))
+    db.session.commit()
+    return poem.id
+
+
+def test_profile_counts_and_recent_work(client, poet):
+    (ann_id, ann_headers), (bob_id, _) = poet('annabel'), poet('bobbie')
+    add_poem(ann_id, 'Draft')
+    add_poem(ann_id, 'Published', ['all of it'], is_published=True)
+    shared = add_poem(bob_id, 'Shared', ['bob first'], is_collaborative=True)
+    db.session.add(PoemDetails(poem_id=shared, poet_id=ann_id, content='ann second'))
+    db.session.commit()
+
+    body = client.get(f'/poet/{ann_id}/profile', headers=ann_headers).get_json()
+
+    assert body['poet']['poet_name'] == 'annabel'
+    assert 'password_hash' not in body['poet']
+    assert body['counts'] == {
+        'poems': 2, 'published_poems': 1, 'collaborative_poems': 0, 'contributions': 2, 'collaborations': 1,
+    }
+    assert [poem['title'] for poem in body['recent_poems']] == ['Published', 'Draft']
+    assert [line['content'] for line in body['recent_contributions']] == ['ann second', 'all of it']
+
+
+def test_other_poets_do_not_see_drafts(client, poet):
+    (ann_id, _), (_, bob_headers) = poet('annabel'), poet('bobbie')
+    add_poem(ann_id, 'Draft', ['unfinished'])
+    add_poem(ann_id, 'Open', is_collaborative=True)
+
+    body = client.get(f'/poet/{ann_id}/profile', headers=bob_headers).get_json()
+
+    assert [poem['title'] for poem in body['recent_poems']] == ['Open']
+    assert body['recent_contributions'] == []
+    assert body['counts']['poems'] == 2
+
+
+def test_profile_is_one_query(app, client, poet):
+    ann_id, headers = poet('annabel')
+    for index in range(4):
+        add_poem(ann_id, f'Poem {index}', [f'line {index}'], is_published=True)
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        response = client.get(f'/poet/{ann_id}/profile', headers=headers, query_string={'limit': 2})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert response.status_code == 200
+    assert len(response.get_json()['recent_poems']) == 2
+    assert len(statements) == 1
+
+
+def test_unknown_poet_is_404(client, poet):
+    _, headers = poet('annabel')
+
+    assert client.get('/poet/999/profile', headers=headers).status_code == 404
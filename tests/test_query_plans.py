@@ -0,0 +1,90 @@
+"""
+The hot queries must be served by their indexes once the migrations have run
+(see backend/query_plans.py and `flask check-query-plans`).
+
+The database starts out as the original schema, the four tables the migrations were
+written against, and is upgraded to head like a deployed database would be.
+"""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+from flask_migrate import stamp, upgrade
+from config import Config
+from backend import create_app
+from backend.query_plans import check_query_plans
+
+
+MIGRATIONS = str(Path(__file__).resolve().parents[1] / 'migrations')
+BASELINE_REVISION = '2ff75b1d2f1d'
+
+BASELINE_SCHEMA = """
+CREATE TABLE poets (
+    id INTEGER NOT NULL,
+    poet_name VARCHAR(50) NOT NULL,
+    email VARCHAR(100) NOT NULL,
+    password_hash VARCHAR(260) NOT NULL,
+    created_at DATETIME,
+    PRIMARY KEY (id),
+    UNIQUE (poet_name),
+    UNIQUE (email)
+);
+CREATE TABLE poem_types (
+    id INTEGER NOT NULL,
+    name VARCHAR(50) NOT NULL,
+    description TEXT NOT NULL,
+    criteria JSON NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE (name)
+);
+CREATE TABLE poems (
+    id INTEGER NOT NULL,
+    poet_id INTEGER NOT NULL,
+    poem_type_id INTEGER NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    is_collaborative BOOLEAN,
+    is_published BOOLEAN,
+    created_at DATETIME,
+    updated_at DATETIME,
+    PRIMARY KEY (id),
+    CONSTRAINT _poem_title_poet_uc UNIQUE (title, poet_id),
+    FOREIGN KEY(poet_id) REFERENCES poets (id),
+    FOREIGN KEY(poem_type_id) REFERENCES poem_types (id)
+);
+CREATE TABLE poem_details (
+    id INTEGER NOT NULL,
+    poem_id INTEGER NOT NULL,
+    poet_id INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    submitted_at DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(poem_id) REFERENCES poems (id) ON DELETE CASCADE,
+    FOREIGN KEY(poet_id) REFERENCES poets (id)
+);
+"""
+
+
+@pytest.fixture
+def migrated_app(tmp_path, monkeypatch):
+    """
+    An app on a SQLite file holding the original schema, upgraded to the latest revision.
+    """
+    path = tmp_path / 'poetica.db'
+    with sqlite3.connect(path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{path}')
+
+    app = create_app()
+    with app.app_context():
+        stamp(directory=MIGRATIONS, revision=BASELINE_REVISION)
+        upgrade(directory=MIGRATIONS)
+        yield app
+
+
+def test_key_queries_use_their_indexes(migrated_app):
+    results = check_query_plans()
+
+    assert results
+    for name, indexes, uses_index, plan in results:
+        assert uses_index, f'{name}: expected one of {indexes}, got plan {plan}'
@@ -0,0 +1,101 @@
+"""
+Admission control: token buckets per poet, per IP and for the AI-backed work.
+"""
+
+import pytest
+from backend.rate_limit import MemoryBucketStore, limiter, parse_rate
+
+
+@pytest.fixture
+def limits(app):
+    """
+    Turns the limiter on with the given rates, e.g. limits(RATE_LIMIT_PER_POET='2/minute').
+    """
+    def configure(**rates):
+        app.config.update(RATE_LIMIT_ENABLED=True, **rates)
+        limiter.configure(app)
+    yield configure
+    app.config['RATE_LIMIT_ENABLED'] = False
+    limiter.configure(app)
+
+
+def create(client, poet, title, poem_type_id=3):
+    poet_id, headers = poet
+    return client.post('/create-poem', headers=headers, json={
+        'title': title, 'poem_type_id': poem_type_id, 'poet_id': poet_id, 'is_collaborative': True})
+
+
+def test_parse_rate():
+    assert parse_rate('20/minute') == (20, 60)
+    assert parse_rate('5/Day') == (5, 86400)
+    with pytest.raises(ValueError):
+        parse_rate('often')
+
+
+def test_buckets_are_taken_from_all_or_none():
+    store = MemoryBucketStore()
+    assert store.take([('a', 1, 60), ('b', 2, 60)], now=0) == (True, [0, 1])
+
+    allowed, levels = store.take([('a', 1, 60), ('b', 2, 60)], now=1)
+
+    assert not allowed
+    assert levels[1] == pytest.approx(1 + 2 / 60)
+    # One token per period / capacity seconds
+    assert store.take([('a', 1, 60)], now=60)[0]
+
+
+def test_poet_over_budget_gets_429_with_retry_after(client, poet, limits):
+    ann, bob = poet('annabel'), poet('bobbie')
+    limits(RATE_LIMIT_PER_POET='2/minute', RATE_LIMIT_PER_IP='100/minute')
+
+    first = create(client, ann, 'One')
+    assert first.status_code == 201
+    assert (first.headers['X-RateLimit-Scope'], first.headers['X-RateLimit-Remaining']) == ('poet', '1')
+    assert create(client, ann, 'Two').status_code == 201
+
+    limited = create(client, ann, 'Three')
+
+    assert limited.status_code == 429
+    assert limited.headers['X-RateLimit-Scope'] == 'poet'
+    assert int(limited.headers['Retry-After']) > 0
+    assert create(client, bob, 'Theirs').status_code == 201
+
+
+def test_ai_bucket_is_only_charged_for_ai_validated_lines(client, poet, limits):
+    ann, bob = poet('annabel'), poet('bobbie')
+    limits(RATE_LIMIT_PER_POET='100/minute', RATE_LIMIT_PER_IP='100/minute', RATE_LIMIT_AI_GLOBAL='1/minute')
+    # Somebody else's AI call just emptied the global bucket
+    assert limiter.check(('ai',), None, None)[0]
+    haiku = create(client, ann, 'Haiku', poem_type_id=1).get_json()['id']
+    free_verse = create(client, ann, 'Free', poem_type_id=3).get_json()['id']
+
+    submitted = client.post('/submit-collab-poem', headers=bob[1], json={
+        'poem_id': free_verse, 'poet_id': bob[0], 'content': 'no model needed'})
+    limited = client.post('/submit-collab-poem', headers=bob[1], json={
+        'poem_id': haiku, 'poet_id': bob[0], 'content': 'an old silent pond'})
+
+    assert submitted.status_code == 201
+    assert limited.status_code == 429
+    assert limited.headers['X-RateLimit-Scope'] == 'ai'
+    assert limiter.snapshot()['rules']['ai']['limited'] == 1
+
+
+def test_failing_shared_store_is_skipped_for_a_while(client, poet, limits):
+    class DownStore:
+        name = 'redis'
+        calls = 0
+
+        def take(self, buckets, now):
+            DownStore.calls += 1
+            raise ConnectionError('store down')
+
+    ann = poet('annabel')
+    limits(RATE_LIMIT_PER_POET='100/minute', RATE_LIMIT_STORE_RETRY_SECONDS=60)
+    limiter.store = DownStore()
+
+    responses = [create(client, ann, f'Poem {index}') for index in range(3)]
+
+    assert [response.status_code for response in responses] == [201, 201, 201]
+    assert DownStore.calls == 1
+    snapshot = limiter.snapshot()
+    assert (snapshot['store_errors'], snapshot['store_skipped'], snapshot['store_available']) == (1, 2, False)
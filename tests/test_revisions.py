@@ -0,0 +1,110 @@
+"""
+Revision history: edits append revisions that rebuild the poem as it was.
+"""
+
+from backend.database import db
+from backend.models import Poem, PoemDetails, PoemRevision
+
+
+def create_poem(poet_id, lines):
+    poem = Poem(title='Tide', poem_type_id=3, poet_id=poet_id)
+    db.session.add(poem)
+    db.session.flush()
+    for content in lines:
+        db.session.add(PoemDetails(poem_id=poem.id, poet_id=poet_id, content=content))
+    db.session.commit()
+    return poem.id
+
+
+def edit(client, headers, poem_id, **changes):
+    etag = client.get(f'/edit-poem/{poem_id}', headers=headers).headers['ETag']
+    response = client.patch(f'/edit-poem/{poem_id}', headers={**headers, 'If-Match': etag},
+                            json={'poem_type_id': 3, **changes})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def shown(body):
+    return body['title'], [(d['id'], d['content']) for d in body['details']]
+
+
+def test_every_revision_replays_to_the_poem_as_it_was(app, client, poet):
+    app.config['REVISION_MAX_REPLAY'] = 3
+    poet_id, headers = poet('reviser')
+    poem_id = create_poem(poet_id, [f'line {i} of the tide' for i in range(5)])
+    states = {1: shown(client.get(f'/edit-poem/{poem_id}', headers=headers).get_json())}
+
+    for step in range(8):
+        body = client.get(f'/edit-poem/{poem_id}', headers=headers).get_json()
+        if step % 3 == 2:
+            db.session.add(PoemDetails(poem_id=poem_id, poet_id=poet_id, content=f'added {step}'))
+            db.session.commit()
+        line = body['details'][step % len(body['details'])]
+        body = edit(client, headers, poem_id, title=f'Tide {step}',
+                    details=[{'id': line['id'], 'content': line['content'] + ' ~'}])
+        states[len(states) + 1] = shown(body)
+
+    for number, state in states.items():
+        response = client.get(f'/poem/{poem_id}/revisions/{number}', headers=headers)
+        assert response.status_code == 200
+        assert shown(response.get_json()) == state
+        assert response.get_json()['replayed'] < 3
+
+    kinds = [row.kind for row in PoemRevision.query.filter_by(poem_id=poem_id).order_by(PoemRevision.number)]
+    assert kinds.count('snapshot') > 1
+
+
+def test_as_of_returns_the_newest_revision_until_then(client, poet):
+    poet_id, headers = poet('reviser')
+    poem_id = create_poem(poet_id, ['a line'])
+    edit(client, headers, poem_id, title='Second')
+    created_at = client.get(f'/poem/{poem_id}/revisions/2', headers=headers).get_json()['created_at']
+
+    response = client.get(f'/poem/{poem_id}/revisions/as-of', query_string={'at': created_at}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.get_json()['revision'] == 2
+    assert response.get_json()['title'] == 'Second'
+    assert client.get(f'/poem/{poem_id}/revisions/as-of', query_string={'at': 'soon'}, headers=headers).status_code == 400
+    assert client.get(f'/poem/{poem_id}/revisions/3', headers=headers).status_code == 404
+
+
+def test_contributions_and_unchanged_edits_add_no_revision(client, poet):
+    poet_id, headers = poet('reviser')
+    response = client.post('/create-poem', headers=headers, json={
+        'title': 'Shared', 'poem_type_id': 3, 'poet_id': poet_id, 'is_collaborative': True})
+    poem_id = response.get_json()['id']
+    client.post('/submit-collab-poem', headers=headers, json={'poem_id': poem_id, 'poet_id': poet_id, 'content': 'first'})
+    edit(client, headers, poem_id, title='Shared')
+
+    assert client.get(f'/poem/{poem_id}/revisions', headers=headers).get_json()['revisions'] == []
+
+    edit(client, headers, poem_id, title='Renamed')
+    revisions = client.get(f'/poem/{poem_id}/revisions', headers=headers).get_json()['revisions']
+    assert [(r['revision'], r['kind']) for r in revisions] == [(2, 'delta'), (1, 'snapshot')]
+    assert revisions[0]['changes'] == {'title': 'Renamed'}
+    assert revisions[0]['poet_id'] == poet_id
+
+
+def test_revision_pages_continue_below_next_before(client, poet):
+    poet_id, headers = poet('reviser')
+    poem_id = create_poem(poet_id, ['a line'])
+    for step in range(4):
+        edit(client, headers, poem_id, title=f'Title {step}')
+
+    first = client.get(f'/poem/{poem_id}/revisions', query_string={'limit': 3}, headers=headers).get_json()
+    second = client.get(f'/poem/{poem_id}/revisions', query_string={'limit': 3, 'before': first['next_before']},
+                        headers=headers).get_json()
+
+    assert [r['revision'] for r in first['revisions']] == [5, 4, 3]
+    assert [r['revision'] for r in second['revisions']] == [2, 1]
+    assert second['next_before'] is None
+
+
+def test_deleting_a_poem_drops_its_history(client, poet):
+    poet_id, headers = poet('reviser')
+    poem_id = create_poem(poet_id, ['a line'])
+    edit(client, headers, poem_id, title='Gone soon')
+
+    assert client.delete(f'/delete-poem/{poem_id}', headers=headers).status_code == 200
+    assert PoemRevision.query.filter_by(poem_id=poem_id).count() == 0
@@ -0,0 +1,76 @@
+"""
+Rhyme schemes, checked locally with the rhyme keys of the lines' last words.
+"""
+
+import pytest
+from backend.database import db
+from backend.models import PoemDetails, PoemType
+from backend.rhymes import line_rhyme_key, rhyme_scheme_error
+
+
+@pytest.mark.parametrize('first, second', [
+    ('the cat', 'a hat'),
+    ('under the moon', 'gone too soon'),
+    ('they sing', 'of spring'),
+])
+def test_rhyming_lines_share_a_key(first, second):
+    assert line_rhyme_key(first) == line_rhyme_key(second) is not None
+
+
+def test_other_endings_have_other_keys():
+    assert line_rhyme_key('the cat') != line_rhyme_key('the dog')
+    assert line_rhyme_key('...') is None
+
+
+def test_rhyme_scheme_error_names_the_line_to_rhyme_with():
+    keys = [line_rhyme_key(line) for line in ('the cat', 'the dog')]
+
+    assert rhyme_scheme_error('ABAB', keys, line_rhyme_key('a hat')) is None
+    assert rhyme_scheme_error('ABAB', keys, line_rhyme_key('a fog')) == 1
+    assert rhyme_scheme_error('AX', keys[:1], line_rhyme_key('anything')) is None
+    # The scheme starts again with every stanza
+    assert rhyme_scheme_error('AA', keys, line_rhyme_key('a frog')) is None
+    assert rhyme_scheme_error(None, keys, line_rhyme_key('a hat')) is None
+
+
+@pytest.fixture
+def couplet():
+    poem_type = PoemType(name='Couplet', description='Two rhyming lines.',
+                         criteria={'max_lines': 2, 'rhyme_scheme': 'AA'})
+    db.session.add(poem_type)
+    db.session.commit()
+    return poem_type.id
+
+
+def submit_individual(client, poet, poem_type_id, title, content):
+    poet_id, headers = poet
+    poem_id = client.post('/create-poem', headers=headers, json={
+        'title': title, 'poem_type_id': poem_type_id, 'poet_id': poet_id}).get_json()['id']
+    return client.post('/submit-individual-poem', headers=headers, json={
+        'poem_id': poem_id, 'poet_id': poet_id, 'content': content})
+
+
+def test_individual_poems_follow_their_rhyme_scheme(client, poet, couplet):
+    ann = poet('annabel')
+
+    rhymed = submit_individual(client, ann, couplet, 'Rhymed', 'I saw a cat\nit wore a hat')
+    unrhymed = submit_individual(client, ann, couplet, 'Unrhymed', 'I saw a cat\nit chased a dog')
+
+    assert rhymed.status_code == 201
+    assert unrhymed.status_code == 400
+    assert 'rhyme with line 1' in unrhymed.get_json()['error']
+
+
+def test_collaborative_lines_are_checked_against_stored_keys(client, poet, couplet):
+    (ann_id, ann_headers), (bob_id, bob_headers) = poet('annabel'), poet('bobbie')
+    poem_id = client.post('/create-poem', headers=ann_headers, json={
+        'title': 'Together', 'poem_type_id': couplet, 'poet_id': ann_id, 'is_collaborative': True}).get_json()['id']
+    db.session.add(PoemDetails(poem_id=poem_id, poet_id=ann_id, content='I saw a cat'))
+    db.session.commit()
+    assert PoemDetails.query.filter_by(poem_id=poem_id).one().rhyme_key == line_rhyme_key('a hat')
+
+    response = client.post('/submit-collab-poem', headers=bob_headers, json={
+        'poem_id': poem_id, 'poet_id': bob_id, 'content': 'it chased a dog'})
+
+    assert response.status_code == 400
+    assert 'rhyme with line 1' in response.get_json()['error']
@@ -0,0 +1,103 @@
+"""
+Daily poet statistics: maintained on every write, equal to a rebuild from scratch.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from backend.database import db
+from backend.models import Poem, Poet, PoetDailyStats
+from backend.rollups import rebuild_rollups
+
+
+def buckets():
+    db.session.expire_all()
+    return sorted(
+        (row.poet_id, row.poem_type_id, row.day, row.contributions, row.poems_published)
+        for row in PoetDailyStats.query.all() if row.contributions or row.poems_published
+    )
+
+
+def assert_rebuild_agrees():
+    maintained = buckets()
+    rebuild_rollups()
+    assert buckets() == maintained
+
+
+def write_poem(client, poet_id, headers, title, poem_type_id=3):
+    poem_id = client.post('/create-poem', headers=headers, json={
+        'title': title, 'poem_type_id': poem_type_id, 'poet_id': poet_id}).get_json()['id']
+    response = client.post('/submit-individual-poem', headers=headers, json={
+        'poem_id': poem_id, 'poet_id': poet_id, 'content': 'the whole of the poem'})
+    assert response.status_code == 201
+    return poem_id
+
+
+def collaborate(client, poets, lines):
+    owner_id, owner_headers = poets[0]
+    poem_id = client.post('/create-poem', headers=owner_headers, json={
+        'title': 'Round', 'poem_type_id': 3, 'poet_id': owner_id, 'is_collaborative': True}).get_json()['id']
+    for index in range(lines):
+        poet_id, headers = poets[index % len(poets)]
+        response = client.post('/submit-collab-poem', headers=headers, json={
+            'poem_id': poem_id, 'poet_id': poet_id, 'content': f'line {index}',
+            'publish': index == lines - 1})
+        assert response.status_code == 201
+    return poem_id
+
+
+def test_contributions_and_publications_are_counted(client, poet):
+    ann, bob = poet('annabel'), poet('bobbie')
+    write_poem(client, *ann, 'Alone')
+    collaborate(client, [ann, bob], 3)
+    today = datetime.now(timezone.utc).date()
+
+    assert buckets() == [(ann[0], 3, today, 3, 2), (bob[0], 3, today, 1, 0)]
+    stats = client.get(f'/stats/poets/{ann[0]}', headers=ann[1]).get_json()
+    assert (stats['contributions'], stats['poems_published']) == (3, 2)
+    board = client.get('/leaderboard', headers=ann[1]).get_json()['poets']
+    assert [(p['poet_id'], p['contributions']) for p in board] == [(ann[0], 3), (bob[0], 1)]
+    assert_rebuild_agrees()
+
+
+def test_deleting_a_poem_or_a_poet_takes_their_counts_away(client, poet):
+    # A deleted poet's lines in collaborations stay, credited to deletedPoet
+    ann, bob = poet('annabel'), poet('bobbie')
+    poem_id = write_poem(client, *ann, 'Short-lived')
+    write_poem(client, *ann, 'Kept')
+    collaborate(client, [ann, bob], 4)
+
+    assert client.delete(f'/delete-poem/{poem_id}', headers=ann[1]).status_code == 200
+    assert client.delete('/delete-poet', headers=bob[1]).status_code == 200
+
+    anonymous_id = Poet.query.filter_by(poet_name='deletedPoet').one().id
+    today = datetime.now(timezone.utc).date()
+    assert buckets() == [(ann[0], 3, today, 3, 2), (anonymous_id, 3, today, 2, 0)]
+    assert_rebuild_agrees()
+
+
+def test_retyping_a_poem_moves_its_counts(client, poet):
+    ann = poet('annabel')
+    poem_id = write_poem(client, *ann, 'Shifting')
+
+    response = client.patch(f'/edit-poem/{poem_id}', headers={**ann[1], 'If-Match': '*'}, json={'poem_type_id': 2})
+
+    assert response.status_code == 200
+    today = datetime.now(timezone.utc).date()
+    assert buckets() == [(ann[0], 2, today, 1, 1)]
+    assert_rebuild_agrees()
+
+
+def test_publication_counts_on_the_day_it_happens(client, poet):
+    ann = poet('annabel')
+    poem_id = client.post('/create-poem', headers=ann[1], json={
+        'title': 'Slow', 'poem_type_id': 3, 'poet_id': ann[0]}).get_json()['id']
+    poem = db.session.get(Poem, poem_id)
+    poem.created_at = datetime.now(timezone.utc) - timedelta(days=3)
+    db.session.commit()
+
+    client.post('/submit-individual-poem', headers=ann[1], json={
+        'poem_id': poem_id, 'poet_id': ann[0], 'content': 'finished at last'})
+
+    assert db.session.get(Poem, poem_id).published_at is not None
+    assert buckets() == [(ann[0], 3, datetime.now(timezone.utc).date(), 1, 1)]
+    assert_rebuild_agrees()